@@ -0,0 +1,310 @@
+import json, random, re, threading, time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit, parse_qs
+
+SERIES_ID = "benchmark-show-1"
+SERIES_TITLE = "Benchmark Show"
+FIRST_EPISODE_ID = 1001
+HEIGHTS = (360, 720, 1080)
+SUBTITLE_LANGUAGES = ("English", "Spanish", "Portuguese")
+
+# Request kinds counted as API calls, the rest are CDN traffic
+API_KINDS = ("info", "watch", "servers")
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeServices:
+    """
+    Local stand-ins for the services zoro-dl talks to, served by one threaded HTTP server on 127.0.0.1.
+
+    - Consumet API: "/anime/zoro/info?id=..." and "/anime/zoro/watch?episodeId=..."
+    - AniWatch servers endpoint: "/ajax/v2/episode/servers?episodeId=..."
+    - HLS CDN: master and media playlists with 360p, 720p and 1080p variants, their segments, and WebVTT subtitles
+
+    Every response can be delayed by a fixed latency, every body is sent at a limited bandwidth per
+    connection, and a share of the requests can be failed with 503 to exercise the retries. Requests and
+    bytes are counted per kind ("info", "watch", "servers", "playlist", "segment", "subtitle").
+
+    Attributes:
+        episodes (int): Number of episodes of the fake series.
+        segments (int): Number of segments of every media playlist.
+        segment_seconds (int): Duration of every segment.
+        segment_size (int): Size of a 1080p segment in bytes; lower variants scale with their height.
+        segment_data (bytes or None): Bytes served for every segment instead of generated ones, e.g. a real MPEG-TS sample.
+        latency (float): Seconds every response is delayed by.
+        bandwidth (float or None): Bytes per second every response body is sent at, or None for no limit.
+        error_rate (float): Share of requests answered with 503.
+        dub (bool): Whether the episodes are also available dubbed.
+        counts (dict): Number of requests per kind.
+        bytes_sent (dict): Number of body bytes sent per kind.
+    """
+
+    def __init__(
+        self,
+        episodes=12,
+        segments=20,
+        segment_seconds=6,
+        segment_size=256 * 1024,
+        segment_data=None,
+        latency=0.0,
+        bandwidth=None,
+        error_rate=0.0,
+        dub=True,
+        seed=None,
+    ):
+        self.episodes = episodes
+        self.segments = segments
+        self.segment_seconds = segment_seconds
+        self.segment_size = segment_size
+        self.segment_data = segment_data
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.dub = dub
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.reset_counts()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    @property
+    def api_url(self):
+        return self.base_url + "/anime/zoro"
+
+    @property
+    def servers_url(self):
+        return self.base_url + "/ajax/v2/episode/servers?episodeId={}"
+
+    @property
+    def series_url(self):
+        return "{}/watch/{}".format(self.base_url, SERIES_ID)
+
+    def start(self):
+        """
+        Start serving on a free port of 127.0.0.1 in a background thread.
+
+        Returns:
+            FakeServices: The started services.
+        """
+        services = self
+
+        class Handler(_RequestHandler):
+            pass
+
+        Handler.services = services
+        self._server = _ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {}
+            self.bytes_sent = {}
+
+    def count(self, kind, byte_count=0):
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            self.bytes_sent[kind] = self.bytes_sent.get(kind, 0) + byte_count
+
+    def api_calls(self):
+        with self._lock:
+            return sum(self.counts.get(kind, 0) for kind in API_KINDS)
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def variant_segment_size(self, height):
+        return max(188, self.segment_size * height // max(HEIGHTS))
+
+    def variant_bandwidth(self, height):
+        return self.variant_segment_size(height) * 8 // self.segment_seconds
+
+    # Response bodies
+
+    def info(self):
+        return {
+            "id": SERIES_ID,
+            "malID": 1,
+            "title": SERIES_TITLE,
+            "episodes": [
+                {
+                    "id": "{}$episode${}".format(SERIES_ID, FIRST_EPISODE_ID + index),
+                    "number": index + 1,
+                    "title": "Episode {}".format(index + 1),
+                    "url": "https://aniwatch.to/watch/{}?ep={}".format(SERIES_ID, FIRST_EPISODE_ID + index),
+                }
+                for index in range(self.episodes)
+            ],
+        }
+
+    def watch(self, watch_id):
+        episode_id, track = watch_id.split("$episode$")[-1].split("$")[:2]
+        prefix = "{}/cdn/{}/{}".format(self.base_url, episode_id, track)
+        return {
+            "sources": [{"url": prefix + "/master.m3u8", "isM3U8": True}],
+            "subtitles": [
+                {"lang": language, "url": "{}/subs/{}.vtt".format(prefix, language.lower())}
+                for language in SUBTITLE_LANGUAGES
+            ]
+            + [{"lang": "Thumbnails", "url": prefix + "/thumbnails.vtt"}],
+        }
+
+    def servers(self, episode_id):
+        items = ['<div class="server-item" data-type="sub" data-server-id="4">HD-1</div>']
+        if self.dub:
+            items.append('<div class="server-item" data-type="dub" data-server-id="4">HD-1</div>')
+        return {"status": True, "html": "".join(items)}
+
+    def master_playlist(self):
+        lines = ["#EXTM3U"]
+        for height in HEIGHTS:
+            lines.append(
+                "#EXT-X-STREAM-INF:BANDWIDTH={},RESOLUTION={}x{}".format(
+                    self.variant_bandwidth(height), height * 16 // 9, height
+                )
+            )
+            lines.append("{}.m3u8".format(height))
+        return "\n".join(lines) + "\n"
+
+    def media_playlist(self, height):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-TARGETDURATION:{}".format(self.segment_seconds),
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for index in range(self.segments):
+            lines.append("#EXTINF:{:.3f},".format(self.segment_seconds))
+            lines.append("{}/{}.ts".format(height, index))
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def segment(self, height, index):
+        if self.segment_data is not None:
+            return self.segment_data
+        size = self.variant_segment_size(height)
+        # MPEG-TS sync bytes every 188 bytes, so the data at least looks like a transport stream
+        packet = b"\x47" + bytes([index % 256]) * 187
+        return (packet * (size // 188 + 1))[:size]
+
+    def subtitle(self, language):
+        cues = ["WEBVTT", ""]
+        for index in range(self.segments):
+            start = index * self.segment_seconds
+            cues.append(
+                "00:{:02d}:{:02d}.000 --> 00:{:02d}:{:02d}.500".format(
+                    start // 60, start % 60, start // 60, start % 60 + 1
+                )
+            )
+            cues.append("{} line {}".format(language, index + 1))
+            cues.append("")
+        return "\n".join(cues)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    services = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        services = self.services
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        route = self.route(url.path, query)
+        if route is None:
+            self.send_body(404, b"not found", "text/plain", "other")
+            return
+        kind, build = route
+
+        if services.latency:
+            time.sleep(services.latency)
+        if services.should_fail():
+            self.send_body(503, b"injected failure", "text/plain", kind)
+            return
+
+        body, content_type = build()
+        if isinstance(body, dict):
+            body, content_type = json.dumps(body).encode("utf-8"), "application/json"
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_body(200, body, content_type, kind)
+
+    def route(self, path, query):
+        services = self.services
+        if path == "/anime/zoro/info":
+            return "info", lambda: (services.info(), None)
+        if path == "/anime/zoro/watch":
+            return "watch", lambda: (services.watch(query.get("episodeId", "")), None)
+        if path == "/ajax/v2/episode/servers":
+            return "servers", lambda: (services.servers(query.get("episodeId", "")), None)
+
+        match = re.match(r"^/cdn/[^/]+/[^/]+/(.+)$", path)
+        if match is None:
+            return None
+        name = match.group(1)
+        if name == "master.m3u8":
+            return "playlist", lambda: (services.master_playlist(), "application/vnd.apple.mpegurl")
+        match = re.match(r"^(\d+)\.m3u8$", name)
+        if match:
+            height = int(match.group(1))
+            return "playlist", lambda: (services.media_playlist(height), "application/vnd.apple.mpegurl")
+        match = re.match(r"^(\d+)/(\d+)\.ts$", name)
+        if match:
+            height, index = int(match.group(1)), int(match.group(2))
+            return "segment", lambda: (services.segment(height, index), "video/mp2t")
+        match = re.match(r"^subs/(\w+)\.vtt$", name)
+        if match:
+            language = match.group(1)
+            return "subtitle", lambda: (services.subtitle(language), "text/vtt")
+        return None
+
+    def send_body(self, status, body, content_type, kind):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        bandwidth = self.services.bandwidth
+        chunk_size = 64 * 1024
+        started = time.time()
+        sent = 0
+        try:
+            for offset in range(0, len(body), chunk_size):
+                chunk = body[offset : offset + chunk_size]
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if bandwidth:
+                    ahead = sent / bandwidth - (time.time() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        finally:
+            self.services.count(kind, sent)
@@ -0,0 +1,237 @@
+"""
+Offline benchmarks of zoro-dl against the local stand-ins of benchmarks/fake_services.py.
+
+Every scenario runs a real ZORO instance against a fresh FakeServices server and reports episodes/hour,
+MB/s, API calls per episode, retries and the peak size of the temp directory. FFmpeg has to be on PATH to
+mux the episodes, as for any zoro-dl run.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --scenario season --episodes 12 --latency-ms 80 --bandwidth-mbps 20 --error-rate 0.02
+"""
+import argparse, contextlib, json, os, shutil, subprocess, sys, tempfile, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_services import FakeServices
+from zoro_dl import ZORO
+
+SCENARIOS = {
+    "single": {"episode": "1", "dl_type": "sub"},
+    "season": {"episode": None, "dl_type": "sub"},
+    "dual": {"episode": None, "dl_type": "both"},
+}
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class DiskSampler:
+    """
+    Samples the size of a directory on a background thread and keeps the peak.
+
+    Attributes:
+        path (str): The directory to sample.
+        interval (float): Seconds between samples.
+        peak (int): The largest size seen, in bytes.
+    """
+
+    def __init__(self, path, interval=0.05):
+        self.path = path
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, directory_size(self.path))
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, directory_size(self.path))
+
+
+def make_sample_segment(seconds, directory):
+    """
+    Encode a short MPEG-TS test clip with FFmpeg, served as every segment so the muxer sees a real stream.
+
+    Returns:
+        bytes or None: The clip, or None if FFmpeg could not make it.
+    """
+    path = os.path.join(directory, "sample.ts")
+    cmd = [
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=24",
+        "-f", "lavfi", "-i", "sine=frequency=440",
+        "-t", str(seconds),
+        "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac",
+        "-f", "mpegts", path,
+    ]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(path, "rb") as sample_file:
+            return sample_file.read() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenario(name, args, segment_data, log_file):
+    """
+    Run one scenario against a fresh FakeServices server in a scratch directory.
+
+    Args:
+        name (str): The scenario, a key of SCENARIOS.
+        args (argparse.Namespace): The command line options.
+        segment_data (bytes or None): Bytes served for every segment, or None for generated ones.
+        log_file (file): Where the terminal output of zoro-dl goes.
+
+    Returns:
+        dict: The scenario report.
+    """
+    scenario = SCENARIOS[name]
+    workdir = tempfile.mkdtemp(prefix="zoro-dl-bench-")
+    temp_dir = os.path.join(args.temp_dir or workdir, "tmp-{}".format(os.path.basename(workdir)))
+    os.makedirs(temp_dir)
+    episode_reports = []
+    run_reports = []
+
+    def metrics_hook(event):
+        if event["event"] == "episode":
+            episode_reports.append(event)
+        elif event["event"] == "run":
+            run_reports.append(event)
+
+    services = FakeServices(
+        episodes=args.episodes,
+        segments=args.segments,
+        segment_seconds=args.segment_seconds,
+        segment_size=len(segment_data) if segment_data else args.segment_kb * 1024,
+        segment_data=segment_data,
+        latency=args.latency_ms / 1000.0,
+        bandwidth=args.bandwidth_mbps * 1024 * 1024 if args.bandwidth_mbps else None,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    try:
+        with services, DiskSampler(temp_dir) as sampler, contextlib.redirect_stdout(log_file):
+            started = time.time()
+            zoro = ZORO(
+                services.series_url,
+                episode=scenario["episode"],
+                resolution="{}p".format(args.resolution),
+                dl_type=scenario["dl_type"],
+                cache_dir=os.path.join(workdir, "cache"),
+                journal=os.path.join(workdir, "journal.jsonl"),
+                metrics_hooks=[metrics_hook],
+                download_backend=args.backend,
+                stream_mux=args.stream_mux,
+                output_dir=os.path.join(workdir, "out"),
+                temp_dir=temp_dir,
+                api_url=services.api_url,
+                servers_url=services.servers_url,
+            )
+            zoro.start_dl(workers=args.workers)
+            wall_time = time.time() - started
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    episodes = len(episode_reports)
+    completed = sum(1 for report in episode_reports if report["ok"])
+    stages = run_reports[-1]["stages"] if run_reports else {}
+    downloaded = sum(
+        services.bytes_sent.get(kind, 0) for kind in ("playlist", "segment", "subtitle")
+    )
+    return {
+        "scenario": name,
+        "episodes": episodes,
+        "completed": completed,
+        "wall_time": round(wall_time, 3),
+        "episodes_per_hour": round(completed / wall_time * 3600, 1) if wall_time else 0.0,
+        "mb_per_s": round(downloaded / wall_time / (1024 * 1024), 2) if wall_time else 0.0,
+        "api_calls_per_episode": round(services.api_calls() / episodes, 2) if episodes else 0.0,
+        "requests": dict(services.counts),
+        "retries": sum(stage["retries"] for stage in stages.values()),
+        "peak_temp_bytes": sampler.peak,
+        "stages": stages,
+        "workdir": workdir if args.keep else None,
+    }
+
+
+def print_report(report):
+    print(
+        "{scenario:<8} {completed:>3}/{episodes:<3} {wall_time:>8.2f}s {episodes_per_hour:>10.1f} ep/h "
+        "{mb_per_s:>8.2f} MB/s {api_calls_per_episode:>6.2f} API/ep {retries:>4} retries "
+        "{peak:>9.1f} MB peak temp".format(peak=report["peak_temp_bytes"] / (1024 * 1024), **report)
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline zoro-dl benchmarks against local fake services")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run, can be repeated. Defaults to every scenario.")
+    parser.add_argument("--episodes", type=int, default=6, help="Episodes of the fake series (default: 6)")
+    parser.add_argument("--segments", type=int, default=20, help="Segments per episode (default: 20)")
+    parser.add_argument("--segment-seconds", type=int, default=6, help="Duration of a segment (default: 6)")
+    parser.add_argument("--segment-kb", type=int, default=256, help="Size of a 1080p segment in KiB when no real sample is served (default: 256)")
+    parser.add_argument("--segment-file", help="MPEG-TS file served as every segment. Defaults to a clip encoded with FFmpeg.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay of every response (default: 0)")
+    parser.add_argument("--bandwidth-mbps", type=float, default=None, help="MiB/s per connection (default: unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failed with 503 (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the error injection (default: 0)")
+    parser.add_argument("--resolution", type=int, default=1080, choices=(360, 720, 1080))
+    parser.add_argument("--backend", default="native", choices=("native", "n_m3u8dl"), help="Video download backend (default: native)")
+    parser.add_argument("--stream-mux", action="store_true", help="Stream segments into FFmpeg (native backend only)")
+    parser.add_argument("--workers", type=int, default=None, help="Workers per pipeline stage. Defaults to one episode at a time.")
+    parser.add_argument("--temp-dir", help="Parent directory of the temp files, e.g. on another disk")
+    parser.add_argument("--json", help="Append every report to this file as a JSON line")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directories")
+    parser.add_argument("--verbose", action="store_true", help="Show the zoro-dl terminal output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if shutil.which("ffmpeg") is None:
+        sys.exit("ffmpeg was not found on PATH, see the FFmpeg section of README.md")
+
+    if args.segment_file:
+        with open(args.segment_file, "rb") as segment_file:
+            segment_data = segment_file.read()
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            segment_data = make_sample_segment(args.segment_seconds, directory)
+        if segment_data is None:
+            print("ffmpeg could not encode a sample segment, serving generated bytes that may not mux")
+
+    log_file = sys.stdout if args.verbose else open(os.devnull, "w")
+    try:
+        for name in args.scenario or list(SCENARIOS):
+            report = run_scenario(name, args, segment_data, log_file)
+            print_report(report)
+            if args.json:
+                with open(args.json, "a", encoding="utf-8") as json_file:
+                    json_file.write(json.dumps(report) + "\n")
+    finally:
+        if log_file is not sys.stdout:
+            log_file.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import threading
+from types import SimpleNamespace
+from zoro_dl.admission import (
+    AUDIO_BANDWIDTH,
+    DEFAULT_BANDWIDTH,
+    DEFAULT_DURATION,
+    AdmissionController,
+    estimate_playlist_bytes,
+)
+from zoro_dl.job import EpisodeJob
+from zoro_dl.metrics import MetricsRecorder
+from zoro_dl.processor import ZORO
+from zoro_dl.scheduler import run_stage
+
+MB = 1024 ** 2
+
+
+class FakeVolume(AdmissionController):
+    """An AdmissionController reporting a fixed amount of free space."""
+
+    def __init__(self, free, min_free=100 * MB, poll_interval=5.0):
+        super().__init__("", min_free=min_free, poll_interval=poll_interval)
+        self.free = free
+
+    def free_bytes(self):
+        return self.free
+
+
+def test_estimate_from_variant_bandwidth_and_duration():
+    playlist = {"variant": {"bandwidth": 4000000}, "rendition": None, "duration": 100.0}
+
+    assert estimate_playlist_bytes(playlist) == 50000000
+
+
+def test_estimate_from_a_playlist_without_bandwidth():
+    default = int(DEFAULT_BANDWIDTH * 100 / 8)
+
+    assert estimate_playlist_bytes({"variant": {"bandwidth": 0}, "duration": 100}) == default
+    assert estimate_playlist_bytes({"variant": None, "rendition": None, "duration": 100}) == default
+    assert estimate_playlist_bytes({"duration": 100}) == default
+    assert estimate_playlist_bytes({"variant": None, "rendition": {}, "duration": 100}) == int(
+        AUDIO_BANDWIDTH * 100 / 8
+    )
+
+
+def test_estimate_from_a_playlist_without_duration():
+    assert estimate_playlist_bytes({"variant": {"bandwidth": 8}, "duration": 0}) == DEFAULT_DURATION
+    assert estimate_playlist_bytes({}) == int(DEFAULT_BANDWIDTH * DEFAULT_DURATION / 8)
+
+
+def test_first_episode_is_admitted_without_room():
+    admission = FakeVolume(free=0)
+
+    assert admission.try_admit("a", 500 * MB)
+    assert admission.reserved == 500 * MB
+
+
+def test_admission_does_not_over_commit():
+    admission = FakeVolume(free=1000 * MB)
+
+    assert admission.try_admit("a", 400 * MB)
+    assert admission.try_admit("b", 400 * MB)
+    # 1000 - 800 outstanding - 200 would leave nothing of the 100 MB to keep free
+    assert not admission.try_admit("c", 200 * MB)
+    assert admission.try_admit("c", 100 * MB)
+    assert admission.reserved == 900 * MB
+
+
+def test_bytes_already_written_are_not_counted_twice():
+    written = {"a": 0}
+    admission = FakeVolume(free=1000 * MB)
+    assert admission.try_admit("a", 800 * MB, lambda: written["a"])
+    assert not admission.try_admit("b", 500 * MB)
+
+    # Episode "a" wrote 600 MB, which the free space already accounts for
+    written["a"] = 600 * MB
+    admission.free = 400 * MB
+
+    assert not admission.try_admit("b", 500 * MB)
+    assert admission.try_admit("b", 100 * MB)
+
+
+def test_release_lets_a_waiting_episode_in():
+    admission = FakeVolume(free=1000 * MB, poll_interval=60)
+    admission.admit("a", 800 * MB)
+    waits = []
+    admitted = threading.Event()
+
+    def admit():
+        admission.admit("b", 800 * MB, on_wait=lambda: waits.append("b"))
+        admitted.set()
+
+    thread = threading.Thread(target=admit)
+    thread.start()
+    assert not admitted.wait(0.1)
+
+    admission.release("a")
+    thread.join(5)
+
+    assert admitted.is_set()
+    assert waits == ["b"]
+    assert admission.reserved == 800 * MB
+
+
+def test_release_of_an_unknown_episode_is_ignored():
+    admission = FakeVolume(free=1000 * MB)
+    admission.try_admit("a", 100 * MB)
+
+    admission.release("b")
+    admission.release("a")
+    admission.release("a")
+
+    assert admission.reserved == 0
+
+
+def fake_zoro(admission, estimate):
+    zoro = SimpleNamespace(
+        admission=admission,
+        metrics=MetricsRecorder(),
+        estimate_temp_bytes=lambda job: estimate,
+        job_temp_usage=lambda job: 0,
+        print_admission_wait=lambda job, estimate: None,
+        remove_file=lambda file_name: None,
+    )
+
+    def download_video(job):
+        ZORO.admit_job(zoro, job)
+        raise RuntimeError("stream went away")
+
+    def mux_files(job):
+        raise RuntimeError("nothing to mux")
+
+    zoro.download_video = download_video
+    zoro.mux_files = mux_files
+    zoro.clean_up = lambda job: ZORO.clean_up(zoro, job)
+    return zoro
+
+
+def test_failed_episode_releases_its_reservation():
+    admission = FakeVolume(free=1000 * MB)
+    zoro = fake_zoro(admission, 800 * MB)
+    job = EpisodeJob(1, "1", "21", "Title", "Episode", 1, "Title S01E01 - Episode")
+
+    assert run_stage(zoro, "video", job) is job
+    assert admission.reserved == 800 * MB
+    assert not admission.try_admit("other", 800 * MB)
+
+    run_stage(zoro, "mux", job)
+
+    assert job.errors == ["video: stream went away", "mux: nothing to mux"]
+    assert admission.reserved == 0
+    assert admission.try_admit("other", 800 * MB)
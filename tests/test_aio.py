@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import pytest
+from zoro_dl.aio import AsyncAnimeAPI
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class FakeAvailability:
+    def __init__(self):
+        self.looked_up = []
+
+    def kind(self, episode_id):
+        self.looked_up.append(episode_id)
+        return "both"
+
+
+@pytest.fixture
+def async_api():
+    async_api = AsyncAnimeAPI(api=object(), max_workers=1, availability=FakeAvailability(), download_workers=2)
+    yield async_api
+    async_api.close()
+
+
+def test_long_running_work_does_not_starve_requests(async_api):
+    release = threading.Event()
+
+    def download(cancel=None):
+        release.wait(5)
+        return "downloaded"
+
+    async def scenario():
+        downloads = [asyncio.ensure_future(async_api.run_cancellable(download)) for _ in range(2)]
+        request = await asyncio.wait_for(async_api.run_blocking(lambda: "answered"), 2)
+        release.set()
+        return request, await asyncio.gather(*downloads)
+
+    assert run(scenario()) == ("answered", ["downloaded", "downloaded"])
+
+
+def test_cancelling_sets_the_event_and_waits_for_the_callable(async_api):
+    started = threading.Event()
+    finished = []
+
+    def download(cancel=None):
+        started.set()
+        cancel.wait(5)
+        finished.append(cancel.is_set())
+        raise RuntimeError("stopped")
+
+    async def scenario():
+        task = asyncio.ensure_future(async_api.run_cancellable(download))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(scenario())
+    assert finished == [True]
+
+
+def test_is_sub_dub_uses_the_given_resolver(async_api):
+    assert run(async_api.is_sub_dub("1001")) == "both"
+    assert async_api.availability.looked_up == ["1001"]
@@ -0,0 +1,70 @@
+from zoro_dl.anime_api import AnimeAPI
+
+
+class FakeResponse:
+    def __init__(self, episode_count, status_code=200):
+        self.episode_count = episode_count
+        self.status_code = status_code
+        self.headers = {"ETag": '"v{}"'.format(episode_count)}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"title": "Title", "episodes": [{}] * self.episode_count}
+
+
+class FakeSession:
+    def __init__(self, episode_count):
+        self.episode_count = episode_count
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == '"v{}"'.format(self.episode_count):
+            return FakeResponse(self.episode_count, 304)
+        return FakeResponse(self.episode_count)
+
+
+def test_in_memory_cache_is_used_within_ttl():
+    session = FakeSession(3)
+    api = AnimeAPI(session=session, cache_ttl=3600)
+
+    assert len(api.get_episodes("x")) == 3
+    session.episode_count = 4
+    assert len(api.get_episodes("x")) == 3
+    assert len(session.requests) == 1
+
+
+def test_in_memory_cache_is_revalidated_after_ttl():
+    session = FakeSession(3)
+    api = AnimeAPI(session=session, cache_ttl=0)
+
+    assert len(api.get_episodes("x")) == 3
+    assert len(api.get_episodes("x")) == 3
+    assert session.requests[-1] == {"If-None-Match": '"v3"'}
+
+    session.episode_count = 4
+    assert len(api.get_episodes("x")) == 4
+
+
+def test_listing_with_min_episodes_is_used_after_ttl():
+    session = FakeSession(3)
+    api = AnimeAPI(session=session, cache_ttl=0)
+    api.get_episodes("x")
+
+    session.episode_count = 5
+    assert len(api.get_episodes("x", min_episodes=2)) == 3
+    assert len(session.requests) == 1
+    assert len(api.get_episodes("x", min_episodes=5)) == 5
+
+
+def test_invalidate_drops_the_cached_series():
+    session = FakeSession(3)
+    api = AnimeAPI(session=session, cache_ttl=3600)
+    api.get_episodes("x")
+
+    api.invalidate("x")
+    api.get_episodes("x")
+
+    assert session.requests == [{}, {}]
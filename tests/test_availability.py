@@ -0,0 +1,180 @@
+import threading
+import pytest
+from zoro_dl.availability import AvailabilityResolver, parse_servers
+
+SERVERS_HTML = """
+<div class="ps_-block ps_-block-sub servers-sub">
+  <div class="ps__-title"><i class="fas fa-closed-captioning mr-2"></i>SUB:</div>
+  <div class="ps__-list">
+    <div class="item server-item" data-type="sub" data-id="101" data-server-id="4">
+      <a href="javascript:;" class="btn">Vidstreaming</a>
+    </div>
+    <div class="item server-item" data-type="sub" data-id="102" data-server-id="1">
+      <a href="javascript:;" class="btn">MegaCloud</a>
+    </div>
+  </div>
+</div>
+<div class="ps_-block ps_-block-sub servers-dub">
+  <div class="ps__-title"><i class="fas fa-microphone-alt mr-2"></i>DUB:</div>
+  <div class="ps__-list">
+    <div class="item server-item" data-type="DUB" data-id="103">
+      <a href="javascript:;" class="btn">Vidstreaming</a>
+    </div>
+  </div>
+</div>
+"""
+
+SUB_ONLY_HTML = """
+<div class="ps_-block ps_-block-sub servers-sub">
+  <div class="ps__-title">SUB:</div>
+  <div class="ps__-list">
+    <div class="item server-item" data-type="sub" data-server-id="4"><a class="btn">Vidstreaming</a></div>
+    <div class="item server-item" data-type="raw" data-server-id="5"><a class="btn">HD-2</a></div>
+  </div>
+</div>
+"""
+
+TITLES_ONLY_HTML = """
+<div class="ps_-block"><div class="ps__-title">SUB:</div><div class="ps__-list"><a class="btn">HD-1</a></div></div>
+<div class="ps_-block"><div class="ps__-title">DUB:</div><div class="ps__-list"><a class="btn">HD-1</a></div></div>
+"""
+
+
+def test_parse_servers_reads_server_items():
+    availability = parse_servers("1", SERVERS_HTML)
+
+    assert availability.sub == (("4", "Vidstreaming"), ("1", "MegaCloud"))
+    assert availability.dub == (("103", "Vidstreaming"),)
+    assert availability.raw == ()
+    assert availability.kind == "both"
+
+
+def test_parse_servers_of_a_sub_only_episode():
+    availability = parse_servers("1", SUB_ONLY_HTML)
+
+    assert availability.kind == "sub"
+    assert availability.raw == (("5", "HD-2"),)
+
+
+def test_parse_servers_falls_back_to_block_titles():
+    assert parse_servers("1", TITLES_ONLY_HTML).kind == "both"
+    assert parse_servers("1", TITLES_ONLY_HTML.split("</div></div>")[0]).kind == "sub"
+    assert parse_servers("1", "<p>No servers</p>").kind == "unknown"
+
+
+class FakeResponse:
+    def __init__(self, html):
+        self.html = html
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"status": True, "html": self.html}
+
+
+class FakeSession:
+    """Answers every episode with SERVERS_HTML, holding each request until 'release' is set."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.requests = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            self.requests.append(url)
+        assert self.release.wait(5)
+        if url in self.fail:
+            raise ConnectionError(url)
+        return FakeResponse(SERVERS_HTML)
+
+    def count(self, url):
+        with self._lock:
+            return self.requests.count(url)
+
+
+@pytest.fixture
+def session():
+    return FakeSession()
+
+
+@pytest.fixture
+def resolver(session):
+    resolver = AvailabilityResolver(session=session, workers=2, servers_url="{}")
+    yield resolver
+    session.release.set()
+    resolver.close()
+
+
+def wait_for_requests(session, count):
+    for _ in range(500):
+        if len(session.requests) >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("{} requests made, expected {}".format(len(session.requests), count))
+
+
+def test_prefetch_skips_cached_and_in_flight_episodes(resolver, session):
+    assert resolver.prefetch(["1", "2", "3"]) == ["1", "2", "3"]
+    assert resolver.prefetch(["2", "3", "4"]) == ["4"]
+
+    session.release.set()
+    assert resolver.get("4").kind == "both"
+    assert resolver.resolve(["1", "2", "3", "4"]).keys() == {"1", "2", "3", "4"}
+    assert sorted(session.requests) == ["1", "2", "3", "4"]
+
+
+def test_lookups_of_an_episode_in_flight_share_its_request(resolver, session):
+    resolver.prefetch(["1"])
+    wait_for_requests(session, 1)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(resolver.kind("1"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    session.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["both"] * 4
+    assert session.count("1") == 1
+
+
+def test_lookup_of_a_queued_episode_does_not_wait_for_the_queue(resolver, session):
+    resolver.prefetch(["1", "2", "3"])
+    wait_for_requests(session, 2)
+
+    thread = threading.Thread(target=resolver.get, args=("3",))
+    thread.start()
+    wait_for_requests(session, 3)
+    session.release.set()
+    thread.join(5)
+
+    assert resolver.resolve(["1", "2", "3"])["3"].kind == "both"
+    resolver.close()
+    assert sorted(session.requests) == ["1", "2", "3"]
+
+
+def test_failed_lookup_is_not_cached():
+    session = FakeSession(fail={"1"})
+    session.release.set()
+    resolver = AvailabilityResolver(session=session, servers_url="{}")
+
+    with pytest.raises(ConnectionError):
+        resolver.get("1")
+    session.fail.clear()
+
+    assert resolver.kind("1") == "both"
+    assert session.count("1") == 2
+
+
+def test_invalidate_fetches_the_episode_again(resolver, session):
+    session.release.set()
+    resolver.get("1")
+
+    resolver.invalidate("1")
+    resolver.get("1")
+
+    assert session.count("1") == 2
@@ -0,0 +1,95 @@
+import threading
+import pytest
+from zoro_dl.daemon import DownloadDaemon, FairQueue
+
+
+def drain(fair_queue):
+    items = []
+    while len(fair_queue):
+        items.append(fair_queue.get())
+    return items
+
+
+def test_fair_queue_round_robins_between_keys():
+    fair_queue = FairQueue()
+    for episode in (1, 2, 3):
+        fair_queue.put("a", 0, episode)
+    for episode in (1, 2):
+        fair_queue.put("b", 0, episode)
+
+    assert drain(fair_queue) == [("a", 1), ("b", 1), ("a", 2), ("b", 2), ("a", 3)]
+
+
+def test_fair_queue_serves_higher_priorities_first():
+    fair_queue = FairQueue()
+    fair_queue.put("a", 0, 1)
+    fair_queue.put("a", 0, 2)
+    fair_queue.put("b", 5, 1)
+    fair_queue.put("c", -1, 1)
+    fair_queue.put("b", 5, 2)
+
+    assert drain(fair_queue) == [("b", 1), ("b", 2), ("a", 1), ("a", 2), ("c", 1)]
+
+
+def test_fair_queue_close_releases_waiting_getters():
+    fair_queue = FairQueue()
+    results = []
+    getter = threading.Thread(target=lambda: results.append(fair_queue.get()))
+    getter.start()
+
+    fair_queue.close()
+    getter.join(timeout=5)
+
+    assert not getter.is_alive()
+    assert results[0][0] is None
+
+
+def test_fair_queue_put_blocks_while_full():
+    fair_queue = FairQueue(maxsize=1)
+    fair_queue.put("a", 0, 1)
+    putter = threading.Thread(target=fair_queue.put, args=("a", 0, 2))
+    putter.start()
+
+    putter.join(timeout=0.05)
+    assert putter.is_alive()
+
+    assert fair_queue.get() == ("a", 1)
+    putter.join(timeout=5)
+    assert fair_queue.get() == ("a", 2)
+
+
+class FakeAPI:
+    session = None
+
+
+def test_submit_refuses_daemon_wide_options():
+    daemon = DownloadDaemon(api=FakeAPI())
+
+    with pytest.raises(ValueError):
+        daemon.submit("https://aniwatch.to/one-piece-100", journal="/tmp/journal.jsonl")
+
+
+def test_handle_request_rejects_unsupported_options():
+    daemon = DownloadDaemon(api=FakeAPI())
+
+    reply = daemon.handle_request({"action": "submit", "url": "https://aniwatch.to/x", "output_dir": "/etc"})
+    assert reply["ok"] is False
+
+    reply = daemon.handle_request({"action": "submit"})
+    assert reply["ok"] is False
+
+    reply = daemon.handle_request({"action": "submit", "url": "https://aniwatch.to/x", "resolution": "720p"})
+    assert reply["ok"] is True
+    assert daemon.tasks()[0].options == {"resolution": "720p"}
+
+
+def test_rate_limits_get_a_session_of_the_daemons_own():
+    from zoro_dl.session import get_session
+
+    daemon = DownloadDaemon(rate_limits={"api.consumet.org": 1}, cache_dir=None)
+
+    assert daemon.api.session is not get_session()
+    assert daemon.api.session.limiter.bucket("api.consumet.org").rate == 1
+    assert "rate_limits" not in daemon.options
+    with pytest.raises(ValueError):
+        DownloadDaemon(api=FakeAPI(), rate_limits={"api.consumet.org": 1})
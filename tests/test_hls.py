@@ -0,0 +1,215 @@
+import threading
+import pytest
+from zoro_dl.hls import (
+    HLSCancelled,
+    HLSDownloader,
+    HLSError,
+    parse_attributes,
+    parse_master_playlist,
+    parse_media_playlist,
+    select_audio,
+    select_group_audio,
+    select_variant,
+)
+
+BASE_URL = "https://cdn.example/show/ep1/master.m3u8"
+
+MASTER = """#EXTM3U
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aud-lo",NAME="Japanese",LANGUAGE="ja",DEFAULT=YES,URI="audio/lo.m3u8"
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aud-hi",NAME="English",LANGUAGE="en",URI="audio/hi-en.m3u8"
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aud-hi",NAME="Japanese",LANGUAGE="ja",DEFAULT=YES,URI="audio/hi-ja.m3u8"
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2",AUDIO="aud-lo"
+360/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2800000,RESOLUTION=1280x720,AUDIO="aud-hi"
+720/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080,AUDIO="aud-hi"
+https://other.example/1080/index.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-TARGETDURATION:6
+#EXT-X-MAP:URI="init.mp4",BYTERANGE="720@0"
+#EXTINF:6.0,
+seg0.m4s
+#EXT-X-BYTERANGE:1000@720
+#EXTINF:4.5,
+seg1.m4s
+#EXT-X-BYTERANGE:500
+#EXTINF:2.5,
+seg1.m4s
+#EXT-X-ENDLIST
+"""
+
+
+def variant(height, bandwidth, audio=None):
+    return {"url": "{}p.m3u8".format(height), "height": height, "bandwidth": bandwidth, "audio": audio}
+
+
+def test_parse_attributes_unquotes_values_with_commas():
+    attributes = parse_attributes('BANDWIDTH=800000,CODECS="avc1,mp4a",RESOLUTION=640x360')
+    assert attributes == {"BANDWIDTH": "800000", "CODECS": "avc1,mp4a", "RESOLUTION": "640x360"}
+
+
+def test_parse_master_playlist():
+    master = parse_master_playlist(MASTER, BASE_URL)
+
+    assert [v["height"] for v in master["variants"]] == [360, 720, 1080]
+    first = master["variants"][0]
+    assert first["url"] == "https://cdn.example/show/ep1/360/index.m3u8"
+    assert first["width"] == 640
+    assert first["bandwidth"] == 800000
+    assert first["codecs"] == "avc1.4d401e,mp4a.40.2"
+    assert first["audio"] == "aud-lo"
+    assert master["variants"][2]["url"] == "https://other.example/1080/index.m3u8"
+
+    assert len(master["audio"]) == 3
+    assert master["audio"][0] == {
+        "url": "https://cdn.example/show/ep1/audio/lo.m3u8",
+        "group_id": "aud-lo",
+        "name": "Japanese",
+        "language": "ja",
+        "default": True,
+    }
+    assert master["audio"][1]["default"] is False
+
+
+def test_parse_media_playlist_byteranges_and_init():
+    playlist = parse_media_playlist(MEDIA, "https://cdn.example/show/ep1/720/index.m3u8")
+
+    assert playlist["init"] == {
+        "url": "https://cdn.example/show/ep1/720/init.mp4",
+        "duration": 0.0,
+        "byterange": (720, 0),
+    }
+    assert [segment["byterange"] for segment in playlist["segments"]] == [None, (1000, 720), (500, 1720)]
+    assert [segment["duration"] for segment in playlist["segments"]] == [6.0, 4.5, 2.5]
+    assert playlist["duration"] == pytest.approx(13.0)
+    assert playlist["encrypted"] is False
+
+
+def test_parse_media_playlist_encryption():
+    text = '#EXTM3U\n#EXT-X-KEY:METHOD=NONE\n#EXTINF:2,\na.ts\n'
+    assert parse_media_playlist(text, BASE_URL)["encrypted"] is False
+
+    text = '#EXTM3U\n#EXT-X-KEY:METHOD=AES-128,URI="key"\n#EXTINF:2,\na.ts\n'
+    assert parse_media_playlist(text, BASE_URL)["encrypted"] is True
+
+
+def test_select_variant():
+    variants = [variant(360, 800), variant(720, 2000), variant(720, 2800), variant(1080, 5000)]
+
+    assert select_variant(variants, 720)["bandwidth"] == 2800
+    assert select_variant(variants, "1080")["height"] == 1080
+    assert select_variant(variants, 900)["bandwidth"] == 2800
+    assert select_variant(variants, 240)["height"] == 360
+    assert select_variant(variants)["height"] == 1080
+
+    with pytest.raises(HLSError):
+        select_variant([], 720)
+
+
+def test_select_audio_uses_group_of_selected_variant():
+    master = parse_master_playlist(MASTER, BASE_URL)
+
+    rendition, selected = select_audio(master, 1080)
+    assert selected is None
+    assert rendition["url"].endswith("audio/hi-ja.m3u8")
+
+    rendition, _ = select_audio(master, 360)
+    assert rendition["url"].endswith("audio/lo.m3u8")
+
+
+def test_select_audio_without_renditions_picks_cheapest_variant():
+    master = {"variants": [variant(720, 2800), variant(360, 800)], "audio": []}
+    assert select_audio(master, 1080) == (None, master["variants"][1])
+
+
+def test_select_group_audio():
+    master = parse_master_playlist(MASTER, BASE_URL)
+
+    assert select_group_audio(master, master["variants"][1])["url"].endswith("audio/hi-ja.m3u8")
+    assert select_group_audio(master, variant(720, 1)) is None
+
+
+class FakeResponse:
+    def __init__(self, text="", content=b""):
+        self.text = text
+        self.content = content
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, texts):
+        self.texts = texts
+        self.requested = []
+
+    def get(self, url, headers=None):
+        self.requested.append(url)
+        if url in self.texts:
+            return FakeResponse(text=self.texts[url])
+        return FakeResponse(content=url.encode())
+
+
+def test_resolve_fetches_audio_group_rendition():
+    media = "#EXTM3U\n#EXTINF:2,\na.ts\n#EXTINF:2,\nb.ts\n"
+    session = FakeSession(
+        {
+            BASE_URL: MASTER,
+            "https://cdn.example/show/ep1/720/index.m3u8": media,
+            "https://cdn.example/show/ep1/audio/hi-ja.m3u8": media,
+        }
+    )
+
+    playlist = HLSDownloader(session=session).resolve(BASE_URL, height=720)
+
+    assert playlist["url"] == "https://cdn.example/show/ep1/720/index.m3u8"
+    assert playlist["variant"]["height"] == 720
+    assert playlist["master"]["variants"]
+    assert playlist["audio"]["url"] == "https://cdn.example/show/ep1/audio/hi-ja.m3u8"
+    assert [segment["url"] for segment in playlist["audio"]["segments"]] == [
+        "https://cdn.example/show/ep1/audio/a.ts",
+        "https://cdn.example/show/ep1/audio/b.ts",
+    ]
+
+
+def test_resolve_audio_only_has_no_separate_audio():
+    media = "#EXTM3U\n#EXTINF:2,\na.ts\n"
+    session = FakeSession({BASE_URL: MASTER, "https://cdn.example/show/ep1/audio/hi-ja.m3u8": media})
+
+    playlist = HLSDownloader(session=session).resolve(BASE_URL, height=1080, audio_only=True)
+
+    assert playlist["rendition"]["language"] == "ja"
+    assert playlist["audio"] is None
+
+
+def test_iter_segments_keeps_playlist_order():
+    text = "#EXTM3U\n" + "".join("#EXTINF:1,\nseg{}.ts\n".format(i) for i in range(20))
+    playlist = parse_media_playlist(text, BASE_URL)
+
+    data = list(HLSDownloader(session=FakeSession({}), workers=4).iter_segments(playlist))
+
+    assert data == [segment["url"].encode() for segment in playlist["segments"]]
+
+
+def test_iter_segments_stops_requesting_once_cancelled():
+    text = "#EXTM3U\n" + "".join("#EXTINF:1,\nseg{}.ts\n".format(i) for i in range(50))
+    playlist = parse_media_playlist(text, BASE_URL)
+    session = FakeSession({})
+    cancel = threading.Event()
+
+    segments = HLSDownloader(session=session, workers=2).iter_segments(playlist, cancel=cancel)
+    next(segments)
+    cancel.set()
+    with pytest.raises(HLSCancelled):
+        list(segments)
+
+    assert len(session.requested) < len(playlist["segments"])
+
+
+def test_iter_segments_refuses_encrypted_playlists():
+    playlist = parse_media_playlist('#EXT-X-KEY:METHOD=AES-128,URI="k"\n#EXTINF:1,\na.ts\n', BASE_URL)
+    with pytest.raises(HLSError):
+        list(HLSDownloader(session=FakeSession({})).iter_segments(playlist))
@@ -0,0 +1,12 @@
+from zoro_dl.job import requested_episode_numbers, season_folder_name
+
+
+def test_requested_episode_numbers():
+    assert requested_episode_numbers("3") == [3]
+    assert requested_episode_numbers("2-4") == [2, 3, 4]
+    assert requested_episode_numbers(None, 3) == [1, 2, 3]
+    assert requested_episode_numbers(None) == []
+
+
+def test_season_folder_name_strips_reserved_characters():
+    assert season_folder_name('Re:Zero  "Starting" Life?', 2) == "ReZero Starting Life - S2"
@@ -0,0 +1,106 @@
+import json
+from zoro_dl.journal import JobJournal
+
+KEY = JobJournal.episode_key("one-piece-100", "1", 3, "both", "1080")
+
+
+def test_episode_key():
+    assert KEY == "one-piece-100|S1|E3|both|1080"
+
+
+def test_replay_merges_stages_and_fields(tmp_path):
+    path = str(tmp_path / JobJournal.FILE_NAME)
+    journal = JobJournal(path)
+    journal.set_end_code(KEY, "abc123")
+    journal.mark_stage(KEY, "video")
+    journal.mark_stage(KEY, "subs")
+    journal.mark_stage(KEY, "video")
+
+    replayed = JobJournal(path)
+
+    assert replayed.get_end_code(KEY) == "abc123"
+    assert replayed.get(KEY)["stages"] == ["video", "subs"]
+    assert replayed.is_stage_done(KEY, "subs")
+    assert not replayed.is_stage_done(KEY, "mux")
+    assert replayed.get("unknown") == {}
+
+
+def test_completed_path_requires_existing_file(tmp_path):
+    path = str(tmp_path / JobJournal.FILE_NAME)
+    final_path = tmp_path / "Episode 3.mkv"
+    final_path.write_bytes(b"")
+    JobJournal(path).mark_completed(KEY, str(final_path))
+
+    journal = JobJournal(path)
+    assert journal.completed_path(KEY) == str(final_path)
+    assert journal.is_stage_done(KEY, "done")
+
+    final_path.unlink()
+    assert journal.completed_path(KEY) is None
+
+
+def test_get_returns_a_copy(tmp_path):
+    journal = JobJournal(str(tmp_path / JobJournal.FILE_NAME))
+    journal.mark_stage(KEY, "video")
+
+    journal.get(KEY)["stages"].append("mux")
+
+    assert not journal.is_stage_done(KEY, "mux")
+
+
+def test_torn_last_line_is_skipped_and_not_glued_to_next_record(tmp_path):
+    path = tmp_path / JobJournal.FILE_NAME
+    path.write_text(
+        json.dumps({"key": KEY, "stages": ["video"]}) + "\n" + '{"key": "' + KEY + '", "stag',
+        encoding="utf-8",
+    )
+
+    journal = JobJournal(str(path))
+    assert journal.get(KEY)["stages"] == ["video"]
+
+    journal.mark_stage(KEY, "subs")
+    replayed = JobJournal(str(path))
+    assert replayed.get(KEY)["stages"] == ["video", "subs"]
+
+
+def test_superseded_records_are_compacted_on_load(tmp_path):
+    path = tmp_path / JobJournal.FILE_NAME
+    journal = JobJournal(str(path))
+    for stage in ("video", "subs", "mux"):
+        journal.mark_stage(KEY, stage)
+    journal.set_end_code(KEY, "abc123")
+    journal.set_end_code(KEY, "def456")
+
+    replayed = JobJournal(str(path))
+
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+    assert replayed.get(KEY)["stages"] == ["video", "subs", "mux"]
+    assert replayed.get_end_code(KEY) == "def456"
+    assert JobJournal(str(path)).get(KEY) == replayed.get(KEY)
+
+
+def test_journal_is_compacted_past_its_size_threshold(tmp_path):
+    path = tmp_path / JobJournal.FILE_NAME
+    journal = JobJournal(str(path), compact_size=2048)
+
+    for index in range(200):
+        journal.set_end_code(KEY, "code{}".format(index))
+        journal.mark_stage(JobJournal.episode_key("x", 1, index % 3, "sub", "720"), "video")
+
+    assert path.stat().st_size < 2 * 2048
+    assert len(path.read_text(encoding="utf-8").splitlines()) < 200
+    replayed = JobJournal(str(path))
+    assert replayed.get_end_code(KEY) == "code199"
+    assert replayed.is_stage_done(JobJournal.episode_key("x", 1, 2, "sub", "720"), "video")
+
+
+def test_compaction_keeps_records_of_other_writers(tmp_path):
+    path = str(tmp_path / JobJournal.FILE_NAME)
+    journal = JobJournal(path, compact_size=1024)
+    other = JobJournal(path)
+    other.mark_stage("other", "video")
+
+    for index in range(50):
+        journal.set_end_code(KEY, "code{}".format(index))
+
+    assert JobJournal(path).is_stage_done("other", "video")
@@ -0,0 +1,192 @@
+import json
+import re
+import pytest
+from zoro_dl import mux
+from zoro_dl.mux import FFmpegMuxer, MkvMergeMuxer, MuxPlan, Muxer, default_mux_processes, get_muxer
+
+
+def make_plan(tmp_path, sources=2, subtitles=3):
+    return MuxPlan(
+        videos=["video_{}.mp4".format(index) for index in range(sources)],
+        audio_languages=["jpn", "eng"][:sources],
+        subtitles=[
+            ("subtitle_{}.vtt".format(index), language, title)
+            for index, (language, title) in enumerate(
+                [("eng", "English"), ("spa", "Spanish - Latin America"), ("por", "Portuguese")][:subtitles]
+            )
+        ],
+        video_title="NOGRP - Sourced from ZORO",
+        audio_title="NOGRP",
+        encoded_by="NOGRP & <friends>",
+        output=str(tmp_path / "out.mkv"),
+    )
+
+
+# "mkvmerge -J" of every video source, with the audio track before the video track
+IDENTIFIED_TRACKS = [{"id": 0, "type": "audio"}, {"id": 1, "type": "video"}]
+
+
+@pytest.fixture
+def identify(monkeypatch):
+    """Mocks "mkvmerge -J", answering IDENTIFIED_TRACKS for every file."""
+    calls = []
+
+    def check_output(cmd):
+        calls.append(cmd)
+        assert cmd[:2] == ["mkvmerge", "-J"]
+        return json.dumps({"tracks": IDENTIFIED_TRACKS}).encode("utf-8")
+
+    monkeypatch.setattr(mux.subprocess, "check_output", check_output)
+    return calls
+
+
+def ffmpeg_tracks(cmd):
+    inputs = [cmd[index + 1] for index, arg in enumerate(cmd) if arg == "-i"]
+    options = list(zip(cmd, cmd[1:]))
+    tracks = []
+    counts = {}
+    for flag, value in options:
+        if flag == "-map":
+            input_index, track_type, _ = value.split(":")
+            number = counts.get(track_type, 0)
+            counts[track_type] = number + 1
+            tracks.append(
+                {"type": track_type, "input": inputs[int(input_index)], "spec": (track_type, number)}
+            )
+
+    for track in tracks:
+        track_type, number = track.pop("spec")
+        track["language"] = None
+        track["title"] = None
+        track["default"] = False
+        for flag, value in options:
+            if flag in ("-metadata:s:{}:{}".format(track_type, number), "-metadata:s:{}".format(track_type)):
+                name, _, text = value.partition("=")
+                track[name] = text
+            elif flag == "-disposition:{}:{}".format(track_type, number):
+                track["default"] = value == "default"
+
+    encoded_by = dict(option[1].split("=", 1) for option in options if option[0] == "-metadata")["encoded_by"]
+    return tracks, encoded_by
+
+
+def mkvmerge_tracks(cmd):
+    files = []
+    pending = {}
+    index = 3
+    while index < len(cmd):
+        arg = cmd[index]
+        if arg in ("--no-video", "--no-audio", "--no-subtitles", "--no-chapters", "--no-global-tags"):
+            pending[arg] = True
+            index += 1
+        elif arg.startswith("--"):
+            pending.setdefault(arg, []).append(cmd[index + 1])
+            index += 2
+        else:
+            files.append((arg, pending))
+            pending = {}
+            index += 1
+
+    tracks = {}
+    for file_index, (path, file_options) in enumerate(files):
+        available = IDENTIFIED_TRACKS if path.endswith(".mp4") else [{"id": 0, "type": "subtitles"}]
+        for track in available:
+            track_id = str(track["id"])
+            short_type = {"video": "v", "audio": "a", "subtitles": "s"}[track["type"]]
+            selected = file_options.get("--{}-tracks".format(track["type"]))
+            if file_options.get("--no-{}".format(track["type"])) or (selected and track_id not in selected):
+                continue
+            values = {}
+            for flag in ("--track-name", "--language", "--default-track"):
+                for value in file_options.get(flag, []):
+                    value_id, _, text = value.partition(":")
+                    if value_id == track_id:
+                        values[flag] = text
+            tracks["{}:{}".format(file_index, track_id)] = {
+                "type": short_type,
+                "input": path,
+                "language": values.get("--language"),
+                "title": values.get("--track-name"),
+                "default": values.get("--default-track") == "yes",
+            }
+
+    order = pending["--track-order"][0].split(",")
+    assert sorted(order) == sorted(tracks)
+    return [tracks[track] for track in order]
+
+
+def mkvmerge_encoded_by(plan):
+    with open(MkvMergeMuxer.tags_path(plan.output), encoding="utf-8") as tags_file:
+        tags = tags_file.read()
+    text = re.search(r"<Name>ENCODED_BY</Name><String>(.*?)</String>", tags).group(1)
+    return text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+
+@pytest.mark.parametrize("sources,subtitles", [(2, 3), (1, 1), (1, 0), (2, 0)])
+def test_backends_write_the_same_tracks_and_metadata(tmp_path, identify, sources, subtitles):
+    plan = make_plan(tmp_path, sources, subtitles)
+
+    ffmpeg, ffmpeg_encoded_by = ffmpeg_tracks(FFmpegMuxer().command(plan))
+    mkvmerge = mkvmerge_tracks(MkvMergeMuxer().command(plan))
+
+    assert ffmpeg == mkvmerge
+    assert ffmpeg_encoded_by == mkvmerge_encoded_by(plan) == plan.encoded_by
+    assert len(identify) == sources
+
+
+def test_track_mapping_of_a_dual_audio_episode(tmp_path, identify):
+    plan = make_plan(tmp_path)
+
+    tracks, _ = ffmpeg_tracks(FFmpegMuxer().command(plan))
+
+    assert [(track["type"], track["input"]) for track in tracks] == [
+        ("v", "video_0.mp4"),
+        ("a", "video_0.mp4"),
+        ("a", "video_1.mp4"),
+        ("s", "subtitle_0.vtt"),
+        ("s", "subtitle_1.vtt"),
+        ("s", "subtitle_2.vtt"),
+    ]
+    assert [track["language"] for track in tracks] == [None, "jpn", "eng", "eng", "spa", "por"]
+    assert [track["title"] for track in tracks] == [
+        "NOGRP - Sourced from ZORO",
+        "NOGRP",
+        "NOGRP",
+        "English",
+        "Spanish - Latin America",
+        "Portuguese",
+    ]
+    assert [track["default"] for track in tracks] == [True, True, False, True, False, False]
+
+
+def test_mkvmerge_cleanup_removes_tags_file(tmp_path, identify):
+    plan = make_plan(tmp_path)
+    muxer = MkvMergeMuxer()
+    muxer.command(plan)
+
+    muxer.cleanup(plan.output)
+    muxer.cleanup(plan.output)
+
+    assert not (tmp_path / "out.mkv.tags.xml").exists()
+
+
+def test_get_muxer():
+    assert isinstance(get_muxer("ffmpeg"), FFmpegMuxer)
+    assert isinstance(get_muxer("mkvmerge"), MkvMergeMuxer)
+    assert get_muxer("ffmpeg").supports_pipes and not get_muxer("mkvmerge").supports_pipes
+    with pytest.raises(ValueError):
+        get_muxer("avidemux")
+    with pytest.raises(TypeError):
+        Muxer()
+
+
+def test_default_mux_processes(monkeypatch):
+    assert default_mux_processes(cpu_count=1) == 1
+    assert default_mux_processes(cpu_count=3) == 3
+    assert default_mux_processes(cpu_count=64) == 4
+    assert default_mux_processes(cpu_count=64, io_limit=8) == 8
+
+    monkeypatch.setattr(mux.os, "cpu_count", lambda: None)
+    assert default_mux_processes() == 1
+    monkeypatch.setattr(mux.os, "cpu_count", lambda: 2)
+    assert default_mux_processes() == 2
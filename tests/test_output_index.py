@@ -0,0 +1,71 @@
+import json
+import re
+from zoro_dl.output_index import OutputIndex
+
+KEY = "one-piece-100|S1|E3|both|1080"
+FILE_NAME = "[NOGRP] One Piece S01E03 - Morgan vs. Luffy [1080p] [WEB] [JPN-ENG] [MULTI-SUBS].mkv"
+PATTERN = re.compile(r"\[NOGRP\] One Piece S01E03 - .* \[1080p\] \[WEB\] \[JPN-ENG\]( \[[A-Z-]+\])?\.mkv")
+
+
+def test_finds_episodes_by_file_name_without_index_file(tmp_path):
+    (tmp_path / FILE_NAME).write_bytes(b"")
+    (tmp_path / "[NOGRP] One Piece S01E04 - Luffy's Past [1080p] [WEB] [JPN-ENG].mkv").write_bytes(b"")
+
+    index = OutputIndex(str(tmp_path))
+
+    assert index.get(KEY) is None
+    assert index.find(KEY, PATTERN) == str(tmp_path / FILE_NAME)
+    assert index.get(KEY) == str(tmp_path / FILE_NAME)
+    assert not (tmp_path / OutputIndex.FILE_NAME).exists()
+
+
+def test_find_ignores_other_files(tmp_path):
+    (tmp_path / FILE_NAME.replace("1080p", "720p")).write_bytes(b"")
+    (tmp_path / FILE_NAME.replace(".mkv", ".mkv.part")).write_bytes(b"")
+
+    assert OutputIndex(str(tmp_path)).find(KEY, PATTERN) is None
+
+
+def test_index_file_entries_are_used_by_key(tmp_path):
+    custom_name = "renamed by an older version.mkv"
+    (tmp_path / custom_name).write_bytes(b"")
+    (tmp_path / OutputIndex.FILE_NAME).write_text(json.dumps({KEY: custom_name}), encoding="utf-8")
+
+    index = OutputIndex(str(tmp_path))
+
+    assert index.get(KEY) == str(tmp_path / custom_name)
+    assert index.find(KEY, PATTERN) == str(tmp_path / custom_name)
+
+
+def test_entries_of_deleted_files_are_dropped(tmp_path):
+    (tmp_path / OutputIndex.FILE_NAME).write_text(json.dumps({KEY: FILE_NAME}), encoding="utf-8")
+
+    index = OutputIndex(str(tmp_path))
+
+    assert index.get(KEY) is None
+    assert index.find(KEY, PATTERN) is None
+
+
+def test_add_saves_index_and_keeps_entries_of_other_processes(tmp_path):
+    (tmp_path / FILE_NAME).write_bytes(b"")
+    (tmp_path / "other.mkv").write_bytes(b"")
+    first = OutputIndex(str(tmp_path))
+    second = OutputIndex(str(tmp_path))
+
+    first.add(KEY, str(tmp_path / FILE_NAME))
+    second.add("other", str(tmp_path / "other.mkv"))
+
+    assert json.loads((tmp_path / OutputIndex.FILE_NAME).read_text(encoding="utf-8")) == {
+        KEY: FILE_NAME,
+        "other": "other.mkv",
+    }
+    rescanned = OutputIndex(str(tmp_path))
+    assert rescanned.get(KEY) == str(tmp_path / FILE_NAME)
+    assert rescanned.get("other") == str(tmp_path / "other.mkv")
+
+
+def test_missing_output_directory(tmp_path):
+    index = OutputIndex(str(tmp_path / "missing"))
+
+    assert index.get(KEY) is None
+    assert index.find(KEY, PATTERN) is None
@@ -0,0 +1,200 @@
+from types import SimpleNamespace
+import pytest
+from zoro_dl.processor import ZORO, download_file, parse_content_range
+
+CONTENT = b"0123456789" * 10
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def iter_content(self, chunk_size=1):
+        for index in range(0, len(self.body), 7):
+            yield self.body[index:index + 7]
+
+
+class RangeServer:
+    """A fake session serving CONTENT, honouring Range requests like a well-behaved server."""
+
+    def __init__(self, content=CONTENT):
+        self.content = content
+        self.requests = []
+
+    def get(self, url, stream=False, headers=None):
+        headers = headers or {}
+        self.requests.append(headers.get("Range"))
+        if "Range" not in headers:
+            return FakeResponse(200, self.content)
+        start = int(headers["Range"][len("bytes="):-1])
+        total = len(self.content)
+        if start >= total:
+            return FakeResponse(416, headers={"Content-Range": "bytes */{}".format(total)})
+        return FakeResponse(
+            206,
+            self.content[start:],
+            {"Content-Range": "bytes {}-{}/{}".format(start, total - 1, total)},
+        )
+
+
+class ScriptedSession:
+    """A fake session answering with the given responses in turn."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, stream=False, headers=None):
+        self.requests.append((headers or {}).get("Range"))
+        return self.responses.pop(0)
+
+
+def test_parse_content_range():
+    assert parse_content_range("bytes 100-199/1000") == (100, 1000)
+    assert parse_content_range("bytes */1000") == (None, 1000)
+    assert parse_content_range("bytes 0-9/*") == (0, None)
+    assert parse_content_range(None) == (None, None)
+
+
+def test_download_without_part_file(tmp_path):
+    save_path = tmp_path / "sub.vtt"
+    session = RangeServer()
+
+    assert download_file("http://cdn/sub.vtt", str(save_path), session)
+
+    assert save_path.read_bytes() == CONTENT
+    assert session.requests == [None]
+    assert not (tmp_path / "sub.vtt.part").exists()
+
+
+def test_resume_appends_missing_bytes(tmp_path):
+    save_path = tmp_path / "sub.vtt"
+    (tmp_path / "sub.vtt.part").write_bytes(CONTENT[:40])
+    session = RangeServer()
+
+    assert download_file("http://cdn/sub.vtt", str(save_path), session)
+
+    assert save_path.read_bytes() == CONTENT
+    assert session.requests == ["bytes=40-"]
+
+
+def test_complete_part_file_is_kept_on_416(tmp_path):
+    save_path = tmp_path / "sub.vtt"
+    (tmp_path / "sub.vtt.part").write_bytes(CONTENT)
+    session = RangeServer()
+
+    assert download_file("http://cdn/sub.vtt", str(save_path), session)
+
+    assert save_path.read_bytes() == CONTENT
+    assert session.requests == ["bytes=100-"]
+
+
+def test_oversized_part_file_is_downloaded_again_on_416(tmp_path):
+    save_path = tmp_path / "sub.vtt"
+    (tmp_path / "sub.vtt.part").write_bytes(CONTENT + b"stale tail")
+    session = RangeServer()
+
+    assert download_file("http://cdn/sub.vtt", str(save_path), session)
+
+    assert save_path.read_bytes() == CONTENT
+    assert session.requests == ["bytes=110-", None]
+
+
+def test_416_without_total_size_is_downloaded_again(tmp_path):
+    save_path = tmp_path / "sub.vtt"
+    (tmp_path / "sub.vtt.part").write_bytes(CONTENT)
+    session = ScriptedSession(FakeResponse(416), FakeResponse(200, CONTENT))
+
+    assert download_file("http://cdn/sub.vtt", str(save_path), session)
+
+    assert save_path.read_bytes() == CONTENT
+    assert session.requests == ["bytes=100-", None]
+
+
+def test_206_from_another_offset_restarts_the_download(tmp_path):
+    save_path = tmp_path / "sub.vtt"
+    (tmp_path / "sub.vtt.part").write_bytes(CONTENT[:40])
+    session = ScriptedSession(
+        FakeResponse(206, CONTENT, {"Content-Range": "bytes 0-99/100"}),
+        FakeResponse(200, CONTENT),
+    )
+
+    assert download_file("http://cdn/sub.vtt", str(save_path), session)
+
+    assert save_path.read_bytes() == CONTENT
+    assert session.requests == ["bytes=40-", None]
+
+
+def test_server_ignoring_range_overwrites_part_file(tmp_path):
+    save_path = tmp_path / "sub.vtt"
+    (tmp_path / "sub.vtt.part").write_bytes(b"garbage")
+    session = ScriptedSession(FakeResponse(200, CONTENT))
+
+    assert download_file("http://cdn/sub.vtt", str(save_path), session)
+
+    assert save_path.read_bytes() == CONTENT
+
+
+def test_failed_download_keeps_nothing(tmp_path):
+    save_path = tmp_path / "sub.vtt"
+    session = ScriptedSession(FakeResponse(404))
+
+    assert not download_file("http://cdn/sub.vtt", str(save_path), session)
+
+    assert not save_path.exists()
+
+
+class FakeAPI:
+    def get_series_info(self, id):
+        return {"title": "One Piece"}
+
+
+class FakeJob:
+    name = "One Piece S01E03 - Morgan vs. Luffy! The Mysterious Beautiful Girl Who Is She?"
+    lang_file_name_data = "JPN-ENG"
+    subs_file_name_data = "MULTI-SUBS"
+
+
+def fake_zoro(dl_type="both", resolution="1080"):
+    return SimpleNamespace(
+        api=FakeAPI(),
+        zoro_id="one-piece-100",
+        custom_group_tag="NOGRP",
+        season="1",
+        dl_type=dl_type,
+        resolution=resolution,
+    )
+
+
+def test_output_file_pattern_matches_output_file_name():
+    zoro = fake_zoro()
+    file_name = ZORO.output_file_name(zoro, FakeJob(), 1080)
+
+    assert ZORO.output_file_pattern(zoro, 3).fullmatch(file_name)
+    assert ZORO.output_file_pattern(zoro, "3").fullmatch(file_name)
+    assert not ZORO.output_file_pattern(zoro, 13).fullmatch(file_name)
+    assert not ZORO.output_file_pattern(fake_zoro(resolution="720"), 3).fullmatch(file_name)
+    assert not ZORO.output_file_pattern(fake_zoro(dl_type="sub"), 3).fullmatch(file_name)
+
+
+def test_output_file_pattern_of_both_matches_episodes_without_dub():
+    job = FakeJob()
+    job.lang_file_name_data = "JPN"
+    job.subs_file_name_data = "NO-SUBS"
+    file_name = ZORO.output_file_name(fake_zoro(), job, 1080)
+
+    assert ZORO.output_file_pattern(fake_zoro(), 3).fullmatch(file_name)
+    assert not ZORO.output_file_pattern(fake_zoro(dl_type="dub"), 3).fullmatch(file_name)
+
+
+def test_rate_limits_cannot_change_the_session_of_a_given_api():
+    with pytest.raises(ValueError):
+        ZORO("https://aniwatch.to/one-piece-100", api=FakeAPI(), rate_limits={"aniwatch.to": 1})
@@ -0,0 +1,158 @@
+import time
+from email.utils import formatdate
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from zoro_dl.ratelimit import CircuitBreaker, CircuitOpenError, RateLimiter, RetryPolicy, TokenBucket
+from zoro_dl.session import PooledSession
+
+
+def test_retry_policy_delay_is_jittered_exponential_backoff():
+    policy = RetryPolicy(backoff=0.5, max_backoff=3.0)
+
+    for attempt in range(8):
+        delay = policy.delay(attempt)
+        assert 0 <= delay <= min(3.0, 0.5 * 2 ** attempt)
+
+
+def test_retry_policy_delay_honours_retry_after():
+    policy = RetryPolicy(max_backoff=60.0)
+
+    assert policy.delay(0, "7") == 7.0
+    assert policy.delay(0, "600") == 60.0
+    assert policy.delay(0, "-3") == 0.0
+    assert 25 <= policy.delay(0, formatdate(time.time() + 30, usegmt=True)) <= 30
+    assert policy.delay(0, "not a date") <= 0.5
+
+
+def test_retry_policy_normalizes_methods():
+    policy = RetryPolicy(retries=-1, methods=("get", "head"))
+
+    assert policy.retries == 0
+    assert policy.methods == frozenset(("GET", "HEAD"))
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=100, capacity=2)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.acquire() > 0
+
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_circuit_breaker_opens_after_threshold_and_closes_after_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.before_request() > 0
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.before_request() == 0
+    # Only one trial request is let through at a time
+    assert breaker.before_request() > 0
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_request() == 0
+
+
+def test_circuit_breaker_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    assert breaker.before_request() == 0
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_rate_limiter_gives_up_on_open_circuit():
+    limiter = RateLimiter(failure_threshold=1, reset_timeout=10, max_wait=0.1)
+    limiter.record_failure("h")
+
+    with pytest.raises(CircuitOpenError):
+        limiter.acquire("h")
+
+
+def test_rate_limiter_slows_down_throttled_hosts_and_recovers():
+    limiter = RateLimiter({"h": 8}, min_rate=1)
+
+    limiter.record_failure("h", throttled=True)
+    assert limiter.bucket("h").rate == 4
+    limiter.record_success("h")
+    assert limiter.bucket("h").rate == pytest.approx(4.4)
+
+    for _ in range(20):
+        limiter.record_success("h")
+    assert limiter.bucket("h").rate == 8
+
+
+class ScriptedAdapter(HTTPAdapter):
+    def __init__(self, outcomes):
+        super().__init__()
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response._content = b"ok"
+        response.url = request.url
+        return response
+
+
+def scripted_session(outcomes, **limiter_options):
+    limiter = RateLimiter(**limiter_options)
+    session = PooledSession(limiter=limiter, retry_policy=RetryPolicy(retries=2, backoff=0.001))
+    adapter = ScriptedAdapter(outcomes)
+    session.mount("http://", adapter)
+    return session, limiter, adapter
+
+
+def test_session_retries_transient_errors():
+    session, limiter, adapter = scripted_session(
+        [requests.exceptions.ConnectionError("reset"), 503, 200]
+    )
+
+    assert session.get("http://h/x").status_code == 200
+    assert adapter.calls == 3
+    assert limiter.breaker("h").state == "closed"
+
+
+def test_session_failed_trial_with_unexpected_error_does_not_wedge_breaker():
+    session, limiter, adapter = scripted_session(
+        [requests.exceptions.ChunkedEncodingError("cut"), requests.exceptions.InvalidURL("bad"), 200],
+        failure_threshold=1,
+        reset_timeout=0.05,
+    )
+
+    with pytest.raises(requests.exceptions.InvalidURL):
+        session.get("http://h/x")
+    assert limiter.breaker("h").state == "open"
+
+    time.sleep(0.06)
+    assert session.get("http://h/x").status_code == 200
+    assert limiter.breaker("h").state == "closed"
+
+
+def test_created_sessions_have_their_own_limits():
+    from zoro_dl.session import DEFAULT_RATE_LIMITS, create_session, get_session
+
+    session = create_session({"api.consumet.org": 10, "aniwatch.to": None})
+
+    assert session.limiter is not get_session().limiter
+    assert session.limiter.bucket("api.consumet.org").rate == 10
+    assert session.limiter.bucket("aniwatch.to") is None
+    assert get_session().limiter.rates == DEFAULT_RATE_LIMITS
@@ -0,0 +1,61 @@
+import json
+import pytest
+from zoro_dl import utils
+from zoro_dl.utils import get_language_code, get_language_index
+
+# "Old" is the primary name of one language and an alias of another, "Mid" is an alias of one
+# language and the code of another, like real names and codes collide in languages_info.json
+LANGUAGES = {
+    "aaa": {"639-2": "aaa", "639-1": "mi", "en": ["Old", "First"]},
+    "bbb": {"639-2": "bbb", "639-2/B": "bbx", "en": ["Second", "Old", "Mid"]},
+    "mid": {"639-2": "mid", "en": ["Third"]},
+}
+
+
+@pytest.fixture
+def languages(tmp_path, monkeypatch):
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "languages_info.json").write_text(json.dumps(LANGUAGES), encoding="utf-8")
+    monkeypatch.setattr(utils, "script_directory", str(tmp_path))
+    get_language_index.cache_clear()
+    yield
+    get_language_index.cache_clear()
+
+
+def test_primary_name_wins_over_alias(languages):
+    assert get_language_code("Old") == "aaa"
+    assert get_language_code("Second") == "bbb"
+
+
+def test_alias_wins_over_code(languages):
+    assert get_language_code("Mid") == "bbb"
+    assert get_language_code("Third") == "mid"
+
+
+def test_codes_are_keys(languages):
+    assert get_language_code("mi") == "aaa"
+    assert get_language_code("bbx") == "bbb"
+    assert get_language_code("bbb") == "bbb"
+    assert get_language_code("Klingon") == ""
+
+
+def test_lookup_is_case_insensitive(languages):
+    assert get_language_code("OLD") == get_language_code("old") == "aaa"
+    assert get_language_code(" second ") == "bbb"
+    assert get_language_code("BBX") == "bbb"
+
+
+def test_index_is_built_once(languages, tmp_path):
+    get_language_code("Old")
+    (tmp_path / "static" / "languages_info.json").unlink()
+
+    assert get_language_code("Second") == "bbb"
+
+
+def test_shipped_languages():
+    get_language_index.cache_clear()
+
+    assert get_language_code("English") == "eng"
+    assert get_language_code("spanish") == "spa"
+    assert get_language_code("JA") == "jpn"
+    assert get_language_code("Portuguese") == "por"
@@ -0,0 +1,109 @@
+import time
+import pytest
+from zoro_dl.workqueue import Coordinator, SQLiteWorkQueue, WorkQueue
+
+
+@pytest.fixture
+def work_queue(tmp_path):
+    work_queue = SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    yield work_queue
+    work_queue.close()
+
+
+def test_work_queue_is_abstract():
+    with pytest.raises(TypeError):
+        WorkQueue()
+
+
+def test_enqueue_ignores_known_ids_and_leases_by_priority(work_queue):
+    assert work_queue.enqueue([("a", {"n": 1}), ("b", {"n": 2})]) == ["a", "b"]
+    assert work_queue.enqueue([("a", {"n": 1}), ("c", {"n": 3})], priority=5) == ["c"]
+
+    assert [work_queue.lease("w").id for _ in range(3)] == ["c", "a", "b"]
+    assert work_queue.lease("w") is None
+
+
+def test_complete_and_fail_require_the_lease(work_queue):
+    work_queue.enqueue([("a", {})])
+    item = work_queue.lease("w1")
+
+    assert item.payload == {}
+    assert item.attempts == 1
+    assert not work_queue.complete("a", "w2")
+    assert work_queue.complete("a", "w1", result="/out/a.mkv")
+    assert not work_queue.fail("a", "w1", "late")
+    assert work_queue.jobs("done")[0]["result"] == "/out/a.mkv"
+
+
+def test_expired_lease_is_reclaimed_and_old_worker_is_fenced_off(work_queue):
+    work_queue.enqueue([("a", {})])
+    work_queue.lease("w1", lease_seconds=0.01)
+    time.sleep(0.02)
+
+    item = work_queue.lease("w2")
+
+    assert item.id == "a"
+    assert item.attempts == 2
+    assert not work_queue.heartbeat("a", "w1")
+    assert not work_queue.complete("a", "w1")
+    assert work_queue.heartbeat("a", "w2")
+    assert work_queue.complete("a", "w2")
+
+
+def test_heartbeat_extends_the_lease(work_queue):
+    work_queue.enqueue([("a", {})])
+    work_queue.lease("w1", lease_seconds=0.05)
+
+    assert work_queue.heartbeat("a", "w1", lease_seconds=60)
+    time.sleep(0.06)
+
+    assert work_queue.reclaim() == 0
+    assert work_queue.counts()["leased"] == 1
+
+
+def test_jobs_fail_for_good_after_max_attempts(work_queue):
+    work_queue.enqueue([("a", {}), ("b", {})])
+
+    work_queue.lease("w")
+    assert work_queue.fail("a", "w", "boom")
+    assert work_queue.counts()["pending"] == 2
+
+    assert work_queue.lease("w").id == "a"
+    assert work_queue.fail("a", "w", "boom again")
+
+    work_queue.lease("w", lease_seconds=0.01)
+    time.sleep(0.02)
+    assert work_queue.reclaim() == 1
+    assert work_queue.lease("w", lease_seconds=0.01).id == "b"
+    time.sleep(0.02)
+    assert work_queue.reclaim() == 1
+
+    assert work_queue.counts() == {"pending": 0, "leased": 0, "done": 0, "failed": 2}
+    errors = {job["id"]: job["error"] for job in work_queue.jobs("failed")}
+    assert errors == {"a": "boom again", "b": "lease expired"}
+
+
+class FakeAPI:
+    def __init__(self, episode_count):
+        self.episode_count = episode_count
+        self.calls = 0
+
+    def get_episodes(self, id):
+        self.calls += 1
+        return [{}] * self.episode_count
+
+
+def test_coordinator_submit_expands_episodes(work_queue):
+    api = FakeAPI(3)
+    coordinator = Coordinator(work_queue, api=api)
+    url = "https://aniwatch.to/one-piece-100"
+
+    assert coordinator.submit(url, episode="2-3", resolution="720p") == [
+        "one-piece-100|S1|E2|both|720",
+        "one-piece-100|S1|E3|both|720",
+    ]
+    assert api.calls == 0
+
+    assert coordinator.submit(url, resolution="720p") == ["one-piece-100|S1|E1|both|720"]
+    assert api.calls == 1
+    assert work_queue.lease("w").payload["episode"] == 2
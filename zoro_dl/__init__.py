@@ -1 +1,13 @@
-from .processor import ZORO
+import sys
+
+if sys.version_info >= (3, 7):
+    # ZORO is imported on first access, so 'import zoro_dl.cli' or 'zoro-dl --help' stays fast
+    def __getattr__(name):
+        if name == "ZORO":
+            from .processor import ZORO
+
+            return ZORO
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+else:
+    from .processor import ZORO
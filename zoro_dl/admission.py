@@ -0,0 +1,134 @@
+import shutil, threading
+
+# Used when a manifest does not tell the bandwidth or duration of a stream
+DEFAULT_BANDWIDTH = 8000000
+DEFAULT_DURATION = 24 * 60
+AUDIO_BANDWIDTH = 192000
+
+
+def estimate_playlist_bytes(playlist):
+    """
+    Estimate the size of a stream from its manifest, as bandwidth × duration.
+
+    Args:
+        playlist (dict): The resolved media playlist from 'HLSDownloader.resolve'.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    variant = playlist.get("variant")
+    if variant is not None and variant["bandwidth"]:
+        bandwidth = variant["bandwidth"]
+    elif playlist.get("rendition") is not None:
+        bandwidth = AUDIO_BANDWIDTH
+    else:
+        bandwidth = DEFAULT_BANDWIDTH
+    duration = playlist.get("duration") or DEFAULT_DURATION
+    return int(bandwidth * duration / 8)
+
+
+class AdmissionController:
+    """
+    Admits episode downloads only while the temp volume has room for them.
+
+    Every admitted episode reserves its estimated peak temp size. A new episode is admitted if the free
+    space, minus what the admitted episodes are still going to write, minus its own estimate, stays above
+    'min_free'; otherwise it waits until admitted episodes are released. What an admitted episode is still
+    going to write is its estimate minus what it already wrote, as reported by its 'usage' callable, so
+    bytes already on disk are not counted twice. An episode is always admitted when nothing else is, since
+    waiting could not free any space.
+
+    Attributes:
+        path (str): A path on the temp volume.
+        min_free (int): Bytes to keep free on the temp volume.
+        poll_interval (float): Seconds between free space checks while waiting.
+    """
+
+    def __init__(self, path, min_free=1024 ** 3, poll_interval=5.0):
+        """
+        Initialize the AdmissionController.
+
+        Args:
+            path (str): A path on the temp volume.
+            min_free (int, optional): Bytes to keep free on the temp volume. Defaults to 1 GiB.
+            poll_interval (float, optional): Seconds between free space checks while waiting. Defaults to 5.
+        """
+        self.path = path
+        self.min_free = int(min_free)
+        self.poll_interval = poll_interval
+        self._reservations = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+
+    def free_bytes(self):
+        return shutil.disk_usage(self.path).free
+
+    def _outstanding(self):
+        outstanding = 0
+        for estimate, usage in self._reservations.values():
+            used = usage() if usage is not None else 0
+            outstanding += max(0, estimate - used)
+        return outstanding
+
+    def try_admit(self, key, estimate, usage=None):
+        """
+        Admit an episode if there is room for it right now.
+
+        Args:
+            key (str): A unique key for the episode.
+            estimate (int): The estimated peak temp size of the episode in bytes.
+            usage (callable or None, optional): Returns the bytes the episode has written so far. Defaults to None.
+
+        Returns:
+            bool: True if the episode was admitted.
+        """
+        with self._lock:
+            return self._try_admit(key, estimate, usage)
+
+    def _try_admit(self, key, estimate, usage):
+        if self._reservations and (
+            self.free_bytes() - self._outstanding() - estimate < self.min_free
+        ):
+            return False
+        self._reservations[key] = (estimate, usage)
+        return True
+
+    def admit(self, key, estimate, usage=None, on_wait=None):
+        """
+        Admit an episode, waiting until there is room for it.
+
+        Args:
+            key (str): A unique key for the episode.
+            estimate (int): The estimated peak temp size of the episode in bytes.
+            usage (callable or None, optional): Returns the bytes the episode has written so far. Defaults to None.
+            on_wait (callable or None, optional): Called once if the episode has to wait. Defaults to None.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            waiting = False
+            while not self._try_admit(key, estimate, usage):
+                if not waiting and on_wait is not None:
+                    on_wait()
+                waiting = True
+                self._released.wait(self.poll_interval)
+
+    def release(self, key):
+        """
+        Release the reservation of an episode, letting waiting episodes in.
+
+        Args:
+            key (str): The key the episode was admitted with.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._reservations.pop(key, None) is not None:
+                self._released.notify_all()
+
+    @property
+    def reserved(self):
+        with self._lock:
+            return sum(estimate for estimate, _ in self._reservations.values())
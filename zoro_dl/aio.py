@@ -0,0 +1,207 @@
+import asyncio, functools, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor
+from .anime_api import AnimeAPI
+from .utils import is_sub_dub
+
+
+async def run_process(cmd, terminate_timeout=10, success_codes=(0,)):
+    """
+    Run a command as an asyncio subprocess and wait for it without blocking the event loop.
+
+    If the awaiting task is cancelled, the process is terminated (and killed if it does not exit
+    within 'terminate_timeout' seconds) before the cancellation is propagated, so no N_m3u8DL-RE
+    or ffmpeg process outlives its job.
+
+    Args:
+        cmd (list): The command arguments.
+        terminate_timeout (float, optional): Seconds to wait for the process to exit after terminating it. Defaults to 10.
+        success_codes (tuple, optional): Exit codes of a successful run. Defaults to (0,).
+
+    Raises:
+        subprocess.CalledProcessError: If the process exits with any other code.
+
+    Returns:
+        None
+    """
+    process = await asyncio.create_subprocess_exec(*cmd)
+    try:
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), terminate_timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        raise
+
+    if returncode not in success_codes:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+
+async def gather_or_cancel(*awaitables):
+    """
+    Run awaitables concurrently and cancel the remaining ones as soon as one of them fails.
+
+    Args:
+        *awaitables: The coroutines or futures to run.
+
+    Returns:
+        list: The results, in the order of the awaitables.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    if not tasks:
+        return []
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
+        raise
+
+    if pending:
+        for task in pending:
+            task.cancel()
+        await asyncio.wait(pending)
+
+    return [task.result() for task in tasks]
+
+
+class LoopSemaphore:
+    """
+    An asyncio semaphore that is created lazily for the running event loop.
+
+    asyncio primitives are bound to one event loop, while a ZORO instance can be driven from
+    several loops over its lifetime, so the semaphore is recreated whenever the loop changes.
+
+    Attributes:
+        value (int): The number of holders allowed at once.
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self._loop = None
+        self._semaphore = None
+
+    def get(self):
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.value)
+        return self._semaphore
+
+
+class AsyncAnimeAPI:
+    """
+    An asyncio interface to the Consumet Anime API and the AniWatch availability check.
+
+    The requests are made by the pooled, cached AnimeAPI on a small dedicated thread pool, so any number
+    of coroutines can await them while only 'max_workers' threads (and keep-alive connections) are used,
+    instead of one thread per episode. Long-running work run with 'run_cancellable', such as whole HLS
+    downloads, gets a thread pool of its own, so it never holds up requests and subtitle downloads.
+
+    Attributes:
+        api (AnimeAPI): The synchronous client doing the requests.
+        availability (AvailabilityResolver or None): The resolver 'is_sub_dub' looks episodes up with, or None for the shared resolver.
+        max_workers (int): Number of threads running requests.
+        download_workers (int): Number of threads running long-running work.
+    """
+
+    def __init__(self, api=None, max_workers=8, availability=None, download_workers=None):
+        """
+        Initialize the AsyncAnimeAPI.
+
+        Args:
+            api (AnimeAPI or None, optional): The client to run requests with. Defaults to a new AnimeAPI.
+            max_workers (int, optional): Number of threads running requests. Defaults to 8.
+            availability (AvailabilityResolver or None, optional): The resolver 'is_sub_dub' looks episodes up with. Defaults to None, which uses the shared resolver.
+            download_workers (int or None, optional): Number of threads running long-running work with 'run_cancellable'. Defaults to None, which uses 'max_workers'.
+        """
+        self.api = api or AnimeAPI()
+        self.availability = availability
+        self.max_workers = max_workers
+        self.download_workers = download_workers or max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._download_executor = ThreadPoolExecutor(max_workers=self.download_workers)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """
+        Run a blocking callable on the request thread pool and await its result.
+
+        Args:
+            func (callable): The blocking callable.
+            *args: Positional arguments for the callable.
+            **kwargs: Keyword arguments for the callable.
+
+        Returns:
+            The callable's return value.
+        """
+        return await self._run_in(self._executor, func, *args, **kwargs)
+
+    async def _run_in(self, executor, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    async def run_cancellable(self, func, *args, **kwargs):
+        """
+        Run a long-running blocking callable taking a 'cancel' keyword argument (a threading.Event) on the
+        thread pool for long-running work, and stop it if the awaiting task is cancelled.
+
+        A thread cannot be interrupted, so on cancellation the event is set and the callable is awaited
+        until it returns before the cancellation is propagated. It therefore never keeps writing files
+        that its job is cleaning up.
+
+        Args:
+            func (callable): The blocking callable.
+            *args: Positional arguments for the callable.
+            **kwargs: Keyword arguments for the callable.
+
+        Returns:
+            The callable's return value.
+        """
+        cancel = threading.Event()
+        future = asyncio.ensure_future(
+            self._run_in(self._download_executor, func, *args, cancel=cancel, **kwargs)
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancel.set()
+            while not future.done():
+                try:
+                    await asyncio.wait([future])
+                except asyncio.CancelledError:
+                    pass
+            if not future.cancelled():
+                # The callable's own error, e.g. HLSCancelled, is replaced by the cancellation
+                future.exception()
+            raise
+
+    async def get_series_info(self, id):
+        return await self.run_blocking(self.api.get_series_info, id)
+
+    async def get_episodes(self, id):
+        return await self.run_blocking(self.api.get_episodes, id)
+
+    async def get_info(self, id, key):
+        return await self.run_blocking(self.api.get_info, id, key)
+
+    async def get_watch_info(self, episode_id):
+        return await self.run_blocking(self.api.get_watch_info, episode_id)
+
+    async def is_sub_dub(self, episode_id):
+        if self.availability is None:
+            return await self.run_blocking(is_sub_dub, episode_id)
+        return await self.run_blocking(self.availability.kind, episode_id)
+
+    def close(self):
+        """
+        Shut the thread pools down.
+
+        Returns:
+            None
+        """
+        self._executor.shutdown(wait=False)
+        self._download_executor.shutdown(wait=False)
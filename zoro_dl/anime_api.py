@@ -1,25 +1,146 @@
-import requests
-
-
-class AnimeAPI:
-    """
-    A class to interact with the Consumet Anime API (https://consumet.org) for ZORO (Currently AniWatch) and retrieve information about episodes and streams.
-
-    Attributes:
-        base_url (str): The base Endpoint for Consumet API for ZORO
-    """
-
-    def __init__(self):
-        self.base_url = "https://api.consumet.org/anime/zoro"
-
-    def get_episodes(self, id):
-        response = requests.get(f"{self.base_url}/info?id={id}").json()
-        return response.get("episodes", [])
-
-    def get_info(self, id, key):
-        response = requests.get(f"{self.base_url}/info?id={id}").json()
-        return response.get(key, "")
-
-    def get_watch_info(self, episode_id):
-        response = requests.get(f"{self.base_url}/watch?episodeId={episode_id}").json()
-        return response
+import os, time, threading
+from .metadata import MetadataStore
+from .utils import colored_text
+
+DEFAULT_API_URL = "https://api.consumet.org/anime/zoro"
+
+
+class AnimeAPI:
+    """
+    A class to interact with the Consumet Anime API (https://consumet.org) for ZORO (Currently AniWatch) and retrieve information about episodes and streams.
+
+    All requests go through a pooled keep-alive session, and the `/info` response of a series is cached
+    in memory and, with a cache directory, in a SQLite MetadataStore shared between runs and processes, so a
+    whole season costs a single `/info` request. A cached series is used as it is while it is younger than
+    'cache_ttl', or while its episode list already covers the episodes asked for; otherwise it is refreshed
+    with a conditional request, and kept if the API cannot be reached.
+
+    Attributes:
+        base_url (str): The base Endpoint for Consumet API for ZORO
+        session (requests.Session): The pooled session used for every request.
+        store (MetadataStore or None): The persistent metadata store, or None to keep the cache in memory only.
+        cache_ttl (int): Number of seconds a cached series is used without checking the API.
+    """
+
+    def __init__(self, session=None, cache_dir=None, cache_ttl=6 * 3600, store=None, base_url=DEFAULT_API_URL):
+        """
+        Initialize the AnimeAPI.
+
+        Args:
+            session (requests.Session or None, optional): The session to request with. Defaults to the shared pooled session.
+            cache_dir (str or None, optional): Directory of the metadata store, used if 'store' is not given. Defaults to None.
+            cache_ttl (int, optional): Number of seconds a cached series is used without checking the API. Defaults to 6 hours.
+            store (MetadataStore or None, optional): The metadata store to use. Defaults to None.
+            base_url (str, optional): The base Endpoint of the Consumet API for ZORO, e.g. of a self-hosted instance. Defaults to the public Consumet API.
+        """
+        self.base_url = base_url.rstrip("/")
+        if session is None:
+            # Imported on first use, so importing zoro_dl does not load requests
+            from .session import get_session
+
+            session = get_session()
+        self.session = session
+        self.cache_ttl = cache_ttl
+        self.store = store
+        if self.store is None and cache_dir is not None:
+            self.store = MetadataStore(os.path.join(cache_dir, MetadataStore.FILE_NAME))
+        self._info_cache = {}
+        self._info_locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _info_lock(self, id):
+        with self._locks_guard:
+            return self._info_locks.setdefault(id, threading.Lock())
+
+    def get_series_info(self, id, min_episodes=None):
+        """
+        Get the complete `/info` response for a series.
+
+        The response is kept in memory and in the store, and used until it is older than 'cache_ttl'.
+        Concurrent callers asking for the same series wait for a single in-flight request
+        instead of each issuing their own.
+
+        Args:
+            id (str): The Zoro ID of the series.
+            min_episodes (int or None, optional): The number of episodes the caller needs. A cached series listing at least this many episodes is used even if it is older than 'cache_ttl'. Defaults to None.
+
+        Returns:
+            dict: The `/info` response of the series.
+        """
+        with self._info_lock(id):
+            # The in-memory entry is checked like a stored one, so a long-lived process still sees new episodes
+            entry = self._info_cache.get(id)
+            if entry is None or not self._is_current(entry, min_episodes):
+                stored = self.store.get(id) if self.store is not None else None
+                if stored is not None and (entry is None or stored["checked_at"] > entry["checked_at"]):
+                    entry = stored
+                if entry is None or not self._is_current(entry, min_episodes):
+                    entry = self._refresh_series_info(id, entry)
+                self._info_cache[id] = entry
+            return entry["data"]
+
+    def _is_current(self, entry, min_episodes):
+        return time.time() - entry["checked_at"] < self.cache_ttl or (
+            min_episodes is not None and entry["episode_count"] >= min_episodes
+        )
+
+    def _refresh_series_info(self, id, entry):
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = self.session.get(f"{self.base_url}/info?id={id}", headers=headers)
+            if response.status_code == 304 and entry is not None:
+                if self.store is not None:
+                    self.store.touch(id)
+                return dict(entry, checked_at=time.time())
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            if entry is None:
+                raise
+            print(colored_text("[+] USING STORED SERIES INFO - {}".format(e), "yellow"))
+            return entry
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if self.store is not None:
+            self.store.put(id, data, etag=etag, last_modified=last_modified)
+        now = time.time()
+        return {
+            "data": data,
+            "episode_count": len(data.get("episodes", [])),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now,
+            "checked_at": now,
+        }
+
+    def invalidate(self, id=None):
+        """
+        Drop cached `/info` responses so the next lookup hits the API again.
+
+        Args:
+            id (str or None, optional): The Zoro ID to invalidate, or None to invalidate every series. Defaults to None.
+        """
+        if id is None:
+            self._info_cache.clear()
+        else:
+            self._info_cache.pop(id, None)
+        if self.store is not None:
+            self.store.delete(id)
+
+    def get_episodes(self, id, min_episodes=None):
+        return self.get_series_info(id, min_episodes).get("episodes", [])
+
+    def get_info(self, id, key):
+        return self.get_series_info(id).get(key, "")
+
+    def get_watch_info(self, episode_id):
+        response = self.session.get(f"{self.base_url}/watch?episodeId={episode_id}")
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,262 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+SERVERS_URL = "https://aniwatch.to/ajax/v2/episode/servers?episodeId={}"
+
+
+class EpisodeAvailability:
+    """
+    The audio tracks of an episode available on AniWatch, and the servers streaming each of them.
+
+    Attributes:
+        episode_id (str): The ZORO episode id.
+        sub (tuple): (server id, server name) pairs of the servers streaming the subbed (JPN) track.
+        dub (tuple): (server id, server name) pairs of the servers streaming the dubbed (ENG) track.
+        raw (tuple): (server id, server name) pairs of the servers streaming the raw track.
+    """
+
+    __slots__ = ("episode_id", "sub", "dub", "raw")
+
+    def __init__(self, episode_id, sub=(), dub=(), raw=()):
+        self.episode_id = episode_id
+        self.sub = tuple(sub)
+        self.dub = tuple(dub)
+        self.raw = tuple(raw)
+
+    def __repr__(self):
+        return "EpisodeAvailability(episode_id={!r}, kind={!r})".format(
+            self.episode_id, self.kind
+        )
+
+    @property
+    def kind(self):
+        """
+        str: 'both' if the episode is available subbed and dubbed, 'sub' or 'dub' if only one of them is, or 'unknown'.
+        """
+        if self.sub and self.dub:
+            return "both"
+        if self.dub:
+            return "dub"
+        if self.sub:
+            return "sub"
+        return "unknown"
+
+
+def parse_servers(episode_id, html):
+    """
+    Parse the server list HTML of an episode from the AniWatch servers endpoint.
+
+    Every server is a ".server-item" element whose "data-type" attribute is the track it streams
+    ("sub", "dub" or "raw"). If the markup has no such elements, the "SUB:" and "DUB:" block titles
+    are used instead, with an empty server entry for each track found.
+
+    Args:
+        episode_id (str): The ZORO episode id.
+        html (str): The "html" field of the servers endpoint response.
+
+    Returns:
+        EpisodeAvailability: The tracks and servers of the episode.
+    """
+    from bs4 import BeautifulSoup
+
+    tracks = {"sub": [], "dub": [], "raw": []}
+
+    soup = BeautifulSoup(html, "html.parser")
+    for item in soup.select(".server-item[data-type]"):
+        servers = tracks.get(item["data-type"].lower())
+        if servers is not None:
+            servers.append(
+                (item.get("data-server-id", item.get("data-id", "")), item.get_text(strip=True))
+            )
+
+    if not any(tracks.values()):
+        for track in ("sub", "dub"):
+            if "{}:".format(track.upper()) in html:
+                tracks[track].append(("", ""))
+
+    return EpisodeAvailability(episode_id, **tracks)
+
+
+class AvailabilityResolver:
+    """
+    Looks up which audio tracks the episodes of a show are available in, for a whole episode range at once.
+
+    The server lists of many episodes are fetched concurrently on a small pool of threads in the background
+    with 'prefetch', so a long show does not need one serial scrape per episode before downloads start.
+    Results are cached per episode id, and a lookup of an episode whose server list is already being
+    fetched waits for that request instead of making another one. A lookup of an episode that is queued by
+    'prefetch' but not started yet fetches it right away, and the queued fetch is skipped.
+
+    Attributes:
+        session (requests.Session): The session the server lists are fetched with.
+        workers (int): Number of server lists fetched at once by 'prefetch'.
+        servers_url (str): URL template of the servers endpoint, with "{}" in place of the episode id.
+    """
+
+    def __init__(self, session=None, workers=8, servers_url=SERVERS_URL):
+        """
+        Initialize the AvailabilityResolver.
+
+        Args:
+            session (requests.Session or None, optional): The session to fetch with. Defaults to the shared pooled session.
+            workers (int, optional): Number of server lists fetched at once by 'prefetch'. Defaults to 8.
+            servers_url (str, optional): URL template of the servers endpoint, with "{}" in place of the episode id. Defaults to the AniWatch endpoint.
+        """
+        if session is None:
+            # Imported on first use, so importing zoro_dl does not load requests
+            from .session import get_session
+
+            session = get_session()
+        self.session = session
+        self.workers = max(1, int(workers))
+        self.servers_url = servers_url
+        self._results = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def fetch(self, episode_id):
+        """
+        Fetch and parse the server list of an episode, bypassing the cache.
+
+        Args:
+            episode_id (str): The ZORO episode id.
+
+        Returns:
+            EpisodeAvailability: The tracks and servers of the episode.
+        """
+        response = self.session.get(self.servers_url.format(episode_id))
+        response.raise_for_status()
+        return parse_servers(episode_id, response.json()["html"])
+
+    def get(self, episode_id):
+        """
+        Get the availability of an episode, from the cache, from a request already in flight, or by fetching it.
+
+        Failed lookups are not cached, so a later call tries again.
+
+        Args:
+            episode_id (str): The ZORO episode id.
+
+        Returns:
+            EpisodeAvailability: The tracks and servers of the episode.
+        """
+        with self._lock:
+            future = self._results.get(episode_id)
+            if future is None:
+                future = self._results[episode_id] = Future()
+            owner = self._claim(future)
+
+        if owner:
+            self._resolve(episode_id, future)
+        return future.result()
+
+    @staticmethod
+    def _claim(future):
+        # Called with the lock held; a queued prefetch not started yet is taken over by the caller
+        if future.running() or future.done():
+            return False
+        return future.set_running_or_notify_cancel()
+
+    def _resolve(self, episode_id, future):
+        try:
+            future.set_result(self.fetch(episode_id))
+        except Exception as e:
+            with self._lock:
+                if self._results.get(episode_id) is future:
+                    del self._results[episode_id]
+            future.set_exception(e)
+
+    def kind(self, episode_id):
+        return self.get(episode_id).kind
+
+    def prefetch(self, episode_ids):
+        """
+        Start fetching the availability of many episodes in the background, in the given order.
+
+        Args:
+            episode_ids (iterable): The ZORO episode ids.
+
+        Returns:
+            list: The episode ids that were not cached or in flight yet.
+        """
+        with self._lock:
+            queued = []
+            for episode_id in episode_ids:
+                if episode_id not in self._results:
+                    self._results[episode_id] = Future()
+                    queued.append(episode_id)
+            if queued and self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            executor = self._executor
+            futures = [self._results[episode_id] for episode_id in queued]
+
+        for episode_id, future in zip(queued, futures):
+            executor.submit(self._prefetch_one, episode_id, future)
+        return queued
+
+    def _prefetch_one(self, episode_id, future):
+        with self._lock:
+            owner = self._claim(future)
+        # A failed fetch is left uncached; the episode's own lookup retries and reports the error
+        if owner:
+            self._resolve(episode_id, future)
+
+    def resolve(self, episode_ids):
+        """
+        Get the availability of many episodes, fetching the missing ones concurrently.
+
+        Args:
+            episode_ids (iterable): The ZORO episode ids.
+
+        Returns:
+            dict: EpisodeAvailability objects keyed by episode id.
+        """
+        episode_ids = list(episode_ids)
+        self.prefetch(episode_ids)
+        return {episode_id: self.get(episode_id) for episode_id in episode_ids}
+
+    def invalidate(self, episode_id=None):
+        """
+        Drop the cached availability of an episode, or of every episode.
+
+        Args:
+            episode_id (str or None, optional): The ZORO episode id. Defaults to None, which clears the whole cache.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if episode_id is None:
+                self._results.clear()
+            else:
+                self._results.pop(episode_id, None)
+
+    def close(self):
+        """
+        Stop the background fetches that have not started yet.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+_shared_resolver = None
+_shared_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """
+    Get the process-wide shared AvailabilityResolver, creating it on first use.
+
+    Returns:
+        AvailabilityResolver: The shared resolver.
+    """
+    global _shared_resolver
+    with _shared_resolver_lock:
+        if _shared_resolver is None:
+            _shared_resolver = AvailabilityResolver()
+    return _shared_resolver
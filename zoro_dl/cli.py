@@ -0,0 +1,96 @@
+import argparse, sys
+
+
+def parse_workers(value):
+    """
+    Parse the --workers option: a single count for every stage, or "stage=count" pairs, e.g. "video=2,mux=1".
+
+    Args:
+        value (str): The option value.
+
+    Returns:
+        int or dict: The worker count, or the worker count per stage.
+    """
+    if "=" not in value:
+        return int(value)
+    workers = {}
+    for pair in value.split(","):
+        stage, _, count = pair.partition("=")
+        workers[stage.strip()] = int(count)
+    return workers
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="zoro-dl",
+        description="Download DUAL-AUDIO Multi SUBS Anime from ZORO",
+    )
+    parser.add_argument("url", help="URL of the series on ZORO")
+    parser.add_argument("-s", "--season", default="1", help="Season number added to the file names (default: 1)")
+    parser.add_argument("-e", "--episode", default=None, help='Episodes to download, e.g. "1-5" or "10" (default: the whole season)')
+    parser.add_argument("-r", "--resolution", default="1080p", help="Resolution to download (default: 1080p)")
+    parser.add_argument("-t", "--dl-type", default="both", choices=("sub", "dub", "both"), help="JPN audio, ENG audio or both (default: both)")
+    parser.add_argument("-g", "--group-tag", default="NOGRP", help="Group tag of the file names (default: NOGRP)")
+    parser.add_argument("-o", "--output-dir", default=None, help="Directory the finished files are stored in (default: the current directory)")
+    parser.add_argument("--temp-dir", default=None, help="Directory of the temp files (default: the output folder)")
+    parser.add_argument("--cache-dir", default=None, help="Directory of the metadata store (default: ~/.cache/zoro-dl)")
+    parser.add_argument("--no-cache", action="store_true", help="Keep the series metadata in memory only")
+    parser.add_argument("--journal", default=None, help="Path of the job journal (default: .zoro-dl-journal.jsonl in the output folder)")
+    parser.add_argument("--no-journal", action="store_true", help="Disable the job journal")
+    parser.add_argument("--backend", default="n_m3u8dl", choices=("n_m3u8dl", "native"), help="Video download backend (default: n_m3u8dl)")
+    parser.add_argument("--mux-backend", default="ffmpeg", choices=("ffmpeg", "mkvmerge"), help="Muxer writing the MKV files (default: ffmpeg)")
+    parser.add_argument("--mux-processes", type=int, default=None, help="Maximum number of muxes at once (default: one per CPU core, up to 4)")
+    parser.add_argument("--stream-mux", action="store_true", help="Stream segments into FFmpeg instead of writing temp files (native backend only)")
+    parser.add_argument("--workers", type=parse_workers, default=None, help='Pipeline episodes with this many workers per stage, or per stage as "video=2,mux=1"')
+    parser.add_argument("--prefetch", action="store_true", help="Resolve the streams of the whole range up front")
+    parser.add_argument("--metrics", default=None, help="Append the metrics events to this JSON-lines file")
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of the 'zoro-dl' command.
+
+    zoro_dl is only imported once the arguments are parsed, so '--help' and invalid arguments return at once.
+    The exit status is 1 if any requested episode failed, so scripts and cron jobs can detect a failed run.
+
+    Args:
+        argv (list or None, optional): The arguments. Defaults to None, which uses sys.argv.
+
+    Returns:
+        int: The exit status.
+    """
+    args = build_parser().parse_args(argv)
+
+    from .processor import ZORO
+    from .metadata import DEFAULT_CACHE_DIR
+    from .metrics import JsonLinesMetricsHook
+
+    zoro = ZORO(
+        args.url,
+        season=args.season,
+        episode=args.episode,
+        resolution=args.resolution,
+        dl_type=args.dl_type,
+        group_tag=args.group_tag,
+        cache_dir=None if args.no_cache else args.cache_dir or DEFAULT_CACHE_DIR,
+        journal=None if args.no_journal else args.journal or True,
+        metrics_hooks=[JsonLinesMetricsHook(args.metrics)] if args.metrics else None,
+        download_backend=args.backend,
+        stream_mux=args.stream_mux,
+        mux_backend=args.mux_backend,
+        max_mux_processes=args.mux_processes,
+        output_dir=args.output_dir,
+        temp_dir=args.temp_dir,
+    )
+    try:
+        report = zoro.start_dl(workers=args.workers, prefetch=args.prefetch)
+    except KeyboardInterrupt:
+        return 130
+    if report is None or report["completed"] < report["episodes"]:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,578 @@
+import os, json, socket, threading, itertools, socketserver
+from collections import OrderedDict, deque
+from .anime_api import AnimeAPI, DEFAULT_API_URL
+from .metadata import DEFAULT_CACHE_DIR, default_cache_dir
+from .journal import JobJournal
+from .availability import AvailabilityResolver, SERVERS_URL
+from .processor import ZORO
+from .scheduler import STAGES, run_stage
+from .mux import default_mux_processes
+from .utils import colored_text
+
+DEFAULT_PORT = 8391
+
+# Options shared by every series, which are set once for the whole daemon
+DAEMON_OPTIONS = frozenset(("api", "journal", "cache_dir", "api_url", "rate_limits"))
+
+# Options a socket client may set for its series; anything that names a path or a pool stays with the daemon
+SOCKET_OPTIONS = frozenset(("resolution", "group_tag", "audio_only_secondary", "skip_existing"))
+SUBMIT_KEYS = frozenset(("url", "season", "episode", "dl_type", "priority"))
+
+
+def default_socket_path():
+    """
+    Get the default path of the daemon's Unix-domain socket, in XDG_RUNTIME_DIR where it is set.
+
+    Returns:
+        str: The socket path, e.g. "/run/user/1000/zoro-dl.sock".
+    """
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or default_cache_dir(), "zoro-dl.sock")
+
+_DONE = object()
+
+
+class FairQueue:
+    """
+    A thread-safe queue that hands out items by priority, and round-robin between series of the same priority.
+
+    Every item is queued under a key (the series it belongs to) and a priority. 'get' takes the next item
+    of the highest priority that has items, from the key after the one it took from last, so a series with
+    hundreds of queued episodes cannot starve a series submitted after it.
+
+    Attributes:
+        maxsize (int): Maximum number of queued items, 'put' blocks while it is reached. 0 for no limit.
+    """
+
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self._levels = {}
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def __len__(self):
+        with self._lock:
+            return self._size
+
+    def put(self, key, priority, item):
+        """
+        Queue an item, waiting while the queue is full.
+
+        Args:
+            key (hashable): The key the item is round-robined under.
+            priority (int): The priority of the item, higher priorities are handed out first.
+            item (object): The item.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            while self.maxsize and self._size >= self.maxsize:
+                self._not_full.wait()
+            self._levels.setdefault(priority, OrderedDict()).setdefault(key, deque()).append(item)
+            self._size += 1
+            self._not_empty.notify()
+
+    def get(self):
+        """
+        Take the next item, waiting while the queue is empty.
+
+        Returns:
+            tuple: (key, item), or (None, _DONE) once the queue is closed and empty.
+        """
+        with self._lock:
+            while not self._size:
+                if self._closed:
+                    return None, _DONE
+                self._not_empty.wait()
+
+            priority = max(self._levels)
+            keys = self._levels[priority]
+            key, items = next(iter(keys.items()))
+            item = items.popleft()
+            # The key goes to the back of its level, so the next get serves the following series
+            del keys[key]
+            if items:
+                keys[key] = items
+            if not keys:
+                del self._levels[priority]
+
+            self._size -= 1
+            self._not_full.notify()
+            return key, item
+
+    def close(self):
+        """
+        Close the queue: once it is empty, every waiting and later 'get' returns (None, _DONE).
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+
+
+class SeriesTask:
+    """
+    A series submitted to a DownloadDaemon, and its progress.
+
+    Attributes:
+        id (int): The task id.
+        url (str): The URL of the series on ZORO.
+        season (str): The season number.
+        episode (str or None): The requested episode range, or None for the whole season.
+        dl_type (str): The download type ("sub", "dub" or "both").
+        priority (int): The priority of the task, higher priorities are scheduled first.
+        options (dict): Extra ZORO options of this task.
+        state (str): "queued", "running", "done" or "failed".
+        episodes (int): Number of episodes to process, known once the series is set up.
+        finished (int): Number of episodes that left the pipeline.
+        completed (int): Number of episodes that were muxed, or were already downloaded.
+        error (str or None): Why the task failed.
+        zoro (ZORO or None): The ZORO instance of the series, once it is set up.
+    """
+
+    def __init__(self, id, url, season, episode, dl_type, priority, options):
+        self.id = id
+        self.url = url
+        self.season = str(season)
+        self.episode = None if episode is None else str(episode)
+        self.dl_type = dl_type
+        self.priority = int(priority)
+        self.options = options
+        self.state = "queued"
+        self.episodes = 0
+        self.finished = 0
+        self.completed = 0
+        self.error = None
+        self.zoro = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """
+        Wait until every episode of the task has left the pipeline.
+
+        Args:
+            timeout (float or None, optional): Maximum number of seconds to wait. Defaults to None.
+
+        Returns:
+            bool: True if the task is finished.
+        """
+        return self._done.wait(timeout)
+
+    def status(self):
+        return {
+            "id": self.id,
+            "url": self.url,
+            "season": self.season,
+            "episode": self.episode,
+            "dl_type": self.dl_type,
+            "priority": self.priority,
+            "state": self.state,
+            "episodes": self.episodes,
+            "finished": self.finished,
+            "completed": self.completed,
+            "error": self.error,
+        }
+
+
+class DownloadDaemon:
+    """
+    A long-running download service for many series at once, sharing every pool between them.
+
+    Series are submitted with 'submit' (or over a local socket with 'serve') and processed by one set
+    of resolve, video, subs and mux worker threads shared by every series, like the stages of an
+    EpisodeScheduler. The queue in front of every stage is a FairQueue, so episodes are taken by
+    priority, and round-robin between series of the same priority. Every series also shares the
+    pooled HTTP session, one AnimeAPI with its metadata cache, one AvailabilityResolver, the
+    N_m3u8DL-RE and mux process slots and, per folder, the disk-space admission, output index and job journal.
+
+    Attributes:
+        workers (dict): Number of worker threads for each stage.
+        queue_size (int): Maximum number of episodes waiting in front of each stage after "resolve".
+        options (dict): ZORO options used for every series.
+        api (AnimeAPI): The AnimeAPI shared by every series.
+    """
+
+    def __init__(self, workers=None, queue_size=2, max_video_processes=2, max_mux_processes=None, **options):
+        """
+        Initialize the DownloadDaemon.
+
+        Args:
+            workers (dict or int or None, optional): Worker count per stage ("resolve", "video", "subs", "mux"), or a single count for every stage. Stages not listed get one worker, except "mux" which gets 'max_mux_processes'. Defaults to None.
+            queue_size (int, optional): Maximum number of episodes waiting in front of each stage after "resolve". Defaults to 2.
+            max_video_processes (int, optional): Maximum number of N_m3u8DL-RE processes running at once across every series. Defaults to 2.
+            max_mux_processes (int or None, optional): Maximum number of mux processes running at once across every series. Defaults to None, which uses one per CPU core, up to 4.
+            **options: ZORO options used for every series, e.g. resolution, output_dir or download_backend. The DAEMON_OPTIONS are set up once for the daemon: 'rate_limits' apply to a session of the daemon's own, shared by every series.
+        """
+        if isinstance(workers, int):
+            workers = {stage: workers for stage in STAGES}
+        workers = workers or {}
+
+        unknown_stages = set(workers) - set(STAGES)
+        if unknown_stages:
+            raise ValueError("Unknown stages: {}".format(", ".join(sorted(unknown_stages))))
+
+        max_mux_processes = (
+            max(1, int(max_mux_processes)) if max_mux_processes is not None else default_mux_processes()
+        )
+        defaults = {"mux": max_mux_processes}
+        self.workers = {
+            stage: max(1, int(workers.get(stage, defaults.get(stage, 1)))) for stage in STAGES
+        }
+        self.queue_size = max(1, int(queue_size))
+        self.options = options
+
+        rate_limits = options.pop("rate_limits", None)
+        if rate_limits and options.get("api") is not None:
+            raise ValueError("rate_limits cannot be combined with api, whose session may be shared")
+        session = None
+        if rate_limits:
+            from .session import create_session
+
+            session = create_session(rate_limits)
+        self.api = options.pop("api", None) or AnimeAPI(
+            session=session,
+            cache_dir=options.pop("cache_dir", DEFAULT_CACHE_DIR),
+            base_url=options.pop("api_url", DEFAULT_API_URL),
+        )
+        journal = options.pop("journal", True)
+        self.journal = JobJournal(journal) if isinstance(journal, str) else journal
+        self._journals = {}
+        self.availability = AvailabilityResolver(
+            self.api.session, servers_url=options.get("servers_url", SERVERS_URL)
+        )
+        self.video_process_slots = threading.BoundedSemaphore(max(1, int(max_video_processes)))
+        self.mux_slots = threading.BoundedSemaphore(max_mux_processes)
+        self._admission = {}
+        self._output_indexes = {}
+
+        self._queues = [FairQueue() if index == 0 else FairQueue(self.queue_size) for index, _ in enumerate(STAGES)]
+        self._tasks = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._server = None
+
+    def start(self):
+        """
+        Start the worker threads of every stage.
+
+        Returns:
+            DownloadDaemon: The started daemon.
+        """
+        with self._lock:
+            if self._threads:
+                return self
+            for index, stage in enumerate(STAGES):
+                remaining = [self.workers[stage]]
+                for worker_index in range(self.workers[stage]):
+                    thread = threading.Thread(
+                        target=self._worker,
+                        args=(index, remaining),
+                        name="zoro-daemon-{}-{}".format(stage, worker_index),
+                        daemon=True,
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+        return self
+
+    def submit(self, url, season="1", episode=None, dl_type="both", priority=0, **options):
+        """
+        Queue a series for download.
+
+        The series is set up (its episode list fetched) by a resolve worker, so this returns at once.
+
+        Args:
+            url (str): The URL of the series on ZORO.
+            season (str, optional): The season number. Defaults to "1".
+            episode (str or None, optional): Episodes to download, e.g. "1-5" or "10", or None for the whole season. Defaults to None.
+            dl_type (str, optional): Download type: "sub", "dub" or "both". Defaults to "both".
+            priority (int, optional): Higher priorities are scheduled first; series of the same priority share the workers round-robin. Defaults to 0.
+            **options: ZORO options for this series, overriding the daemon's options. The options in DAEMON_OPTIONS are shared by every series and cannot be set per series.
+
+        Raises:
+            ValueError: If 'options' sets one of the DAEMON_OPTIONS.
+
+        Returns:
+            SeriesTask: The queued task.
+        """
+        shared = DAEMON_OPTIONS.intersection(options)
+        if shared:
+            raise ValueError("Set for the whole daemon: {}".format(", ".join(sorted(shared))))
+
+        with self._lock:
+            task = SeriesTask(next(self._ids), url, season, episode, dl_type, priority, options)
+            self._tasks[task.id] = task
+        self._queues[0].put(task.id, task.priority, task)
+        return task
+
+    def tasks(self):
+        with self._lock:
+            return list(self._tasks.values())
+
+    def status(self):
+        return [task.status() for task in self.tasks()]
+
+    def join(self):
+        """
+        Wait until every submitted task is finished.
+
+        Returns:
+            None
+        """
+        for task in self.tasks():
+            task.wait()
+
+    def shutdown(self, wait=True):
+        """
+        Stop the daemon once the queued work is done: no socket requests are served anymore, and the
+        workers of every stage exit once the stages before them have.
+
+        Args:
+            wait (bool, optional): Wait for the workers to exit. Defaults to True.
+
+        Returns:
+            None
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            if isinstance(self._server.server_address, str):
+                try:
+                    os.remove(self._server.server_address)
+                except OSError:
+                    pass
+            self._server = None
+        self._queues[0].close()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self.availability.close()
+
+    def _worker(self, index, remaining):
+        stage = STAGES[index]
+        in_queue = self._queues[index]
+        next_queue = self._queues[index + 1] if index + 1 < len(STAGES) else None
+
+        while True:
+            task_id, item = in_queue.get()
+            if item is _DONE:
+                break
+
+            if isinstance(item, SeriesTask):
+                self._set_up(item)
+                continue
+
+            task, item = item
+            job = run_stage(task.zoro, stage, item)
+            if job is None:
+                # Left at "resolve": already downloaded, or its streams could not be resolved
+                self._episode_left(task, task.zoro.completed_path(item) is not None)
+            elif next_queue is None:
+                self._episode_left(task, not any(error.startswith("mux:") for error in job.errors))
+            else:
+                next_queue.put(task_id, task.priority, (task, job))
+
+        # The last worker of a stage to exit closes the queue of the next stage
+        with self._lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+        if last_worker and next_queue is not None:
+            next_queue.close()
+
+    def _set_up(self, task):
+        """
+        Create the ZORO instance of a task on the shared pools and queue its episodes.
+        """
+        task.state = "running"
+        try:
+            options = dict(self.options)
+            options.update(task.options)
+            zoro = ZORO(
+                task.url,
+                season=task.season,
+                episode=task.episode,
+                dl_type=task.dl_type,
+                api=self.api,
+                journal=self.journal,
+                **options
+            )
+            if not zoro.check_dl_type():
+                raise ValueError("Invalid dl_type: {}".format(task.dl_type))
+        except Exception as e:
+            print(colored_text("[+] ERROR - Adding {} - {}".format(task.url, e), "red"))
+            self._finish(task, "failed", str(e))
+            return
+
+        # Every series waits on the same process slots and lookups, and shares the disk-space
+        # admission of its temp volume and the output index and job journal of its output folder
+        zoro.video_process_slots = self.video_process_slots
+        zoro.mux_slots = self.mux_slots
+        zoro.availability = self.availability
+        with self._lock:
+            if zoro.admission is not None:
+                zoro.admission = self._admission.setdefault(os.path.realpath(zoro.temp_dir), zoro.admission)
+            if zoro.output_index is not None:
+                zoro.output_index = self._output_indexes.setdefault(
+                    os.path.realpath(zoro.output_dir), zoro.output_index
+                )
+            if self.journal is True and zoro.journal is not None:
+                zoro.journal = self._journals.setdefault(os.path.realpath(zoro.output_dir), zoro.journal)
+
+        episode_numbers = zoro.requested_episode_numbers()
+        task.zoro = zoro
+        task.episodes = len(episode_numbers)
+        zoro.metrics.reset()
+        zoro.prefetch_availability(episode_numbers)
+
+        if not episode_numbers:
+            self._finish(task, "done")
+            return
+        for episode_number in episode_numbers:
+            self._queues[0].put(task.id, task.priority, (task, episode_number))
+
+    def _episode_left(self, task, completed):
+        """
+        Count an episode leaving the pipeline, and finish its task after the last one.
+
+        Args:
+            task (SeriesTask): The task of the episode.
+            completed (bool): Whether the episode was muxed or already downloaded.
+        """
+        with self._lock:
+            task.finished += 1
+            if completed:
+                task.completed += 1
+            last_episode = task.finished == task.episodes
+        if last_episode:
+            # Waiting for the background moves of the series must not hold up a mux worker
+            threading.Thread(target=self._finish_series, args=(task,), daemon=True).start()
+
+    def _finish_series(self, task):
+        task.zoro.wait_for_moves()
+        task.zoro.metrics.run_finished()
+        self._finish(task, "done")
+
+    def _finish(self, task, state, error=None):
+        task.state = state
+        task.error = error
+        task._done.set()
+
+    def serve(self, path=None, host=None, port=DEFAULT_PORT):
+        """
+        Accept requests on a local socket in a background thread, see 'handle_request' for the protocol.
+
+        The daemon listens on a Unix-domain socket that only the user running it can connect to (mode 0600).
+        A TCP socket is only used if 'host' is given, or where Unix-domain sockets are not available
+        (Windows); it is not authenticated, so any local process can submit series through it.
+
+        Args:
+            path (str or None, optional): Path of the Unix-domain socket. Defaults to None, which uses 'default_socket_path'.
+            host (str or None, optional): The address to listen on with TCP instead, e.g. "127.0.0.1". Defaults to None.
+            port (int, optional): The TCP port to listen on, 0 for any free port. Defaults to DEFAULT_PORT.
+
+        Returns:
+            str or tuple: The socket path, or the (host, port) address the daemon listens on.
+        """
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        response = daemon.handle_request(json.loads(line.decode("utf-8")))
+                    except Exception as e:
+                        response = {"ok": False, "error": str(e)}
+                    self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+        if host is None and hasattr(socketserver, "ThreadingUnixStreamServer"):
+            path = path or default_socket_path()
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if os.path.exists(path):
+                # A socket left behind by a daemon that did not shut down
+                os.remove(path)
+            previous_umask = os.umask(0o177)
+            try:
+                server = socketserver.ThreadingUnixStreamServer(path, Handler)
+            finally:
+                os.umask(previous_umask)
+            os.chmod(path, 0o600)
+            address = path
+        else:
+            server = socketserver.ThreadingTCPServer((host or "127.0.0.1", port), Handler)
+            address = server.server_address[:2]
+
+        server.daemon_threads = True
+        self._server = server
+        threading.Thread(target=server.serve_forever, name="zoro-daemon-socket", daemon=True).start()
+        return address
+
+    def handle_request(self, request):
+        """
+        Handle a request received on the socket.
+
+        Requests and responses are JSON objects, one per line:
+
+        - {"action": "submit", "url": ..., "season": "1", "episode": "1-5", "dl_type": "both", "priority": 0}
+          queues a series and answers {"ok": true, "id": ...}. The ZORO options in SOCKET_OPTIONS can be
+          added, e.g. "resolution"; a request with any other key is rejected.
+        - {"action": "status"} answers {"ok": true, "tasks": [...]} with the status of every task.
+
+        Failed requests are answered with {"ok": false, "error": ...}.
+
+        Args:
+            request (dict): The request.
+
+        Returns:
+            dict: The response.
+        """
+        request = dict(request)
+        action = request.pop("action", None)
+        if action == "submit":
+            unsupported = set(request) - SUBMIT_KEYS - SOCKET_OPTIONS
+            if unsupported:
+                return {"ok": False, "error": "Unsupported options: {}".format(", ".join(sorted(unsupported)))}
+            if "url" not in request:
+                return {"ok": False, "error": "Missing url"}
+            task = self.submit(request.pop("url"), **request)
+            return {"ok": True, "id": task.id}
+        if action == "status":
+            return {"ok": True, "tasks": self.status()}
+        return {"ok": False, "error": "Unknown action: {}".format(action)}
+
+
+def send_request(request, path=None, host=None, port=DEFAULT_PORT, timeout=30):
+    """
+    Send a request to a DownloadDaemon listening on a local socket, see 'DownloadDaemon.serve'.
+
+    Args:
+        request (dict): The request, see 'DownloadDaemon.handle_request'.
+        path (str or None, optional): Path of the daemon's Unix-domain socket. Defaults to None, which uses 'default_socket_path'.
+        host (str or None, optional): The address of a daemon listening on TCP instead. Defaults to None.
+        port (int, optional): The TCP port of the daemon. Defaults to DEFAULT_PORT.
+        timeout (float, optional): Socket timeout in seconds. Defaults to 30.
+
+    Returns:
+        dict: The response.
+    """
+    if host is None and hasattr(socket, "AF_UNIX"):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        try:
+            connection.connect(path or default_socket_path())
+        except OSError:
+            connection.close()
+            raise
+    else:
+        connection = socket.create_connection((host or "127.0.0.1", port), timeout=timeout)
+
+    with connection:
+        connection.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with connection.makefile("rb") as response_file:
+            return json.loads(response_file.readline().decode("utf-8"))
@@ -0,0 +1,504 @@
+import os, re, subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+from .retries import bind_retries
+
+_ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class HLSError(Exception):
+    """
+    Raised when an HLS playlist cannot be downloaded by the native HLS engine.
+    """
+
+
+class HLSCancelled(HLSError):
+    """
+    Raised when a native HLS download is stopped through its 'cancel' event.
+    """
+
+
+def parse_attributes(attribute_list):
+    """
+    Parse an HLS attribute list such as 'BANDWIDTH=800000,RESOLUTION=1280x720,CODECS="avc1,mp4a"'.
+
+    Args:
+        attribute_list (str): The attribute list.
+
+    Returns:
+        dict: The attributes, with quoted values unquoted.
+    """
+    return {
+        name: value[1:-1] if value.startswith('"') else value
+        for name, value in _ATTRIBUTE_PATTERN.findall(attribute_list)
+    }
+
+
+def is_master_playlist(text):
+    return "#EXT-X-STREAM-INF" in text
+
+
+def parse_master_playlist(text, base_url):
+    """
+    Parse an HLS master playlist.
+
+    Args:
+        text (str): The playlist.
+        base_url (str): URL of the playlist, used to resolve relative URIs.
+
+    Returns:
+        dict: "variants", a list of dictionaries with "url", "bandwidth", "width", "height", "codecs" and "audio" (the audio group id),
+              and "audio", a list of audio rendition dictionaries with "url", "group_id", "name", "language" and "default".
+    """
+    variants = []
+    audio = []
+    pending = None
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            attributes = parse_attributes(line.split(":", 1)[1])
+            width, height = 0, 0
+            if "RESOLUTION" in attributes:
+                width, height = map(int, attributes["RESOLUTION"].lower().split("x"))
+            pending = {
+                "bandwidth": int(attributes.get("BANDWIDTH", 0)),
+                "width": width,
+                "height": height,
+                "codecs": attributes.get("CODECS", ""),
+                "audio": attributes.get("AUDIO"),
+            }
+
+        elif line.startswith("#EXT-X-MEDIA:"):
+            attributes = parse_attributes(line.split(":", 1)[1])
+            if attributes.get("TYPE") == "AUDIO" and "URI" in attributes:
+                audio.append(
+                    {
+                        "url": urljoin(base_url, attributes["URI"]),
+                        "group_id": attributes.get("GROUP-ID"),
+                        "name": attributes.get("NAME", ""),
+                        "language": attributes.get("LANGUAGE", ""),
+                        "default": attributes.get("DEFAULT") == "YES",
+                    }
+                )
+
+        elif not line.startswith("#") and pending is not None:
+            pending["url"] = urljoin(base_url, line)
+            variants.append(pending)
+            pending = None
+
+    return {"variants": variants, "audio": audio}
+
+
+def parse_media_playlist(text, base_url):
+    """
+    Parse an HLS media playlist.
+
+    Args:
+        text (str): The playlist.
+        base_url (str): URL of the playlist, used to resolve relative URIs.
+
+    Returns:
+        dict: "segments", a list of dictionaries with "url", "duration" and "byterange" ((length, offset) or None),
+              "init", the EXT-X-MAP initialization segment dictionary or None, "encrypted", whether any
+              segment uses an EXT-X-KEY method other than NONE, and "duration", the total duration in seconds.
+    """
+    segments = []
+    init = None
+    encrypted = False
+    duration = 0.0
+    byterange = None
+    next_offset = 0
+
+    def parse_byterange(value, default_offset):
+        length, _, offset = value.partition("@")
+        return int(length), int(offset) if offset else default_offset
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith("#EXTINF:"):
+            duration = float(line.split(":", 1)[1].split(",")[0])
+
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            byterange = parse_byterange(line.split(":", 1)[1], next_offset)
+
+        elif line.startswith("#EXT-X-KEY:"):
+            method = parse_attributes(line.split(":", 1)[1]).get("METHOD", "NONE")
+            if method != "NONE":
+                encrypted = True
+
+        elif line.startswith("#EXT-X-MAP:"):
+            attributes = parse_attributes(line.split(":", 1)[1])
+            init = {
+                "url": urljoin(base_url, attributes["URI"]),
+                "duration": 0.0,
+                "byterange": parse_byterange(attributes["BYTERANGE"], 0)
+                if "BYTERANGE" in attributes
+                else None,
+            }
+
+        elif not line.startswith("#"):
+            segments.append(
+                {"url": urljoin(base_url, line), "duration": duration, "byterange": byterange}
+            )
+            if byterange is not None:
+                next_offset = byterange[1] + byterange[0]
+            duration = 0.0
+            byterange = None
+
+    return {
+        "segments": segments,
+        "init": init,
+        "encrypted": encrypted,
+        "duration": sum(segment["duration"] for segment in segments),
+    }
+
+
+def select_variant(variants, height=None):
+    """
+    Select the variant of a master playlist matching a resolution.
+
+    The variant with exactly the requested height is preferred (the highest bandwidth one if there
+    are several), then the highest variant below it, then the lowest variant above it.
+
+    Args:
+        variants (list): The variants from 'parse_master_playlist'.
+        height (int or None, optional): The requested height, e.g. 1080. Defaults to None, which selects the highest variant.
+
+    Returns:
+        dict: The selected variant.
+    """
+    if not variants:
+        raise HLSError("Master playlist has no variants")
+
+    ordered = sorted(variants, key=lambda variant: (variant["height"], variant["bandwidth"]))
+    if height is None:
+        return ordered[-1]
+
+    at_or_below = [variant for variant in ordered if variant["height"] <= int(height)]
+    if at_or_below:
+        return at_or_below[-1]
+    return ordered[0]
+
+
+def select_group_audio(master, variant):
+    """
+    Select the audio rendition of a variant's audio group, for variants that carry their audio separately.
+
+    Args:
+        master (dict): The master playlist from 'parse_master_playlist'.
+        variant (dict): The selected variant.
+
+    Returns:
+        dict or None: The default rendition of the group (or its first one), or None if the variant has no audio group with a URI.
+    """
+    candidates = [
+        rendition for rendition in master["audio"]
+        if variant["audio"] is not None and rendition["group_id"] == variant["audio"]
+    ]
+    if not candidates:
+        return None
+    defaults = [rendition for rendition in candidates if rendition["default"]]
+    return (defaults or candidates)[0]
+
+
+def join_audio(video_path, audio_path, out_path):
+    """
+    Join a video-only file and the file of its separate audio rendition into one file with FFmpeg, copying both streams.
+
+    Args:
+        video_path (str): The video file.
+        audio_path (str): The audio file.
+        out_path (str): The file to write, as Matroska whatever its extension, which FFmpeg and mkvmerge read by content.
+
+    Raises:
+        subprocess.CalledProcessError: If FFmpeg fails.
+
+    Returns:
+        None
+    """
+    subprocess.check_call(
+        [
+            "ffmpeg", "-v", "error", "-y",
+            "-i", video_path,
+            "-i", audio_path,
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c", "copy", "-f", "matroska", out_path,
+        ]
+    )
+
+
+def select_audio(master, height=None):
+    """
+    Select the cheapest playlist of a master playlist that carries the audio track.
+
+    If the master playlist has audio renditions, the default rendition of the audio group used by the
+    variant 'select_variant' would pick is preferred, then any default rendition, then the first one.
+    Otherwise the audio is only muxed into the variants, and the lowest bandwidth variant is selected.
+
+    Args:
+        master (dict): The master playlist from 'parse_master_playlist'.
+        height (int or None, optional): The requested height, used to find the matching audio group. Defaults to None.
+
+    Returns:
+        tuple: The selected audio rendition (or None) and the selected variant (or None).
+    """
+    renditions = master["audio"]
+    if renditions:
+        group_id = None
+        if master["variants"]:
+            group_id = select_variant(master["variants"], height)["audio"]
+        for candidates in (
+            [rendition for rendition in renditions if rendition["group_id"] == group_id],
+            renditions,
+        ):
+            if candidates:
+                defaults = [rendition for rendition in candidates if rendition["default"]]
+                return (defaults or candidates)[0], None
+
+    if not master["variants"]:
+        raise HLSError("Master playlist has no variants")
+    return None, min(master["variants"], key=lambda variant: variant["bandwidth"])
+
+
+class HLSDownloader:
+    """
+    A native, in-process HLS downloader.
+
+    Segments are fetched concurrently over a pooled session and written to disk strictly in playlist
+    order as they arrive, with a bounded window of segments in flight so memory use stays flat. Failed
+    segment requests are retried by the session (see PooledSession). Segments are concatenated as they are (MPEG-TS, or fragmented MP4
+    after its initialization segment), which FFmpeg reads regardless of the file extension.
+
+    Attributes:
+        session (requests.Session): The session segments are fetched with.
+        workers (int): Number of segments fetched at once.
+    """
+
+    def __init__(self, session=None, workers=8):
+        """
+        Initialize the HLSDownloader.
+
+        Args:
+            session (requests.Session or None, optional): The session to fetch with. Defaults to the shared pooled session.
+            workers (int, optional): Number of segments fetched at once. Defaults to 8.
+        """
+        if session is None:
+            # Imported on first use, so importing zoro_dl does not load requests
+            from .session import get_session
+
+            session = get_session()
+        self.session = session
+        self.workers = max(1, int(workers))
+
+    def get_text(self, url):
+        response = self.session.get(url)
+        response.raise_for_status()
+        return response.text
+
+    def resolve(self, url, height=None, audio_only=False):
+        """
+        Resolve a playlist URL to the media playlist that will be downloaded.
+
+        Args:
+            url (str): URL of a master or media playlist.
+            height (int or None, optional): The requested height for master playlists. Defaults to None.
+            audio_only (bool, optional): Resolve to the cheapest playlist carrying the audio track, see 'select_audio'. Defaults to False.
+
+        Returns:
+            dict: The parsed media playlist from 'parse_media_playlist', with "url" set to its URL,
+                  "variant" set to the selected master playlist variant and "rendition" set to the
+                  selected audio rendition (each None if not used), "audio" set to the parsed
+                  media playlist of the variant's separate audio rendition (None if its audio is
+                  muxed into the variant) and "master" set to the parsed master playlist (None if
+                  'url' is a media playlist).
+        """
+        text = self.get_text(url)
+        master = None
+        variant = None
+        rendition = None
+        audio = None
+
+        if is_master_playlist(text):
+            master = parse_master_playlist(text, url)
+            if audio_only:
+                rendition, variant = select_audio(master, height)
+            else:
+                variant = select_variant(master["variants"], height)
+                group_rendition = select_group_audio(master, variant)
+                if group_rendition is not None:
+                    audio = parse_media_playlist(self.get_text(group_rendition["url"]), group_rendition["url"])
+                    audio["url"] = group_rendition["url"]
+                    audio["variant"] = None
+                    audio["rendition"] = group_rendition
+                    audio["audio"] = None
+                    audio["master"] = None
+            url = (rendition or variant)["url"]
+            text = self.get_text(url)
+
+        playlist = parse_media_playlist(text, url)
+        playlist["url"] = url
+        playlist["variant"] = variant
+        playlist["rendition"] = rendition
+        playlist["audio"] = audio
+        playlist["master"] = master
+        return playlist
+
+    def fetch_segment(self, segment):
+        """
+        Fetch a segment.
+
+        Transient failures (connection errors, timeouts, truncated bodies, 429 and 5xx responses) are
+        retried by the session's RetryPolicy, so the segment is requested once here.
+
+        Args:
+            segment (dict): The segment from 'parse_media_playlist'.
+
+        Raises:
+            HLSError: If the response body is shorter than its Content-Length.
+
+        Returns:
+            bytes: The segment data.
+        """
+        headers = {}
+        if segment.get("byterange") is not None:
+            length, offset = segment["byterange"]
+            headers["Range"] = "bytes={}-{}".format(offset, offset + length - 1)
+
+        response = self.session.get(segment["url"], headers=headers)
+        response.raise_for_status()
+        content = response.content
+        expected = response.headers.get("Content-Length")
+        if expected is not None and expected.isdigit() and len(content) < int(expected):
+            raise HLSError(
+                "Truncated segment {}: {} of {} bytes".format(segment["url"], len(content), expected)
+            )
+        return content
+
+    def iter_segments(self, playlist, cancel=None):
+        """
+        Fetch the segments of a media playlist concurrently and yield their data in playlist order.
+
+        Args:
+            playlist (dict): The media playlist from 'resolve' or 'parse_media_playlist'.
+            cancel (threading.Event or None, optional): Stops the download once set: no further segment is requested, and HLSCancelled is raised. Defaults to None.
+
+        Raises:
+            HLSCancelled: If 'cancel' was set.
+
+        Yields:
+            bytes: The data of the initialization segment (if any) and of every segment, in order.
+        """
+        if playlist["encrypted"]:
+            raise HLSError(
+                "Encrypted HLS streams are not supported by the native engine, use the N_m3u8DL-RE backend"
+            )
+
+        segments = list(playlist["segments"])
+        if playlist.get("init") is not None:
+            segments.insert(0, playlist["init"])
+
+        window = self.workers * 2
+        bound_fetch_segment = bind_retries(self.fetch_segment)
+
+        def fetch_segment(segment):
+            # Segments queued before the download was cancelled are dropped without a request
+            if cancel is not None and cancel.is_set():
+                raise HLSCancelled("Download cancelled")
+            return bound_fetch_segment(segment)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = deque()
+            segment_iter = iter(segments)
+            try:
+                for segment in segment_iter:
+                    in_flight.append(executor.submit(fetch_segment, segment))
+                    if len(in_flight) >= window:
+                        break
+
+                while in_flight:
+                    if cancel is not None and cancel.is_set():
+                        raise HLSCancelled("Download cancelled")
+                    data = in_flight.popleft().result()
+                    next_segment = next(segment_iter, None)
+                    if next_segment is not None:
+                        in_flight.append(executor.submit(fetch_segment, next_segment))
+                    yield data
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    def download(self, url, out_path, height=None, progress=None, audio_only=False, cancel=None, playlist=None):
+        """
+        Download an HLS stream into a single file.
+
+        If the selected variant carries its audio as a separate rendition, the video and the audio are
+        downloaded side by side and joined into 'out_path' with 'join_audio'.
+
+        Args:
+            url (str): URL of a master or media playlist.
+            out_path (str): The file to write.
+            height (int or None, optional): The requested height for master playlists. Defaults to None.
+            progress (callable or None, optional): Called with the number of bytes written after every segment. Defaults to None.
+            audio_only (bool, optional): Download only the audio track, see 'resolve'. Defaults to False.
+            cancel (threading.Event or None, optional): Stops the download once set, see 'iter_segments'. Defaults to None.
+            playlist (dict or None, optional): The playlist already resolved from 'url' with 'resolve', so it is not fetched again. Defaults to None.
+
+        Raises:
+            HLSCancelled: If 'cancel' was set.
+
+        Returns:
+            dict: The resolved media playlist, with "bytes" set to the number of bytes written.
+        """
+        if playlist is None:
+            playlist = self.resolve(url, height, audio_only=audio_only)
+        if playlist["audio"] is None:
+            playlist["bytes"] = self.write_segments(playlist, out_path, progress, cancel)
+            return playlist
+
+        video_path = "{}.video".format(out_path)
+        audio_path = "{}.audio".format(out_path)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [
+                    executor.submit(self.write_segments, part, path, progress, cancel)
+                    for part, path in ((playlist, video_path), (playlist["audio"], audio_path))
+                ]
+                playlist["bytes"] = sum(future.result() for future in futures)
+            join_audio(video_path, audio_path, out_path)
+        finally:
+            for path in (video_path, audio_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return playlist
+
+    def write_segments(self, playlist, out_path, progress=None, cancel=None):
+        """
+        Write the segments of a media playlist into a file, in order.
+
+        Args:
+            playlist (dict): The media playlist from 'resolve' or 'parse_media_playlist'.
+            out_path (str): The file to write.
+            progress (callable or None, optional): Called with the number of bytes written after every segment. Defaults to None.
+            cancel (threading.Event or None, optional): Stops the download once set, see 'iter_segments'. Defaults to None.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        written = 0
+        with open(out_path, "wb", buffering=1024 * 1024) as out_file:
+            for data in self.iter_segments(playlist, cancel):
+                out_file.write(data)
+                written += len(data)
+                if progress is not None:
+                    progress(len(data))
+        return written
@@ -0,0 +1,230 @@
+import os, re, uuid, time
+from contextlib import contextmanager
+
+
+def season_folder_name(title, season):
+    """
+    Get the name of the folder the episodes of a season are stored in, e.g. "Title - S1".
+
+    Characters that are not allowed in file names on Windows are removed from the title.
+
+    Args:
+        title (str): The title of the series.
+        season (int or str): The season number.
+
+    Returns:
+        str: The folder name.
+    """
+    title = re.sub(r"\s+", " ", re.sub(r'[<>:"/\\|?*]', "", title)).strip()
+    return "{} - S{}".format(title, season)
+
+
+def requested_episode_numbers(episode, episode_count=None):
+    """
+    Get the episode numbers of a requested episode range, like ZORO.requested_episode_numbers.
+
+    Args:
+        episode (str or None): The requested episodes, e.g. "1-5" or "10", or None for the whole season.
+        episode_count (int or None, optional): Number of episodes of the season, needed if 'episode' is None. Defaults to None.
+
+    Returns:
+        list: The episode numbers, in order.
+    """
+    if episode is None:
+        return list(range(1, int(episode_count or 0) + 1))
+    episode = str(episode)
+    if "-" in episode:
+        start, end = map(int, episode.split("-"))
+        return list(range(start, end + 1))
+    return [int(episode)]
+
+
+class EpisodeJob:
+    """
+    The state of a single episode as it moves through resolving, downloading, muxing and cleanup.
+
+    Every episode gets its own job carrying its sources, subtitles, temp file names and timings, so a
+    ZORO instance holds no per-episode state and several episodes can be processed at once (in threads,
+    or in other processes since jobs can be pickled) without clobbering each other's data or files.
+
+    Attributes:
+        episode_number (int): The episode number within the season.
+        episode_id (str): The ZORO episode id.
+        mal_id (str): The MyAnimeList id of the series.
+        title (str): The title of the series.
+        episode_title (str): The title of the episode.
+        season (int): The season number used for the filename.
+        name (str): The display name of the episode, e.g. "Title S01E05 - Episode Title".
+        sources (list): Video source dictionaries with "url" and "subOrdub" keys.
+        subtitles (list): Subtitle dictionaries with "lang", "lang_639_2" and "url" keys.
+        end_code (str): Unique code appended to every temp file name of this episode.
+        timings (dict): Seconds spent in each stage, keyed by stage name.
+        transferred (dict): Bytes transferred or written in each stage, keyed by stage name.
+        retries (dict): Number of retried requests in each stage, keyed by stage name.
+        errors (list): Error messages of the stages that failed, e.g. "video: ...".
+        started_at (float): Time at which the job was created.
+        key (str or None): The job journal key of the episode, if the job is journaled.
+        height (int or None): Height of the primary video source as read from its manifest, or None if unknown.
+        temp_dir (str): Directory the temp files of the episode are written to.
+        playlists (dict): The resolved media playlist of every video source, keyed by "subOrdub", see 'ZORO.resolve_source'.
+    """
+
+    __slots__ = (
+        "episode_number",
+        "episode_id",
+        "mal_id",
+        "title",
+        "episode_title",
+        "season",
+        "name",
+        "sources",
+        "subtitles",
+        "end_code",
+        "timings",
+        "transferred",
+        "retries",
+        "errors",
+        "started_at",
+        "key",
+        "height",
+        "temp_dir",
+        "playlists",
+    )
+
+    def __init__(
+        self,
+        episode_number,
+        episode_id,
+        mal_id,
+        title,
+        episode_title,
+        season,
+        name,
+        end_code=None,
+        key=None,
+        temp_dir="",
+    ):
+        self.episode_number = episode_number
+        self.episode_id = episode_id
+        self.mal_id = mal_id
+        self.title = title
+        self.episode_title = episode_title
+        self.season = season
+        self.name = name
+        self.sources = []
+        self.subtitles = []
+        self.end_code = end_code or str(uuid.uuid4())
+        self.timings = {}
+        self.transferred = {}
+        self.retries = {}
+        self.errors = []
+        self.started_at = time.time()
+        self.key = key
+        self.height = None
+        self.temp_dir = temp_dir
+        self.playlists = {}
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    def __repr__(self):
+        return "EpisodeJob(episode_number={!r}, name={!r})".format(
+            self.episode_number, self.name
+        )
+
+    @property
+    def lang_file_name_data(self):
+        if len(self.sources) > 1:
+            return "JPN-ENG"
+        return "JPN" if self.sources[0]["subOrdub"] == "sub" else "ENG"
+
+    @property
+    def subs_file_name_data(self):
+        if len(self.subtitles) > 1:
+            return "MULTI-SUBS"
+        return "ENG-SUBS" if len(self.subtitles) == 1 else "NO-SUBS"
+
+    @property
+    def out_folder_structure(self):
+        return season_folder_name(self.title, self.season)
+
+    def video_save_name(self, source):
+        """
+        Get the temp file name (without extension) a video source is downloaded to.
+
+        Args:
+            source (dict): One of the job's video sources.
+
+        Returns:
+            str: The temp file name without extension.
+        """
+        return "{}_{}_{}".format(self.mal_id, source["subOrdub"], self.end_code)
+
+    def video_path(self, source):
+        """
+        Get the temp file path a video source is downloaded to.
+
+        Args:
+            source (dict): One of the job's video sources.
+
+        Returns:
+            str: The temp video file path.
+        """
+        return os.path.join(self.temp_dir, "{}.mp4".format(self.video_save_name(source)))
+
+    def subtitle_path(self, index):
+        """
+        Get the temp file name a subtitle track is downloaded to.
+
+        The track index is part of the name, since a show can carry several tracks
+        with the same language code.
+
+        Args:
+            index (int): Index of the subtitle in the job's subtitles.
+
+        Returns:
+            str: The temp subtitle file path.
+        """
+        return os.path.join(
+            self.temp_dir,
+            "subtitle_{}_{}_{}.vtt".format(index, self.subtitles[index]["lang_639_2"], self.end_code),
+        )
+
+    def temp_paths(self):
+        """
+        Get every temp file name this job can create.
+
+        Returns:
+            list: The temp video, subtitle and muxed file names.
+        """
+        paths = [self.video_path(source) for source in self.sources]
+        paths.extend(self.subtitle_path(index) for index in range(len(self.subtitles)))
+        paths.append(self.mux_temp_path())
+        return paths
+
+    def mux_temp_path(self):
+        """
+        Get the temp file path the episode is muxed to before it is moved to the output folder.
+
+        Returns:
+            str: The temp muxed file path.
+        """
+        return os.path.join(self.temp_dir, "{}.mkv".format(self.end_code))
+
+    @contextmanager
+    def timed(self, stage):
+        """
+        Context manager adding the time spent in the block to the timing of the given stage.
+
+        Args:
+            stage (str): The stage name, e.g. "video".
+        """
+        stage_start = time.time()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0) + time.time() - stage_start
@@ -0,0 +1,170 @@
+import os, json, threading, time
+
+
+class JobJournal:
+    """
+    A persistent JSON-lines journal of per-episode download progress.
+
+    Every change to an episode (its temp file code, a finished stage, its final file) is appended to the
+    journal file as one JSON line, and the journal is replayed on load. After a crash or restart this lets
+    ZORO skip finished episodes, reuse the temp file names of interrupted ones and resume their partial
+    artifacts instead of downloading them again.
+
+    The journal is append-only while it is in use. When it is loaded with superseded records, or grows past
+    'compact_size' (and twice its last compacted size), it is rewritten with a single record per episode, so a
+    long-running process does not replay an ever-growing history.
+
+    Attributes:
+        path (str): Path of the journal file.
+        compact_size (int): Size in bytes the journal file grows to before it is compacted.
+    """
+
+    # File name of the journal ZORO keeps in its output folder, next to the output index
+    FILE_NAME = ".zoro-dl-journal.jsonl"
+
+    # Size the journal file may grow to before it is compacted
+    COMPACT_SIZE = 1024 * 1024
+
+    def __init__(self, path, compact_size=COMPACT_SIZE):
+        """
+        Initialize the JobJournal and replay the existing journal file, if any.
+
+        Args:
+            path (str): Path of the journal file. It is created on the first write.
+            compact_size (int, optional): Size in bytes the journal file grows to before it is compacted. Defaults to 1 MB.
+        """
+        self.path = path
+        self.compact_size = compact_size
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._torn_tail = False
+        self._size = 0
+        self._compacted_size = 0
+        self._load()
+
+    @staticmethod
+    def episode_key(zoro_id, season, episode_number, dl_type, resolution):
+        """
+        Build the journal key of an episode.
+
+        Args:
+            zoro_id (str): The Zoro ID of the series.
+            season (str or int): The season number.
+            episode_number (int): The episode number.
+            dl_type (str): The download type ("sub", "dub" or "both").
+            resolution (str): The requested resolution height, e.g. "1080".
+
+        Returns:
+            str: The journal key.
+        """
+        return "{}|S{}|E{}|{}|{}".format(
+            zoro_id, int(season), int(episode_number), dl_type, resolution
+        )
+
+    def _read(self):
+        entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as journal_file:
+                lines = journal_file.read().split("\n")
+        except FileNotFoundError:
+            return entries, 0, False
+
+        records = 0
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-write carries nothing we can use
+                continue
+            if isinstance(record, dict) and "key" in record:
+                self._apply(entries, record)
+                records += 1
+
+        return entries, records, lines[-1] != ""
+
+    def _load(self):
+        self._entries, records, self._torn_tail = self._read()
+        if records > len(self._entries) or self._torn_tail:
+            self._compact()
+        elif os.path.exists(self.path):
+            self._size = self._compacted_size = os.path.getsize(self.path)
+
+    def _compact(self):
+        temp_path = "{}.tmp".format(self.path)
+        with open(temp_path, "w", encoding="utf-8") as journal_file:
+            for key, entry in self._entries.items():
+                journal_file.write(json.dumps({"key": key, **entry}) + "\n")
+        os.replace(temp_path, self.path)
+        self._torn_tail = False
+        self._size = self._compacted_size = os.path.getsize(self.path)
+
+    @staticmethod
+    def _apply(entries, record):
+        entry = entries.setdefault(record["key"], {"stages": []})
+        for stage in record.get("stages", []):
+            if stage not in entry["stages"]:
+                entry["stages"].append(stage)
+        for field, value in record.items():
+            if field not in ("key", "stages"):
+                entry[field] = value
+
+    def _append(self, record):
+        record["at"] = time.time()
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._apply(self._entries, record)
+            with open(self.path, "a", encoding="utf-8") as journal_file:
+                if self._torn_tail:
+                    journal_file.write("\n")
+                    self._torn_tail = False
+                journal_file.write(line)
+            self._size += len(line.encode("utf-8"))
+
+            if self._size >= max(self.compact_size, 2 * self._compacted_size):
+                # Replayed from the file, so records appended by another process sharing it are kept
+                self._entries = self._read()[0]
+                self._compact()
+
+    def get(self, key):
+        """
+        Get the replayed entry of an episode.
+
+        Args:
+            key (str): The journal key of the episode.
+
+        Returns:
+            dict: The entry with its "stages" and any recorded fields, or an empty dict if the episode is unknown.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return {**entry, "stages": list(entry["stages"])} if entry else {}
+
+    def get_end_code(self, key):
+        return self.get(key).get("end_code")
+
+    def set_end_code(self, key, end_code):
+        self._append({"key": key, "end_code": end_code})
+
+    def is_stage_done(self, key, stage):
+        return stage in self.get(key).get("stages", [])
+
+    def mark_stage(self, key, stage):
+        self._append({"key": key, "stages": [stage]})
+
+    def completed_path(self, key):
+        """
+        Get the final file of a completed episode, if it still exists.
+
+        Args:
+            key (str): The journal key of the episode.
+
+        Returns:
+            str or None: The final file path, or None if the episode is not completed or its file is gone.
+        """
+        final_path = self.get(key).get("final_path")
+        if final_path and os.path.exists(final_path):
+            return final_path
+        return None
+
+    def mark_completed(self, key, final_path):
+        self._append({"key": key, "stages": ["done"], "final_path": final_path})
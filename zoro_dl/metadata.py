@@ -0,0 +1,155 @@
+import os, json, time, sqlite3, threading
+
+
+def default_cache_dir():
+    """
+    Get the per-user cache directory of zoro-dl, following XDG_CACHE_HOME where it is set.
+
+    Returns:
+        str: The cache directory, e.g. "~/.cache/zoro-dl".
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "zoro-dl")
+
+
+DEFAULT_CACHE_DIR = default_cache_dir()
+
+
+class MetadataStore:
+    """
+    A local SQLite store for series metadata (the Consumet `/info` response, with the MAL ID, title and
+    episode list of a series), keyed by Zoro ID.
+
+    Every entry keeps the validators of the response it came from (ETag and Last-Modified), when it was
+    fetched and when it was last confirmed to be current, so callers can apply a TTL and refresh entries
+    with conditional requests. The database uses write-ahead logging, so several processes on the same
+    host can share it.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+    """
+
+    FILE_NAME = "metadata.sqlite3"
+
+    def __init__(self, path):
+        """
+        Initialize the MetadataStore, creating the database if needed.
+
+        Args:
+            path (str): Path of the SQLite database.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS series (
+                    zoro_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    episode_count INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    checked_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, zoro_id):
+        """
+        Get the stored metadata of a series.
+
+        Args:
+            zoro_id (str): The Zoro ID of the series.
+
+        Returns:
+            dict or None: "data" (the `/info` response), "episode_count", "etag", "last_modified",
+                          "fetched_at" and "checked_at", or None if the series is not stored.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data, episode_count, etag, last_modified, fetched_at, checked_at "
+                "FROM series WHERE zoro_id = ?",
+                (zoro_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "data": json.loads(row[0]),
+            "episode_count": row[1],
+            "etag": row[2],
+            "last_modified": row[3],
+            "fetched_at": row[4],
+            "checked_at": row[5],
+        }
+
+    def put(self, zoro_id, data, etag=None, last_modified=None):
+        """
+        Store the metadata of a series, replacing any previous entry.
+
+        Args:
+            zoro_id (str): The Zoro ID of the series.
+            data (dict): The `/info` response.
+            etag (str or None, optional): The ETag of the response. Defaults to None.
+            last_modified (str or None, optional): The Last-Modified header of the response. Defaults to None.
+
+        Returns:
+            None
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO series "
+                "(zoro_id, data, episode_count, etag, last_modified, fetched_at, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    zoro_id,
+                    json.dumps(data),
+                    len(data.get("episodes", [])),
+                    etag,
+                    last_modified,
+                    now,
+                    now,
+                ),
+            )
+
+    def touch(self, zoro_id):
+        """
+        Record that the stored metadata of a series was confirmed to be current.
+
+        Args:
+            zoro_id (str): The Zoro ID of the series.
+
+        Returns:
+            None
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE series SET checked_at = ? WHERE zoro_id = ?", (time.time(), zoro_id)
+            )
+
+    def delete(self, zoro_id=None):
+        """
+        Delete the stored metadata of a series, or of every series.
+
+        Args:
+            zoro_id (str or None, optional): The Zoro ID of the series. Defaults to None, which clears the store.
+
+        Returns:
+            None
+        """
+        with self._lock, self._connection:
+            if zoro_id is None:
+                self._connection.execute("DELETE FROM series")
+            else:
+                self._connection.execute("DELETE FROM series WHERE zoro_id = ?", (zoro_id,))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,263 @@
+import json, time, threading
+from contextlib import contextmanager
+from .utils import colored_text
+
+
+def _mb_per_s(byte_count, duration):
+    if not byte_count or not duration:
+        return 0.0
+    return byte_count / duration / (1024 * 1024)
+
+
+def episode_report(job, final_path=None):
+    """
+    Build the metrics report of a processed episode.
+
+    Args:
+        job (EpisodeJob): The processed episode.
+        final_path (str or None, optional): The muxed file, or None if the episode did not complete. Defaults to None.
+
+    Returns:
+        dict: The report with the episode details, the total time and duration, bytes, MB/s and retries of every stage.
+    """
+    stages = {}
+    for stage in sorted(set(job.timings) | set(job.transferred) | set(job.retries)):
+        duration = job.timings.get(stage, 0.0)
+        byte_count = job.transferred.get(stage, 0)
+        stages[stage] = {
+            "duration": round(duration, 3),
+            "bytes": byte_count,
+            "mb_per_s": round(_mb_per_s(byte_count, duration), 3),
+            "retries": job.retries.get(stage, 0),
+        }
+
+    return {
+        "episode": job.episode_number,
+        "name": job.name,
+        "key": job.key,
+        "ok": final_path is not None,
+        "final_path": final_path,
+        "errors": list(job.errors),
+        "total": round(time.time() - job.started_at, 3),
+        "stages": stages,
+    }
+
+
+class MetricsRecorder:
+    """
+    Collects per-stage metrics of episode jobs and emits them as a stream of events to pluggable hooks.
+
+    A hook is any callable taking one event dictionary. Three kinds of events are emitted:
+    "stage" when a stage of an episode finishes, "episode" with the full episode report when an episode
+    leaves the pipeline, and "run" with the aggregated metrics when a run ends. Hooks can forward the
+    events to any metrics backend; JsonLinesMetricsHook writes them to a file.
+
+    Attributes:
+        hooks (list): The callables events are emitted to.
+    """
+
+    def __init__(self, hooks=None):
+        """
+        Initialize the MetricsRecorder.
+
+        Args:
+            hooks (list or None, optional): Callables receiving every event. Defaults to None.
+        """
+        self.hooks = list(hooks or [])
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Start a new run, clearing the aggregated metrics.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._run_started = time.time()
+            self._stages = {}
+            self._episodes = 0
+            self._completed = 0
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def emit(self, event):
+        """
+        Send an event to every hook. A failing hook is reported but never breaks the download.
+
+        Args:
+            event (dict): The event.
+
+        Returns:
+            None
+        """
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                print(colored_text("[+] ERROR - Metrics Hook - {}".format(e), "red"))
+
+    @contextmanager
+    def stage(self, job, stage):
+        """
+        Context manager timing a stage of a job and emitting a "stage" event when it ends.
+
+        Bytes and retries recorded on the job for the stage inside the block are included in the event.
+
+        Args:
+            job (EpisodeJob): The episode.
+            stage (str): The stage name, e.g. "video".
+        """
+        stage_start = time.time()
+        try:
+            with job.timed(stage):
+                yield
+        finally:
+            self.record_stage(job, stage, time.time() - stage_start, timed=False)
+
+    def record_stage(self, job, stage, duration, timed=True):
+        """
+        Record a stage that was timed by the caller and emit its "stage" event.
+
+        Args:
+            job (EpisodeJob): The episode.
+            stage (str): The stage name.
+            duration (float): Seconds spent in the stage.
+            timed (bool, optional): Whether the duration still has to be added to the job's timings. Defaults to True.
+
+        Returns:
+            None
+        """
+        if timed:
+            job.timings[stage] = job.timings.get(stage, 0) + duration
+
+        byte_count = job.transferred.get(stage, 0)
+        retries = job.retries.get(stage, 0)
+
+        with self._lock:
+            totals = self._stages.setdefault(
+                stage, {"count": 0, "duration": 0.0, "bytes": 0, "retries": 0}
+            )
+            totals["count"] += 1
+            totals["duration"] += duration
+            totals["bytes"] += byte_count
+            totals["retries"] += retries
+
+        self.emit(
+            {
+                "event": "stage",
+                "time": time.time(),
+                "episode": job.episode_number,
+                "key": job.key,
+                "stage": stage,
+                "duration": round(duration, 3),
+                "bytes": byte_count,
+                "mb_per_s": round(_mb_per_s(byte_count, duration), 3),
+                "retries": retries,
+            }
+        )
+
+    def episode_finished(self, job, final_path=None):
+        """
+        Emit the "episode" event with the report of an episode leaving the pipeline.
+
+        Args:
+            job (EpisodeJob): The episode.
+            final_path (str or None, optional): The muxed file, or None if the episode did not complete. Defaults to None.
+
+        Returns:
+            dict: The episode report.
+        """
+        report = episode_report(job, final_path)
+        with self._lock:
+            self._episodes += 1
+            if report["ok"]:
+                self._completed += 1
+
+        self.emit({"event": "episode", "time": time.time(), **report})
+        return report
+
+    def resolve_failed(self, episode_number, error):
+        """
+        Emit the "episode" event of an episode whose streams could not be resolved, which leaves the
+        pipeline without a job, so the run report counts it as an episode that did not complete.
+
+        Args:
+            episode_number (int): The episode number.
+            error (Exception or str): Why its streams could not be resolved.
+
+        Returns:
+            dict: The episode report.
+        """
+        report = {
+            "episode": episode_number,
+            "name": None,
+            "key": None,
+            "ok": False,
+            "final_path": None,
+            "errors": ["resolve: {}".format(error)],
+            "total": 0.0,
+            "stages": {},
+        }
+        with self._lock:
+            self._episodes += 1
+
+        self.emit({"event": "episode", "time": time.time(), **report})
+        return report
+
+    def run_report(self):
+        """
+        Build the aggregated metrics of the current run.
+
+        Returns:
+            dict: The number of episodes, the wall time and the totals of every stage.
+        """
+        with self._lock:
+            wall_time = time.time() - self._run_started
+            stages = {
+                stage: {
+                    "count": totals["count"],
+                    "duration": round(totals["duration"], 3),
+                    "bytes": totals["bytes"],
+                    "mb_per_s": round(_mb_per_s(totals["bytes"], totals["duration"]), 3),
+                    "retries": totals["retries"],
+                }
+                for stage, totals in self._stages.items()
+            }
+            return {
+                "episodes": self._episodes,
+                "completed": self._completed,
+                "wall_time": round(wall_time, 3),
+                "stages": stages,
+            }
+
+    def run_finished(self):
+        """
+        Emit the "run" event with the aggregated metrics of the current run.
+
+        Returns:
+            dict: The run report.
+        """
+        report = self.run_report()
+        self.emit({"event": "run", "time": time.time(), **report})
+        return report
+
+
+class JsonLinesMetricsHook:
+    """
+    A metrics hook appending every event to a file as one JSON line.
+
+    Attributes:
+        path (str): Path of the JSON-lines file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as report_file:
+                report_file.write(json.dumps(event) + "\n")
@@ -0,0 +1,115 @@
+import os, errno, shutil, queue, threading
+from .utils import colored_text
+
+
+def same_filesystem(path_a, path_b):
+    """
+    Check whether two existing paths are on the same filesystem, so a file can be renamed between them atomically.
+
+    Args:
+        path_a (str): The first path.
+        path_b (str): The second path.
+
+    Returns:
+        bool: True if both paths are on the same device.
+    """
+    return os.stat(path_a).st_dev == os.stat(path_b).st_dev
+
+
+def move_file(src, dst):
+    """
+    Move a file so that 'dst' only ever appears complete.
+
+    Within a filesystem this is a single atomic rename. Across filesystems the file is copied next to
+    'dst' under a temporary name, renamed over 'dst' once the copy is complete, and only then removed
+    from 'src'.
+
+    Args:
+        src (str): The file to move.
+        dst (str): The destination path.
+
+    Returns:
+        None
+    """
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as e:
+        # Windows reports ERROR_NOT_SAME_DEVICE (17) instead of EXDEV
+        if e.errno != errno.EXDEV and getattr(e, "winerror", None) != 17:
+            raise
+
+    partial_path = "{}.{}.part".format(dst, os.getpid())
+    try:
+        shutil.copyfile(src, partial_path)
+        os.replace(partial_path, dst)
+    except BaseException:
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+        raise
+    os.remove(src)
+
+
+class BackgroundMover:
+    """
+    Moves finished files to slow storage on a background thread, so the pipeline does not wait for the copy.
+
+    Moves run one at a time, in the order they were queued, which keeps a slow destination disk streaming
+    sequentially. Each move can have a callback run once the file is in place, e.g. to record it as completed.
+
+    Attributes:
+        pending (int): Number of moves queued or running.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.pending = 0
+
+    def move(self, src, dst, on_done=None):
+        """
+        Queue a file to be moved with 'move_file'.
+
+        Args:
+            src (str): The file to move.
+            dst (str): The destination path.
+            on_done (callable or None, optional): Called without arguments once the file is in place. Defaults to None.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put((src, dst, on_done))
+
+    def _run(self):
+        while True:
+            src, dst, on_done = self._queue.get()
+            try:
+                move_file(src, dst)
+                if on_done is not None:
+                    on_done()
+            except Exception as e:
+                print(colored_text("[+] ERROR - Moving {} - {}".format(src, e), "red"))
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                    self._idle.notify_all()
+
+    def join(self):
+        """
+        Wait until every queued move is done.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            while self.pending:
+                self._idle.wait()
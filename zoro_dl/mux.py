@@ -0,0 +1,280 @@
+import os, abc, json, subprocess
+from xml.sax.saxutils import escape
+
+# Muxing with stream copy is bound by disk throughput more than by CPU, so past a few muxes at
+# once extra processes only compete for the same disk
+DEFAULT_MUX_IO_LIMIT = 4
+
+AUDIO_LANGUAGES = {"sub": "jpn", "dub": "eng"}
+
+
+def default_mux_processes(cpu_count=None, io_limit=DEFAULT_MUX_IO_LIMIT):
+    """
+    Get the default number of mux processes run at once: one per CPU core, up to 'io_limit'.
+
+    Args:
+        cpu_count (int or None, optional): Number of CPU cores. Defaults to None, which uses os.cpu_count().
+        io_limit (int, optional): Maximum number of mux processes, however many cores there are. Defaults to DEFAULT_MUX_IO_LIMIT.
+
+    Returns:
+        int: The number of mux processes.
+    """
+    return max(1, min(cpu_count or os.cpu_count() or 1, io_limit))
+
+
+class MuxPlan:
+    """
+    The tracks of an episode's MKV file and their metadata, independent of the muxer writing it.
+
+    Attributes:
+        videos (list): Inputs of the video sources. The video track is taken from the first one, and the first audio track from every one.
+        audio_languages (list): ISO 639-2 language of the audio track of every video source.
+        subtitles (list): (input, ISO 639-2 language, title) of every subtitle track.
+        video_title (str): Title of the video track.
+        audio_title (str): Title of every audio track.
+        encoded_by (str): The "encoded_by" tag of the file.
+        output (str): The MKV file to write.
+    """
+
+    __slots__ = ("videos", "audio_languages", "subtitles", "video_title", "audio_title", "encoded_by", "output")
+
+    def __init__(self, videos, audio_languages, subtitles, video_title, audio_title, encoded_by, output):
+        self.videos = list(videos)
+        self.audio_languages = list(audio_languages)
+        self.subtitles = list(subtitles)
+        self.video_title = video_title
+        self.audio_title = audio_title
+        self.encoded_by = encoded_by
+        self.output = output
+
+
+def build_mux_plan(job, group_tag, video_inputs=None):
+    """
+    Build the MuxPlan of a job: its video sources, their audio languages and its subtitle tracks.
+
+    Args:
+        job (EpisodeJob): The episode to mux.
+        group_tag (str): The group tag used for the "encoded_by" tag and the track titles.
+        video_inputs (list or None, optional): Inputs to read the video sources from, in the order of the job's sources. Defaults to the job's temp video files.
+
+    Returns:
+        MuxPlan: The plan.
+    """
+    if video_inputs is None:
+        video_inputs = [job.video_path(source) for source in job.sources]
+
+    return MuxPlan(
+        videos=video_inputs,
+        audio_languages=[AUDIO_LANGUAGES.get(source["subOrdub"], "") for source in job.sources],
+        subtitles=[
+            (job.subtitle_path(index), subtitle["lang_639_2"], subtitle["lang"])
+            for index, subtitle in enumerate(job.subtitles)
+        ],
+        video_title="{} - Sourced from ZORO".format(group_tag),
+        audio_title=group_tag,
+        encoded_by=group_tag,
+        output=job.mux_temp_path(),
+    )
+
+
+class Muxer(abc.ABC):
+    """
+    A mux backend, turning a MuxPlan into the command of its muxer.
+
+    Every backend writes the tracks in the same order (the video, the audio of every video source, then
+    the subtitles) with the same languages and titles, and marks the first track of every type as the
+    default track and every other track as not default.
+
+    Attributes:
+        name (str): The name of the backend.
+        success_codes (tuple): Exit codes of a successful mux.
+        supports_pipes (bool): Whether the muxer can read its video inputs from named pipes (see 'stream_mux').
+    """
+
+    name = None
+    success_codes = (0,)
+    supports_pipes = False
+
+    @abc.abstractmethod
+    def command(self, plan):
+        """
+        Build the command muxing a plan.
+
+        Args:
+            plan (MuxPlan): The plan.
+
+        Returns:
+            list: The command arguments.
+        """
+
+    def cleanup(self, output):
+        """
+        Remove the side files 'command' wrote for a mux into 'output'.
+
+        Args:
+            output (str): The MKV file of the mux.
+
+        Returns:
+            None
+        """
+
+    def check(self, returncode, cmd):
+        """
+        Raise if a mux process did not exit with one of the 'success_codes'.
+
+        Raises:
+            subprocess.CalledProcessError: If the mux failed.
+        """
+        if returncode not in self.success_codes:
+            raise subprocess.CalledProcessError(returncode, cmd)
+
+
+class FFmpegMuxer(Muxer):
+    """
+    Muxes with FFmpeg, copying every stream.
+    """
+
+    name = "ffmpeg"
+    supports_pipes = True
+
+    def command(self, plan):
+        cmd = ["ffmpeg", "-y"]
+
+        for video in plan.videos:
+            cmd.extend(["-i", video])
+        for subtitle, _, _ in plan.subtitles:
+            cmd.extend(["-i", subtitle])
+
+        # The video of the first source, and the audio of every source
+        cmd.extend(["-map", "0:v:0"])
+        for index in range(len(plan.videos)):
+            cmd.extend(["-map", "{}:a:0".format(index)])
+        for index in range(len(plan.subtitles)):
+            cmd.extend(["-map", "{}:s:0".format(len(plan.videos) + index)])
+
+        for index, (_, language, _) in enumerate(plan.subtitles):
+            cmd.extend(["-metadata:s:s:{}".format(index), "language={}".format(language)])
+        for index, language in enumerate(plan.audio_languages):
+            cmd.extend(["-metadata:s:a:{}".format(index), "language={}".format(language)])
+
+        cmd.extend(["-metadata", "encoded_by={}".format(plan.encoded_by)])
+        cmd.extend(["-metadata:s:a", "title={}".format(plan.audio_title)])
+        cmd.extend(["-metadata:s:v", "title={}".format(plan.video_title)])
+
+        for index, (_, _, title) in enumerate(plan.subtitles):
+            cmd.extend(["-metadata:s:s:{}".format(index), "title={}".format(title)])
+
+        cmd.extend(["-disposition:v:0", "default"])
+        for index in range(len(plan.videos)):
+            cmd.extend(["-disposition:a:{}".format(index), "default" if index == 0 else "0"])
+        for index in range(len(plan.subtitles)):
+            cmd.extend(["-disposition:s:{}".format(index), "default" if index == 0 else "0"])
+
+        cmd.extend(["-c", "copy", plan.output])
+        return cmd
+
+
+class MkvMergeMuxer(Muxer):
+    """
+    Muxes with mkvmerge (MKVToolNix), with the same tracks and metadata as FFmpegMuxer.
+
+    The track ids of every video source are read with "mkvmerge -J" first, and the tracks are put in
+    FFmpegMuxer's order with "--track-order" whatever their ids. The "encoded_by" tag is written as a
+    global tags file next to the output. mkvmerge exits with 1 when it only had warnings.
+    """
+
+    name = "mkvmerge"
+    success_codes = (0, 1)
+
+    def identify(self, path):
+        """
+        Get the ids of the first video and the first audio track of a file.
+
+        Args:
+            path (str): The file.
+
+        Returns:
+            tuple: The (video, audio) track ids, None for a missing track type.
+        """
+        output = subprocess.check_output(["mkvmerge", "-J", path])
+        tracks = json.loads(output.decode("utf-8")).get("tracks", [])
+
+        def first(track_type):
+            return next((track["id"] for track in tracks if track["type"] == track_type), None)
+
+        return first("video"), first("audio")
+
+    def command(self, plan):
+        cmd = ["mkvmerge", "-o", plan.output]
+        track_order = []
+
+        for index, (video, language) in enumerate(zip(plan.videos, plan.audio_languages)):
+            video_id, audio_id = self.identify(video)
+            if index == 0 and video_id is not None:
+                cmd.extend(["--video-tracks", str(video_id)])
+                cmd.extend(["--track-name", "{}:{}".format(video_id, plan.video_title)])
+                cmd.extend(["--default-track", "{}:yes".format(video_id)])
+                track_order.insert(0, "0:{}".format(video_id))
+            else:
+                cmd.append("--no-video")
+            if audio_id is not None:
+                cmd.extend(["--audio-tracks", str(audio_id)])
+                cmd.extend(["--track-name", "{}:{}".format(audio_id, plan.audio_title)])
+                if language:
+                    cmd.extend(["--language", "{}:{}".format(audio_id, language)])
+                cmd.extend(["--default-track", "{}:{}".format(audio_id, "yes" if index == 0 else "no")])
+                track_order.append("{}:{}".format(index, audio_id))
+            else:
+                cmd.append("--no-audio")
+            cmd.extend(["--no-subtitles", "--no-chapters", "--no-global-tags", video])
+
+        for index, (subtitle, language, title) in enumerate(plan.subtitles):
+            if language:
+                cmd.extend(["--language", "0:{}".format(language)])
+            cmd.extend(["--track-name", "0:{}".format(title)])
+            cmd.extend(["--default-track", "0:{}".format("yes" if index == 0 else "no")])
+            cmd.append(subtitle)
+            track_order.append("{}:0".format(len(plan.videos) + index))
+
+        cmd.extend(["--track-order", ",".join(track_order)])
+
+        tags_path = self.tags_path(plan.output)
+        with open(tags_path, "w", encoding="utf-8") as tags_file:
+            tags_file.write(
+                '<?xml version="1.0"?>\n<Tags><Tag><Targets/><Simple><Name>ENCODED_BY</Name>'
+                "<String>{}</String></Simple></Tag></Tags>\n".format(escape(plan.encoded_by))
+            )
+        cmd.extend(["--global-tags", tags_path])
+        return cmd
+
+    def cleanup(self, output):
+        try:
+            os.remove(self.tags_path(output))
+        except OSError:
+            pass
+
+    @staticmethod
+    def tags_path(output):
+        return "{}.tags.xml".format(output)
+
+
+MUXERS = {muxer.name: muxer for muxer in (FFmpegMuxer, MkvMergeMuxer)}
+
+
+def get_muxer(name):
+    """
+    Get the mux backend of a name.
+
+    Args:
+        name (str): "ffmpeg" or "mkvmerge".
+
+    Raises:
+        ValueError: If there is no backend of that name.
+
+    Returns:
+        Muxer: The backend.
+    """
+    try:
+        return MUXERS[name]()
+    except KeyError:
+        raise ValueError("Unknown mux_backend: {}".format(name))
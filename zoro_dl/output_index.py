@@ -0,0 +1,125 @@
+import os, json, threading
+
+
+class OutputIndex:
+    """
+    An index of the finished episode files in an output directory.
+
+    The output directory is listed once at startup, and an episode is found by matching the names of the
+    MKV files in it against the pattern of its final file name (see 'find'), so episodes muxed by earlier
+    versions or into a folder without an index file are found too. The small JSON file kept inside the
+    output directory only speeds this up: it maps episode keys (Zoro ID, season, episode, dl_type and
+    resolution) to the name of the muxed file, and is checked against the same listing. Either way,
+    finding out whether an episode is already downloaded costs no network call or filesystem access.
+
+    Attributes:
+        directory (str): The output directory the index describes.
+        path (str): Path of the index file.
+    """
+
+    FILE_NAME = ".zoro-dl-index.json"
+
+    def __init__(self, directory="."):
+        """
+        Initialize the OutputIndex and scan the output directory.
+
+        Args:
+            directory (str, optional): The output directory. Defaults to the current working directory.
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self._entries = {}
+        self._files = []
+        self._lock = threading.Lock()
+        self.scan()
+
+    def scan(self):
+        """
+        List the output directory, reload the index file and drop every entry whose file is no longer in the output directory.
+
+        Returns:
+            None
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as index_file:
+                entries = json.load(index_file)
+        except (OSError, ValueError):
+            entries = {}
+
+        try:
+            existing_files = set(os.listdir(self.directory))
+        except FileNotFoundError:
+            existing_files = set()
+
+        with self._lock:
+            self._files = sorted(file_name for file_name in existing_files if file_name.endswith(".mkv"))
+            self._entries = {
+                key: file_name
+                for key, file_name in entries.items()
+                if file_name in existing_files
+            }
+
+    def get(self, key):
+        """
+        Get the file of an already downloaded episode.
+
+        Args:
+            key (str): The episode key.
+
+        Returns:
+            str or None: Path of the episode's file, or None if the episode is not in the index.
+        """
+        with self._lock:
+            file_name = self._entries.get(key)
+        if file_name is None:
+            return None
+        return os.path.join(self.directory, file_name)
+
+    def find(self, key, pattern):
+        """
+        Get the file of an already downloaded episode, looking for it in the output directory listing if the index file does not know it.
+
+        Args:
+            key (str): The episode key.
+            pattern (re.Pattern): Pattern the whole file name of the episode matches, e.g. from 'ZORO.output_file_pattern'.
+
+        Returns:
+            str or None: Path of the episode's file, or None if the episode is neither in the index nor in the output directory.
+        """
+        file_path = self.get(key)
+        if file_path is not None:
+            return file_path
+
+        with self._lock:
+            for file_name in self._files:
+                if pattern.fullmatch(file_name):
+                    self._entries[key] = file_name
+                    return os.path.join(self.directory, file_name)
+        return None
+
+    def add(self, key, file_path):
+        """
+        Record a finished episode file and save the index.
+
+        Args:
+            key (str): The episode key.
+            file_path (str): Path of the finished file inside the output directory.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._entries[key] = os.path.basename(file_path)
+
+            # Merge with the file on disk so entries added by other processes are kept
+            try:
+                with open(self.path, "r", encoding="utf-8") as index_file:
+                    entries = json.load(index_file)
+            except (OSError, ValueError):
+                entries = {}
+            entries.update(self._entries)
+
+            temp_path = "{}.{}.{}.tmp".format(self.path, os.getpid(), threading.get_ident())
+            with open(temp_path, "w", encoding="utf-8") as index_file:
+                json.dump(entries, index_file, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
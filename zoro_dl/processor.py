@@ -1,566 +1,1699 @@
-import requests, uuid, subprocess, os, time
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
-from .utils import (
-    extract_zoro_id,
-    colored_text,
-    is_sub_dub,
-    get_language_code,
-    n_m3u8_dl_path,
-    get_video_resolution,
-    get_readable_time,
-)
-from .anime_api import AnimeAPI
-
-
-def download_file(url, save_path):
-    """
-    Download a file from a given URL and save it to the specified path.
-
-    This function performs an HTTP GET request to download the file from the provided URL.
-    The file is saved to the specified local path.
-
-    Args:
-        url (str): The URL of the file to download.
-        save_path (str): The local path where the downloaded file should be saved.
-    """
-    response = requests.get(url, stream=True)
-    if response.status_code == 200:
-        with open(save_path, "wb") as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-    else:
-        print("Failed to download the file.")
-
-
-class ZORO:
-    """
-    A class to handle Processing and Downloading anime episodes from ZORO.
-    """
-
-    def __init__(
-        self,
-        url,
-        season="1",
-        episode=None,
-        resolution="1080p",
-        dl_type="both",
-        group_tag="NOGRP",
-    ):
-        """
-        Initialize the ZORO class with required parameters.
-
-        Args:
-            url (str): The URL from ZORO that needs to be processed.
-            season (str, optional): The season which will be added to the filename. Defaults to "1".
-            episode (str or None, optional): Episodes to be downloaded. Can be a range of episodes (e.g., "1-5"), a single episode (e.g., "10"), or None to download the complete season. Defaults to None.
-            resolution (str, optional): The resolution for downloading (e.g., "1080p"). Defaults to "1080p".
-            dl_type (str, optional): Download type: "sub", "dub", or "both". Defaults to "both". "sub" will download in JPN Audio with All Available Subtitles, "dub" will download in ENG Audio with All Available Subtitles and "both" with download in JPN-ENG with All Available Subtitles. Make sure to verify the series which you want to DL in "both",If it has same duration in both sub and dub player on ZORO, Only then it will work or else you will have audio sync issues
-            group_tag (str, optional): Custom group tag for metadata. Defaults to "Conan76".
-        """
-        self.zoro_url = url
-        self.season = season
-        self.requested_episode = episode
-        self.resolution = resolution.replace("p", "")
-        self.dl_type = dl_type
-        self.zoro_id = extract_zoro_id(self.zoro_url)
-        self.end_code = str(uuid.uuid4())
-        self.custom_group_tag = group_tag
-        self.separator = "-" * 70
-
-        self.api = AnimeAPI()
-        self.episodes = self.api.get_episodes(self.zoro_id)
-        self.setup_episode_start_end()
-
-    def setup_episode_start_end(self):
-        """
-        Set up the starting and ending episode numbers based on the requested episode range.
-
-        If the requested episode is None, the method sets the episode range to cover all available episodes.
-        If the requested episode is specified as a range (e.g., "1-5"), the method extracts the starting and ending
-        episode numbers from the range.
-        If the requested episode is a single number, it's set as the starting episode, and the ending episode is set to 0.
-
-        This method populates the 'episode_start' and 'episode_end' attributes accordingly.
-        """
-
-        if self.requested_episode is None:
-            self.episode_start = 1
-            self.episode_end = int(len(self.episodes))
-        elif "-" in self.requested_episode:
-            self.episode_start, self.episode_end = map(
-                int, self.requested_episode.split("-")
-            )
-        else:
-            self.episode_start = int(self.requested_episode)
-            self.episode_end = 0
-
-    def get_stream_data(self, episode_number):
-        """
-        Retrieve streaming and subtitle data for a specific episode.
-
-        This method extracts the streams and subtitles for the specified episode.
-        It also constructs the complete data dictionary containing various episode details.
-
-        Args:
-            episode_number (int): The episode number for which to retrieve data.
-
-        Returns:
-            None
-        """
-
-        print(colored_text("EXTRACTING STREAMS", "green"))
-
-        episode_index = int(episode_number) - 1
-        episode = self.episodes[episode_index]
-        episode_id = episode["url"].split("?ep=")[-1]
-        find_is_sub_dub = is_sub_dub(episode_id)
-        title_season = (
-            "0{}".format(self.season)
-            if int(self.season) < 10
-            else "{}".format(self.season)
-        )
-        title_episode = (
-            "0{}".format(episode_number)
-            if int(episode_number) < 10
-            else "{}".format(episode_number)
-        )
-
-        watch_id = episode["id"].split("$episode")[0]
-        watch_id_list = []
-
-        if self.dl_type == "both" and find_is_sub_dub == "both":
-            watch_id_list.extend(
-                [
-                    f"{watch_id}$episode${episode_id}$sub",
-                    f"{watch_id}$episode${episode_id}$dub",
-                ]
-            )
-
-        elif self.dl_type == "dub":
-            watch_id_list.extend([f"{watch_id}$episode${episode_id}$dub"])
-
-        elif self.dl_type == "sub":
-            watch_id_list.extend([f"{watch_id}$episode${episode_id}$sub"])
-
-        sources = []
-        subtitles = []
-        complete_data = {
-            "sources": sources,
-            "subtitles": subtitles,
-            "malID": self.api.get_info(self.zoro_id, "malID"),
-            "title": self.api.get_info(self.zoro_id, "title"),
-            "episodeTitle": episode["title"],
-            "season": int(self.season),
-            "episode": episode_number,
-            "name": f"{self.api.get_info(self.zoro_id, 'title')} S{title_season}E{title_episode} - {episode['title']}",
-        }
-
-        # Using ThreadPoolExecutor for fetching watch and subtitle information concurrently
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            executor.submit(self.fetch_video_sources, watch_id_list, sources)
-
-            if self.dl_type == "both" or self.dl_type == "sub":
-
-                executor.submit(
-                    self.fetch_subtitles_sources, watch_id_list[0], subtitles
-                )
-
-        self.complete_data = complete_data
-        self.video_sources = complete_data["sources"]
-        self.subtitle_sources = complete_data["subtitles"]
-
-        self.lang_file_name_data = (
-            "JPN-ENG"
-            if len(self.video_sources) > 1
-            else ("JPN" if self.video_sources[0]["subOrdub"] == "sub" else "ENG")
-        )
-
-        self.subs_file_name_data = (
-            "MULTI-SUBS" if len(self.subtitle_sources) > 1 else ("ENG-SUBS" if len(self.subtitle_sources) == 1 else "NO-SUBS")
-        )
-
-    def fetch_video_sources(self, watch_id_list, sources):
-        """
-        Fetch video sources for the specified watch IDs and store them in the 'sources' list.
-
-        This method queries the AnimeAPI for watch information using the provided watch IDs.
-        It extracts the URL of the first video source from Consumet API and determines whether it is a subtitle or dub source.
-        The retrieved video source details are then appended to the 'sources' list.
-
-        Args:
-            watch_id_list (list): List of watch IDs to fetch video sources for.
-            sources (list): List to store the fetched video source dictionaries.
-
-        Returns:
-            None
-        """
-        for wID in watch_id_list:
-            watch_info = self.api.get_watch_info(wID)
-            stream_dict = {
-                "url": watch_info["sources"][0]["url"],
-                "subOrdub": wID.split("$")[-1],
-            }
-            sources.append(stream_dict)
-
-    def fetch_subtitles_sources(self, watch_id, subtitles):
-        """
-        Fetch subtitle sources for the specified watch ID and store them in the 'subtitles' list.
-
-        This method queries the AnimeAPI for subtitle information using the provided watch ID.It extracts subtitle details such as language, language code,
-        and URL for each available subtitle track. The retrieved subtitle details are then appended to the 'subtitles' list.
-
-        Args:
-            watch_id (str): Watch ID to fetch subtitle sources for.
-            subtitles (list): List to store the fetched subtitle dictionaries.
-
-        Returns:
-            None
-        """
-        subtitle_info = self.api.get_watch_info(watch_id.replace("dub", "sub"))
-        subtitles_dict = [
-            {
-                "lang": sub_data["lang"],
-                "lang_639_2": get_language_code(sub_data["lang"].split(" - ")[0]),
-                "url": sub_data["url"],
-            }
-            for sub_data in subtitle_info["subtitles"]
-            if sub_data["lang"] != "Thumbnails"
-        ]
-        subtitles.extend(subtitles_dict)
-
-    def download_video(self):
-        """
-        Download video sources for each stream in the 'video_sources' list.
-
-        This method iterates through each video source in the 'video_sources' list.
-        It constructs a command to invoke the 'n_m3u8_dl' tool with appropriate parameters
-        to download the video stream. The downloaded file is saved with a name based on
-        the MAL ID, sub/dub information, and a unique code.
-
-        Returns:
-            None
-        """
-        for data in self.video_sources:
-
-            print(
-                colored_text("[+] DOWNLOADING", "green"),
-                colored_text("JPN" if data["subOrdub"] == "sub" else "ENG", "blue"),
-                colored_text("VIDEO SOURCE", "green"),
-            )
-
-            cmd = [
-                n_m3u8_dl_path,
-                data["url"],
-                "-sv",
-                "res={}".format(self.resolution),
-                "--save-name",
-                "{}_{}_{}".format(
-                    self.complete_data["malID"], data["subOrdub"], self.end_code
-                ),
-                # '--save-dir',
-                # '{} - S{}'.format(self.complete_data['malID'] , self.complete_data['season'])
-            ]
-            self.out_folder_structure = "{} - S{}".format(
-                self.complete_data["title"], self.complete_data["season"]
-            )
-            subprocess.check_call(cmd)
-
-    def download_subs(self):
-        """
-        Download subtitle files for each subtitle source in the 'subtitle_sources' list.
-
-        This method iterates through each subtitle source in the 'subtitle_sources' list.
-        It invokes the 'download_file' function to download the subtitle file from the provided URL.
-        The downloaded subtitle file is saved with a name based on the language code and a unique code.
-
-        Returns:
-            None
-        """
-
-        print(
-            colored_text(
-                "[+] DOWNLOADING SUBTITLES (TOTAL - {} FOUND)".format(
-                    len(self.subtitle_sources)
-                ),
-                "green",
-            )
-        )
-
-        for subs in self.subtitle_sources:
-            download_file(
-                subs["url"],
-                "subtitle_{}_{}.vtt".format(subs["lang_639_2"], self.end_code),
-            )
-
-    def mux_files(self):
-        """
-        Mux video and subtitle files into a single MKV file using FFmpeg.
-
-        This method constructs FFmpeg commands to mux video and subtitle files into a single MKV file.
-        It maps video, audio, and subtitle streams accordingly. Metadata such as language and titles
-        are added to the resulting MKV file. The final MKV file is named based on various parameters,
-        including the custom group tag, video and subtitle language, and resolution.
-
-        Returns:
-            str: The filename of the resulting muxed MKV file.
-        """
-        print(colored_text("[+] MUXING FILES", "green"))
-
-        ffmpeg_opts = [
-            "ffmpeg",
-            "-y",
-        ]
-
-        # Adding Video Files
-
-        for source in self.complete_data["sources"]:
-            video_filename = f"{self.complete_data['malID']}_{source['subOrdub']}_{self.end_code}.mp4"
-            ffmpeg_opts.extend(["-i", video_filename])
-
-        # Adding Subtitles Files
-
-        if len(self.subtitle_sources) >= 1:
-            for source in self.subtitle_sources:
-                ffmpeg_opts.extend(
-                    [
-                        "-i",
-                        "subtitle_{}_{}.vtt".format(
-                            source["lang_639_2"], self.end_code
-                        ),
-                    ]
-                )
-
-        # Mapping 1st Video can be JPN if dl_type == sub or ENG if dl_type == dub
-        ffmpeg_opts.extend(["-map", "0:v:0"])
-
-        # Mapping Audio from the 1st Video Source. It can be JPN or ENG acc to the dl_type
-        ffmpeg_opts.extend(["-map", "0:a:0"])
-
-        # Mapping Audio from the 2nd Video Source Only If dl_type == both only since then it will have the second Video Source
-
-        if self.dl_type == "both":
-
-            ffmpeg_opts.extend(["-map", "1:a:0"])
-
-        # Mapping Subtitle Source only if dl_type == both
-
-        if len(self.subtitle_sources) >= 1:
-            for i in range(len(self.subtitle_sources)):
-                ffmpeg_opts.extend(["-map", f"{len(self.video_sources)+i}:s:0"])
-
-        # Adding Language Metadata of Subtitles only if dl_type == both
-
-        if len(self.subtitle_sources) >= 1:
-            for i in range(len(self.subtitle_sources)):
-                ffmpeg_opts.extend(
-                    [
-                        "-metadata:s:s:{0}".format(i),
-                        f"language={self.subtitle_sources[i]['lang_639_2']}",
-                    ]
-                )
-
-        # Adding Audio Metadata
-
-        language_value = {"sub": "jpn", "dub": "eng", "both": "jpn"}.get(
-            self.dl_type, ""
-        )
-
-        ffmpeg_opts.extend(["-metadata:s:a:0", f"language={language_value}"])
-
-        if self.dl_type == "both":
-            ffmpeg_opts.extend(["-metadata:s:a:1", "language=eng"])
-
-        # Adding Encoded by, Audio Title and Video Title Metadata
-
-        ffmpeg_opts.extend(["-metadata", f"encoded_by={self.custom_group_tag}"])
-        ffmpeg_opts.extend(["-metadata:s:a", f"title={self.custom_group_tag}"])
-        ffmpeg_opts.extend(
-            ["-metadata:s:v", f"title={self.custom_group_tag} - Sourced from ZORO"]
-        )
-
-        # Adding Subtitle Title metadata
-
-        if len(self.subtitle_sources) >= 1:
-            for i in range(len(self.subtitle_sources)):
-                ffmpeg_opts.extend(
-                    [
-                        "-metadata:s:s:{0}".format(i),
-                        f"title={self.subtitle_sources[i]['lang']}",
-                    ]
-                )
-
-        out_name = "{}.mkv".format(self.end_code)
-
-        ffmpeg_opts.extend(["-c", "copy", out_name])
-
-        subprocess.check_call(ffmpeg_opts)
-
-        _, height = get_video_resolution(out_name)
-
-        out_file_name = (
-            "[{gr}] {name} [{resolution}p] [WEB] [{audio}]{subs}.mkv".format(
-                gr=self.custom_group_tag,
-                name=self.complete_data["name"],
-                resolution=height,
-                audio=self.lang_file_name_data,
-                subs=" [{}]".format(self.subs_file_name_data) if self.subs_file_name_data != "NO-SUBS" else "",
-            )
-        )
-
-        os.rename(out_name, out_file_name)
-
-        return out_file_name
-
-    def clean_up(self):
-        """
-        Clean up temporary video and subtitle files generated during the download process.
-
-        This method removes the temporary video and subtitle files that were downloaded during
-        the process. It iterates through the 'video_sources' list and 'subtitle_sources' list,
-        and deletes the corresponding video and subtitle files.
-
-        Returns:
-            None
-        """
-
-        print(colored_text("[+] Cleaning Temp Video Files", "green"))
-
-        for data in self.video_sources:
-            video_filename = "{}_{}_{}.mp4".format(
-                self.complete_data["malID"], data["subOrdub"], self.end_code
-            )
-            self.remove_file(video_filename)
-
-        print(colored_text("[+] Cleaning Temp Subtitle Files", "green"))
-
-        for data in self.subtitle_sources:
-            subtitle_filename = "subtitle_{}_{}.vtt".format(
-                data["lang_639_2"], self.end_code
-            )
-            self.remove_file(subtitle_filename)
-
-    def remove_file(self, file_name):
-        """
-        Remove a file from the filesystem if it exists.
-
-        Args:
-            file_name (str): The name of the file to be removed.
-
-        Returns:
-            None
-        """
-        try:
-            Path(file_name).unlink()
-        except FileNotFoundError:
-            pass
-
-    def processor(self, episode_number):
-        """
-        Process a single episode for downloading, including streams extraction, downloading video, subtitles, muxing files, and cleanup.
-
-        This method manages the entire download process for a specified episode.
-        It first retrieves stream data using the 'get_stream_data' method and processes any exceptions.
-        Then, it attempts to download the video using the 'download_video' method and handles any exceptions.
-        If multiple subtitles are available, it tries to download subtitles using the 'download_subs' method.
-        After downloading, it attempts to mux the downloaded video and subtitles using the 'mux_files' method.
-        Finally, it prints completion information and cleans up temporary files using the 'clean_up' method.
-
-        Args:
-            episode_number (int): The episode number to be processed.
-
-        Returns:
-            None
-        """
-
-        process_start = time.time()
-        try:
-            self.get_stream_data(episode_number)
-        except Exception as e:
-            print(colored_text("[+] ERROR - Getting Streams", "red"))
-            print(colored_text("[+] ERROR - {}".format(e), "red"))
-            return
-
-        if hasattr(self, "complete_data"):  # Check if complete_data exists
-            print(
-                colored_text("[+] DOWNLOADING", "green"),
-                colored_text("- {}".format(self.complete_data["name"]), "blue"),
-                colored_text("- {}p".format(self.resolution), "yellow"),
-            )
-        else:
-            print(colored_text("[+] ERROR - Missing complete_data", "red"))
-            return
-
-        try:
-            self.download_video()
-        except Exception as e:
-            print(colored_text("[+] ERROR - Downloading Video", "red"))
-            print(colored_text("[+] ERROR - {}".format(e), "red"))
-
-        if len(self.subtitle_sources) >= 1:
-            try:
-                self.download_subs()
-            except Exception as e:
-                print(colored_text("[+] ERROR - Downloading Subs", "red"))
-                print(colored_text("[+] ERROR - {}".format(e), "red"))
-
-        try:
-            final_muxed_path = self.mux_files()
-            print(
-                colored_text(
-                    f"[+] TASK COMPLETED IN {get_readable_time(time.time() - process_start)}",
-                    "yellow",
-                )
-            )
-            print(colored_text(f"[+] FILE {final_muxed_path}", "blue"))
-        except Exception as e:
-            print(colored_text("[+] ERROR - Muxing Files", "red"))
-            print(colored_text("[+] ERROR - {}".format(e), "red"))
-
-        self.clean_up()
-
-    def start_dl(self):
-        """
-        Start the download process for episodes based on the specified download type and episode range.
-
-        This method initiates the download process according to the specified 'dl_type' and episode range.
-        It checks if the 'dl_type' is valid and provides usage instructions for invalid types.
-        If only a single episode is requested, the 'processor' method is called for that episode.
-        If a range of episodes is requested, the 'processor' method is called for each episode within the range.
-
-        Returns:
-            None
-        """
-
-        if self.dl_type not in ["sub", "dub", "both"]:
-            
-            print(colored_text("[+] ERROR - Invalid dl_type", "red"))
-            print(
-                colored_text(
-                    "[+] dl_type = dub - TO DOWNLOAD IN ENG AUDIO WITH NO SUBS", "green"
-                )
-            )
-            print(
-                colored_text(
-                    "[+] dl_type = sub - TO DOWNLOAD IN JPN AUDIO WITH ALL AVAILABLE SUBS",
-                    "green",
-                )
-            )
-            print(
-                colored_text(
-                    "[+] dl_type = both - TO DOWNLOAD IN JPN-ENG AUDIO WITH ALL AVAILABLE SUBS",
-                    "green",
-                )
-            )
-            return
-
-        # If Single Episode Requested
-        if self.episode_end == 0:
-            print(self.separator)
-            self.processor(self.episode_start)
-
-        # If In Range Episodes Requested
-        for ep_index in range(self.episode_start, (self.episode_end + 1)):
-            print(self.separator)
-            print(f"Processing episode {ep_index}...")
-            self.processor(ep_index)
+import subprocess, os, re, time, threading, asyncio, tempfile, shutil
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from .utils import (
+    extract_zoro_id,
+    colored_text,
+    get_language_code,
+    get_n_m3u8_dl_path,
+    get_video_resolution,
+    get_readable_time,
+    get_readable_size,
+)
+from .anime_api import AnimeAPI, DEFAULT_API_URL
+from .metadata import DEFAULT_CACHE_DIR
+from .retries import track_retries, bind_retries
+from .scheduler import EpisodeScheduler
+from .job import EpisodeJob, season_folder_name
+from .mover import BackgroundMover, same_filesystem
+from .admission import AdmissionController, estimate_playlist_bytes, DEFAULT_BANDWIDTH, DEFAULT_DURATION
+from .journal import JobJournal
+from .output_index import OutputIndex
+from .metrics import MetricsRecorder
+from .ratelimit import TokenBucket
+from .availability import AvailabilityResolver, SERVERS_URL
+from .mux import build_mux_plan, get_muxer, default_mux_processes
+from .hls import HLSDownloader
+from .aio import AsyncAnimeAPI, LoopSemaphore, run_process, gather_or_cancel
+
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+_CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)")
+
+
+def parse_content_range(value):
+    """
+    Parse a Content-Range header such as "bytes 100-199/1000" or "bytes */1000".
+
+    Args:
+        value (str or None): The header value.
+
+    Returns:
+        tuple: The first byte position and the total size, each None if the header does not state it.
+    """
+    match = _CONTENT_RANGE_PATTERN.match(value or "")
+    if match is None:
+        return None, None
+    start, total = match.groups()
+    return (
+        int(start) if start is not None else None,
+        int(total) if total != "*" else None,
+    )
+
+
+def download_file(url, save_path, session=None, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    Download a file from a given URL and save it to the specified path.
+
+    This function performs an HTTP GET request to download the file from the provided URL.
+    The file is saved to the specified local path. The request goes through the shared pooled
+    session unless another session is given, so repeated downloads reuse warm connections.
+
+    The data is first written to "<save_path>.part". If that file is left over from an interrupted
+    download, only the missing bytes are requested with an HTTP Range request and appended to it.
+    The partial file is only kept if the server's Content-Range confirms it: a 206 response has to
+    continue exactly where it ends, and a 416 response has to report a total size equal to its size.
+    Otherwise it is deleted and the file is downloaded from the start.
+
+    Args:
+        url (str): The URL of the file to download.
+        save_path (str): The local path where the downloaded file should be saved.
+        session (requests.Session or None, optional): Session to download with. Defaults to the shared pooled session.
+        chunk_size (int, optional): Size of the chunks read from the response and of the file write buffer. Defaults to 1 MB.
+
+    Returns:
+        bool: True if the file was downloaded, False otherwise.
+    """
+    if session is None:
+        from .session import get_session
+
+        session = get_session()
+
+    part_path = "{}.part".format(save_path)
+
+    while True:
+        try:
+            resume_from = os.path.getsize(part_path)
+        except OSError:
+            resume_from = 0
+
+        headers = {"Range": "bytes={}-".format(resume_from)} if resume_from else {}
+
+        with session.get(url, stream=True, headers=headers) as response:
+            if resume_from and response.status_code in (206, 416):
+                start, total = parse_content_range(response.headers.get("Content-Range"))
+                if response.status_code == 416 and total == resume_from:
+                    # The partial file already holds every byte
+                    os.replace(part_path, save_path)
+                    return True
+                if response.status_code == 416 or start != resume_from:
+                    # The partial file is stale or the file changed, so it cannot be resumed
+                    os.remove(part_path)
+                    continue
+
+            if response.status_code not in (200, 206):
+                print("Failed to download the file.")
+                return False
+
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(part_path, mode, buffering=chunk_size) as file:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    file.write(chunk)
+
+        os.replace(part_path, save_path)
+        return True
+
+
+def file_size(path):
+    """
+    Get the size of a file, or 0 if it does not exist.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        int: The size of the file in bytes.
+    """
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class ZORO:
+    """
+    A class to handle Processing and Downloading anime episodes from ZORO.
+    """
+
+    def __init__(
+        self,
+        url,
+        season="1",
+        episode=None,
+        resolution="1080p",
+        dl_type="both",
+        group_tag="NOGRP",
+        cache_dir=DEFAULT_CACHE_DIR,
+        max_video_processes=2,
+        download_threads=None,
+        subtitle_workers=8,
+        journal=True,
+        skip_existing=True,
+        metrics_hooks=None,
+        download_backend="n_m3u8dl",
+        hls_workers=8,
+        stream_mux=False,
+        audio_only_secondary=True,
+        rate_limits=None,
+        output_dir=None,
+        temp_dir=None,
+        min_free_space=1024 ** 3,
+        api_url=DEFAULT_API_URL,
+        servers_url=SERVERS_URL,
+        api=None,
+        mux_backend="ffmpeg",
+        max_mux_processes=None,
+    ):
+        """
+        Initialize the ZORO class with required parameters.
+
+        Args:
+            url (str): The URL from ZORO that needs to be processed.
+            season (str, optional): The season which will be added to the filename. Defaults to "1".
+            episode (str or None, optional): Episodes to be downloaded. Can be a range of episodes (e.g., "1-5"), a single episode (e.g., "10"), or None to download the complete season. Defaults to None.
+            resolution (str, optional): The resolution for downloading (e.g., "1080p"). Defaults to "1080p".
+            dl_type (str, optional): Download type: "sub", "dub", or "both". Defaults to "both". "sub" will download in JPN Audio with All Available Subtitles, "dub" will download in ENG Audio with All Available Subtitles and "both" with download in JPN-ENG with All Available Subtitles. Make sure to verify the series which you want to DL in "both",If it has same duration in both sub and dub player on ZORO, Only then it will work or else you will have audio sync issues
+            group_tag (str, optional): Custom group tag for metadata. Defaults to "Conan76".
+            cache_dir (str or None, optional): Directory of the SQLite metadata store caching series info from the Consumet API between runs and processes. A stored series is reused without any request while it lists the requested episodes or is younger than 6 hours. Defaults to the per-user cache directory (e.g. "~/.cache/zoro-dl"). None caches in memory only.
+            max_video_processes (int, optional): Maximum number of N_m3u8DL-RE processes running at once, shared by every episode of this instance. Defaults to 2, so the JPN and ENG sources of an episode download side by side.
+            download_threads (int or None, optional): Number of segment download threads for each N_m3u8DL-RE process. Defaults to None, which uses the N_m3u8DL-RE default.
+            subtitle_workers (int, optional): Maximum number of subtitle tracks of an episode downloaded at once. Defaults to 8.
+            journal (bool or str or JobJournal or None, optional): The job journal used to skip completed episodes and resume interrupted ones after a restart: True keeps it in the output folder (".zoro-dl-journal.jsonl", next to the output index), a path keeps it there, and a JobJournal is shared with other instances. Defaults to True. None or False disables the journal.
+            skip_existing (bool, optional): Skip episodes whose muxed file is already in the output folder (see OutputIndex), before any network call is made for them. Defaults to True.
+            metrics_hooks (list or None, optional): Callables receiving the per-stage, per-episode and per-run metrics events (see MetricsRecorder). Defaults to None.
+            download_backend (str, optional): Video download backend: "n_m3u8dl" runs the bundled N_m3u8DL-RE executable, "native" uses the built-in HLSDownloader over the pooled session. Defaults to "n_m3u8dl".
+            hls_workers (int, optional): Number of segments fetched at once by each native HLS download. Defaults to 8.
+            stream_mux (bool, optional): Pipe the downloaded segments straight into FFmpeg through named pipes instead of writing temp MP4 files first, so every episode is written to disk only once. Needs the "native" download backend and named pipes (not available on Windows). Defaults to False.
+            audio_only_secondary (bool, optional): With dl_type "both", download only the audio track of the ENG source, since its video is never muxed. Uses the audio rendition of the stream if it has one, or else its lowest bandwidth variant. Defaults to True.
+            rate_limits (dict or None, optional): Requests per second allowed for each host, e.g. {"api.consumet.org": 10}, overriding the defaults. They apply to a session of this instance's own instead of the process-wide shared one, and cannot be combined with 'api'. None for a host removes its limit. Failed requests are retried with backoff and every host has a circuit breaker either way. Defaults to None.
+            output_dir (str or None, optional): Directory the finished MKV files are stored in, inside a "{title} - S{season}" folder. Defaults to None, which stores them in the current working directory.
+            temp_dir (str or None, optional): Directory the temp video, subtitle and MKV files are written to, e.g. on a fast local disk. Finished files are moved to the output folder atomically if both are on the same filesystem, and on a background thread otherwise. Defaults to None, which uses the output folder.
+            min_free_space (int or None, optional): Bytes to keep free on the temp volume. Episodes reserve their estimated temp size (bandwidth × duration from the stream manifest) before downloading, and wait while admitting them would leave less free space than this. Defaults to 1 GiB. None disables the check.
+            api_url (str, optional): The base Endpoint of the Consumet API for ZORO, e.g. of a self-hosted instance. Defaults to "https://api.consumet.org/anime/zoro".
+            servers_url (str, optional): URL template of the endpoint listing the servers of an episode, with "{}" in place of the episode id. Defaults to the AniWatch endpoint.
+            api (AnimeAPI or None, optional): An AnimeAPI shared with other instances, so they share one metadata cache. Replaces 'cache_dir' and 'api_url'. Defaults to None, which creates one.
+            mux_backend (str, optional): The muxer writing the MKV files: "ffmpeg" or "mkvmerge". Both write the same tracks, languages, titles and "encoded_by" tag. Defaults to "ffmpeg".
+            max_mux_processes (int or None, optional): Maximum number of mux processes running at once, shared by every episode of this instance. Defaults to None, which uses one per CPU core, up to 4 since muxing is mostly disk bound.
+        """
+        self.zoro_url = url
+        self.season = season
+        self.requested_episode = episode
+        self.resolution = resolution.replace("p", "")
+        self.dl_type = dl_type
+        self.zoro_id = extract_zoro_id(self.zoro_url)
+        self.custom_group_tag = group_tag
+        self.separator = "-" * 70
+        self.download_threads = download_threads
+        self.subtitle_workers = max(1, int(subtitle_workers))
+        self.max_video_processes = max(1, int(max_video_processes))
+        self.video_process_slots = threading.BoundedSemaphore(self.max_video_processes)
+        self.async_video_process_slots = LoopSemaphore(self.max_video_processes)
+        self.max_mux_processes = (
+            max(1, int(max_mux_processes)) if max_mux_processes is not None else default_mux_processes()
+        )
+        self.mux_slots = threading.BoundedSemaphore(self.max_mux_processes)
+        self.async_mux_slots = LoopSemaphore(self.max_mux_processes)
+        self._async_api = None
+        self._prefetched = {}
+        self._prefetch_lock = threading.Lock()
+
+        self.metrics = MetricsRecorder(metrics_hooks)
+
+        if download_backend not in ("n_m3u8dl", "native"):
+            raise ValueError("Unknown download_backend: {}".format(download_backend))
+        self.download_backend = download_backend
+
+        if stream_mux and download_backend != "native":
+            raise ValueError('stream_mux needs download_backend="native"')
+        self.muxer = get_muxer(mux_backend)
+        if stream_mux and not self.muxer.supports_pipes:
+            raise ValueError('stream_mux needs mux_backend="ffmpeg"')
+        if stream_mux and not hasattr(os, "mkfifo"):
+            print(colored_text("[+] NAMED PIPES NOT AVAILABLE, stream_mux DISABLED", "yellow"))
+            stream_mux = False
+        self.stream_mux = stream_mux
+        self.audio_only_secondary = audio_only_secondary
+
+        if rate_limits and api is not None:
+            raise ValueError("rate_limits cannot be combined with api, whose session may be shared")
+        session = None
+        if rate_limits:
+            from .session import create_session
+
+            # An own session, so the limits of the process-wide shared session stay untouched
+            session = create_session(rate_limits)
+        self.api = api or AnimeAPI(session=session, cache_dir=cache_dir, base_url=api_url)
+        self.hls = HLSDownloader(self.api.session, workers=hls_workers)
+        self.availability = AvailabilityResolver(self.api.session, servers_url=servers_url)
+        # A stored episode list that already has the requested episodes is used without asking the API
+        highest_requested = (
+            max(int(number) for number in str(self.requested_episode).split("-"))
+            if self.requested_episode is not None
+            else None
+        )
+        self.episodes = self.api.get_episodes(self.zoro_id, min_episodes=highest_requested)
+        self.setup_episode_start_end()
+
+        if output_dir is not None:
+            series_title = self.api.get_series_info(self.zoro_id).get("title", "")
+            self.output_dir = os.path.join(output_dir, season_folder_name(series_title, int(self.season)))
+        else:
+            self.output_dir = "."
+        self.temp_dir = temp_dir or self.output_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+        if isinstance(journal, JobJournal):
+            self.journal = journal
+        elif journal is True:
+            self.journal = JobJournal(os.path.join(self.output_dir, JobJournal.FILE_NAME))
+        else:
+            self.journal = JobJournal(journal) if journal else None
+
+        # Across filesystems a finished file is copied, which is left to a background thread
+        self.mover = None if same_filesystem(self.temp_dir, self.output_dir) else BackgroundMover()
+        self.output_index = OutputIndex(self.output_dir) if skip_existing else None
+        self.admission = (
+            AdmissionController(self.temp_dir, min_free_space)
+            if min_free_space is not None
+            else None
+        )
+
+    def setup_episode_start_end(self):
+        """
+        Set up the starting and ending episode numbers based on the requested episode range.
+
+        If the requested episode is None, the method sets the episode range to cover all available episodes.
+        If the requested episode is specified as a range (e.g., "1-5"), the method extracts the starting and ending
+        episode numbers from the range.
+        If the requested episode is a single number, it's set as the starting episode, and the ending episode is set to 0.
+
+        This method populates the 'episode_start' and 'episode_end' attributes accordingly.
+        """
+
+        if self.requested_episode is None:
+            self.episode_start = 1
+            self.episode_end = int(len(self.episodes))
+        elif "-" in self.requested_episode:
+            self.episode_start, self.episode_end = map(
+                int, self.requested_episode.split("-")
+            )
+        else:
+            self.episode_start = int(self.requested_episode)
+            self.episode_end = 0
+
+    def requested_episode_numbers(self):
+        """
+        Get the list of episode numbers covered by the requested episode range.
+
+        Returns:
+            list: The episode numbers to be processed, in order.
+        """
+        if self.episode_end == 0:
+            return [self.episode_start]
+        return list(range(self.episode_start, self.episode_end + 1))
+
+    def episode_id(self, episode_number):
+        """
+        Get the ZORO episode id of an episode.
+
+        Args:
+            episode_number (int): The episode number within the season.
+
+        Returns:
+            str: The episode id, as found in the "?ep=" parameter of the episode URL.
+        """
+        return self.episodes[int(episode_number) - 1]["url"].split("?ep=")[-1]
+
+    def prefetch_availability(self, episode_numbers=None):
+        """
+        Start looking up the sub/dub availability of many episodes in the background (see AvailabilityResolver),
+        so resolving an episode finds its availability already fetched instead of scraping it first.
+
+        Args:
+            episode_numbers (iterable or None, optional): The episodes to look up. Defaults to the requested episode range, without completed episodes.
+
+        Returns:
+            list: The episode ids that were queued.
+        """
+        if episode_numbers is None:
+            episode_numbers = [
+                episode_number
+                for episode_number in self.requested_episode_numbers()
+                if self.completed_path(episode_number) is None
+            ]
+        return self.availability.prefetch(
+            self.episode_id(episode_number) for episode_number in episode_numbers
+        )
+
+    def episode_key(self, episode_number):
+        """
+        Get the job journal key of an episode of this series.
+
+        Args:
+            episode_number (int): The episode number.
+
+        Returns:
+            str: The journal key.
+        """
+        return JobJournal.episode_key(
+            self.zoro_id, self.season, episode_number, self.dl_type, self.resolution
+        )
+
+    def completed_path(self, episode_number):
+        """
+        Get the final file of an episode that the output index or the job journal records as completed.
+
+        The output index is checked first since it answers from memory, by key or by the name of the
+        episode's file (see 'output_file_pattern'); the job journal is only consulted for episodes the
+        index does not know about.
+
+        Args:
+            episode_number (int): The episode number.
+
+        Returns:
+            str or None: The final file path if the episode was completed and its file still exists, otherwise None.
+        """
+        key = self.episode_key(episode_number)
+        if self.output_index is not None:
+            indexed_path = self.output_index.get(key) or self.output_index.find(
+                key, self.output_file_pattern(episode_number)
+            )
+            if indexed_path is not None:
+                return indexed_path
+        if self.journal is None:
+            return None
+        return self.journal.completed_path(key)
+
+    def is_stage_done(self, job, stage, path):
+        """
+        Check whether the job journal records a stage of a job as done and its file still exists.
+
+        Args:
+            job (EpisodeJob): The episode.
+            stage (str): The stage name, e.g. "video_sub" or "subs_0".
+            path (str): The file the stage produces.
+
+        Returns:
+            bool: True if the stage can be skipped.
+        """
+        return (
+            self.journal is not None
+            and self.journal.is_stage_done(job.key, stage)
+            and os.path.exists(path)
+        )
+
+    def mark_stage_done(self, job, stage):
+        """
+        Record a stage of a job as done in the job journal, if there is one.
+
+        Args:
+            job (EpisodeJob): The episode.
+            stage (str): The stage name, e.g. "video_sub" or "subs_0".
+
+        Returns:
+            None
+        """
+        if self.journal is not None:
+            self.journal.mark_stage(job.key, stage)
+
+    def prefetch(self, episode_numbers=None, workers=4, rate=2.0):
+        """
+        Start resolving the streams and subtitles of many episodes in the background.
+
+        The episodes are resolved with 'get_stream_data' on a pool of 'workers' threads, at most 'rate'
+        episodes per second, and kept in a manifest cache that 'resolve_job' takes them from. Downloads can
+        start right away: an episode that is still being prefetched is simply waited for. Episodes that are
+        already completed or already prefetched are left out.
+
+        Args:
+            episode_numbers (iterable or None, optional): The episodes to prefetch. Defaults to the requested episode range.
+            workers (int, optional): Number of episodes resolved at once. Defaults to 4.
+            rate (float, optional): Maximum number of episodes resolved per second. Defaults to 2.0.
+
+        Returns:
+            list: The episode numbers that were queued for prefetching.
+        """
+        if episode_numbers is None:
+            episode_numbers = self.requested_episode_numbers()
+
+        limiter = TokenBucket(rate, capacity=max(1, int(workers)))
+
+        def resolve(episode_number):
+            limiter.acquire()
+            return self.get_stream_data(episode_number)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+        queued = []
+        with self._prefetch_lock:
+            for episode_number in episode_numbers:
+                if episode_number in self._prefetched:
+                    continue
+                if self.completed_path(episode_number) is not None:
+                    continue
+                self._prefetched[episode_number] = executor.submit(resolve, episode_number)
+                queued.append(episode_number)
+
+        # The queued resolutions keep running; the pool's threads exit once they are done
+        executor.shutdown(wait=False)
+        return queued
+
+    def resolve_job(self, episode_number, max_age=3600):
+        """
+        Get the EpisodeJob of an episode, taking it from the prefetch manifest cache when possible.
+
+        A prefetched job that failed or is older than 'max_age' seconds (its stream URLs may have
+        expired) is resolved again with 'get_stream_data'.
+
+        Args:
+            episode_number (int): The episode number.
+            max_age (float, optional): Maximum age in seconds of a prefetched job. Defaults to 3600.
+
+        Returns:
+            EpisodeJob: The job of the episode.
+        """
+        with self._prefetch_lock:
+            future = self._prefetched.pop(episode_number, None)
+
+        if future is not None:
+            try:
+                job = future.result()
+            except Exception as e:
+                print(colored_text("[+] PREFETCH FAILED, RETRYING - {}".format(e), "yellow"))
+            else:
+                if time.time() - job.started_at <= max_age:
+                    return job
+
+        return self.get_stream_data(episode_number)
+
+    def get_stream_data(self, episode_number):
+        """
+        Retrieve streaming and subtitle data for a specific episode.
+
+        This method extracts the streams and subtitles for the specified episode
+        and collects them, together with the episode details, into a new EpisodeJob.
+
+        Args:
+            episode_number (int): The episode number for which to retrieve data.
+
+        Returns:
+            EpisodeJob: The job holding the streams, subtitles and details of the episode.
+        """
+
+        print(colored_text("EXTRACTING STREAMS", "green"))
+
+        resolve_start = time.time()
+        episode_index = int(episode_number) - 1
+        episode = self.episodes[episode_index]
+        episode_id = self.episode_id(episode_number)
+        find_is_sub_dub = self.availability.kind(episode_id)
+        availability_duration = time.time() - resolve_start
+        title_season = (
+            "0{}".format(self.season)
+            if int(self.season) < 10
+            else "{}".format(self.season)
+        )
+        title_episode = (
+            "0{}".format(episode_number)
+            if int(episode_number) < 10
+            else "{}".format(episode_number)
+        )
+
+        watch_id = episode["id"].split("$episode")[0]
+        watch_id_list = []
+
+        if self.dl_type == "both" and find_is_sub_dub == "both":
+            watch_id_list.extend(
+                [
+                    f"{watch_id}$episode${episode_id}$sub",
+                    f"{watch_id}$episode${episode_id}$dub",
+                ]
+            )
+
+        elif self.dl_type == "dub":
+            watch_id_list.extend([f"{watch_id}$episode${episode_id}$dub"])
+
+        elif self.dl_type == "sub":
+            watch_id_list.extend([f"{watch_id}$episode${episode_id}$sub"])
+
+        info_start = time.time()
+        series_info = self.api.get_series_info(self.zoro_id)
+        info_duration = time.time() - info_start
+        key = self.episode_key(episode_number)
+        end_code = self.journal.get_end_code(key) if self.journal is not None else None
+        job = EpisodeJob(
+            episode_number=episode_number,
+            episode_id=episode_id,
+            mal_id=series_info.get("malID", ""),
+            title=series_info.get("title", ""),
+            episode_title=episode["title"],
+            season=int(self.season),
+            name=f"{series_info.get('title', '')} S{title_season}E{title_episode} - {episode['title']}",
+            end_code=end_code,
+            key=key,
+            temp_dir=self.temp_dir,
+        )
+
+        # Reusing the journaled end_code keeps temp file names stable, so partial downloads can be resumed
+        if self.journal is not None and end_code is None:
+            self.journal.set_end_code(key, job.end_code)
+
+        job.started_at = resolve_start
+
+        # Using ThreadPoolExecutor for fetching watch and subtitle information concurrently
+        watch_start = time.time()
+        with track_retries(job.retries, "watch"), ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(
+                    bind_retries(self.fetch_video_sources), watch_id_list, job.sources
+                )
+            ]
+
+            if self.dl_type == "both" or self.dl_type == "sub":
+
+                futures.append(
+                    executor.submit(
+                        bind_retries(self.fetch_subtitles_sources),
+                        watch_id_list[0],
+                        job.subtitles,
+                    )
+                )
+
+            for future in futures:
+                future.result()
+
+        self.metrics.record_stage(job, "availability", availability_duration)
+        self.metrics.record_stage(job, "info", info_duration)
+        self.metrics.record_stage(job, "watch", time.time() - watch_start)
+        self.metrics.record_stage(job, "resolve", time.time() - resolve_start)
+
+        if not job.sources:
+            raise ValueError(
+                "No video sources found for dl_type {} (available: {})".format(
+                    self.dl_type, find_is_sub_dub
+                )
+            )
+
+        return job
+
+    def fetch_video_sources(self, watch_id_list, sources):
+        """
+        Fetch video sources for the specified watch IDs and store them in the 'sources' list.
+
+        This method queries the AnimeAPI for watch information using the provided watch IDs.
+        It extracts the URL of the first video source from Consumet API and determines whether it is a subtitle or dub source.
+        The retrieved video source details are then appended to the 'sources' list. Every source after the first
+        only contributes its audio track to the muxed file, so it is marked "audio_only" if 'audio_only_secondary' is set.
+
+        Args:
+            watch_id_list (list): List of watch IDs to fetch video sources for.
+            sources (list): List to store the fetched video source dictionaries.
+
+        Returns:
+            None
+        """
+        for wID in watch_id_list:
+            watch_info = self.api.get_watch_info(wID)
+            stream_dict = {
+                "url": watch_info["sources"][0]["url"],
+                "subOrdub": wID.split("$")[-1],
+                "audio_only": self.audio_only_secondary and len(sources) > 0,
+            }
+            sources.append(stream_dict)
+
+    def fetch_subtitles_sources(self, watch_id, subtitles):
+        """
+        Fetch subtitle sources for the specified watch ID and store them in the 'subtitles' list.
+
+        This method queries the AnimeAPI for subtitle information using the provided watch ID.It extracts subtitle details such as language, language code,
+        and URL for each available subtitle track. The retrieved subtitle details are then appended to the 'subtitles' list.
+
+        Args:
+            watch_id (str): Watch ID to fetch subtitle sources for.
+            subtitles (list): List to store the fetched subtitle dictionaries.
+
+        Returns:
+            None
+        """
+        subtitle_info = self.api.get_watch_info(watch_id.replace("dub", "sub"))
+        subtitles_dict = [
+            {
+                "lang": sub_data["lang"],
+                "lang_639_2": get_language_code(sub_data["lang"].split(" - ")[0]),
+                "url": sub_data["url"],
+            }
+            for sub_data in subtitle_info["subtitles"]
+            if sub_data["lang"] != "Thumbnails"
+        ]
+        subtitles.extend(subtitles_dict)
+
+    def download_video(self, job):
+        """
+        Download video sources for each stream in the job's 'sources' list.
+
+        This method downloads every video source of the job concurrently using 'download_video_source',
+        so a dual-audio episode takes roughly the time of its slowest source. The number of N_m3u8DL-RE
+        processes running at once is capped by 'max_video_processes'.
+
+        Args:
+            job (EpisodeJob): The episode to download the video sources of.
+
+        Returns:
+            None
+        """
+        self.admit_job(job)
+
+        # With stream_mux the sources are downloaded while muxing, by 'stream_mux_files'
+        if self.stream_mux:
+            return
+
+        with self.metrics.stage(job, "video"):
+            try:
+                if len(job.sources) == 1:
+                    self.download_video_source(job, job.sources[0])
+                    return
+
+                with ThreadPoolExecutor(max_workers=len(job.sources)) as executor:
+                    futures = [
+                        executor.submit(self.download_video_source, job, data)
+                        for data in job.sources
+                    ]
+                    for future in futures:
+                        future.result()
+            finally:
+                job.transferred["video"] = sum(
+                    file_size(job.video_path(data)) for data in job.sources
+                )
+
+    def estimate_temp_bytes(self, job):
+        """
+        Estimate the peak temp disk space an episode needs, from the bandwidth and duration in its stream manifests.
+
+        Without 'stream_mux' the temp video files and the muxed file exist side by side while muxing,
+        so the estimate is twice the size of the video sources.
+
+        Args:
+            job (EpisodeJob): The episode.
+
+        Returns:
+            int: The estimated size in bytes.
+        """
+        video_bytes = 0
+        for data in job.sources:
+            try:
+                video_bytes += estimate_playlist_bytes(self.resolve_source(job, data))
+            except Exception:
+                video_bytes += int(DEFAULT_BANDWIDTH * DEFAULT_DURATION / 8)
+        return video_bytes if self.stream_mux else video_bytes * 2
+
+    def resolve_source(self, job, data):
+        """
+        Resolve a video source of a job to the media playlist it is downloaded from, once per job.
+
+        The playlist is kept on the job, so the admission estimate, the height of the file name, the
+        N_m3u8DL-RE command and the native download all reuse the same master and media playlists.
+
+        Args:
+            job (EpisodeJob): The episode the source belongs to.
+            data (dict): The video source.
+
+        Returns:
+            dict: The resolved media playlist, see 'HLSDownloader.resolve'.
+        """
+        playlist = job.playlists.get(data["subOrdub"])
+        if playlist is None:
+            with track_retries(job.retries, "video"):
+                playlist = self.hls.resolve(
+                    data["url"], int(self.resolution), audio_only=data.get("audio_only", False)
+                )
+            job.playlists[data["subOrdub"]] = playlist
+        return playlist
+
+    def job_temp_usage(self, job):
+        """
+        Get the temp disk space an episode has written so far, as reported to its admission reservation.
+
+        Args:
+            job (EpisodeJob): The episode.
+
+        Returns:
+            int: The total size of the job's temp files in bytes.
+        """
+        return sum(file_size(path) for path in job.temp_paths())
+
+    def admit_job(self, job):
+        """
+        Wait until the temp volume has room for an episode and reserve it (see AdmissionController).
+
+        The reservation is released by 'clean_up'.
+
+        Args:
+            job (EpisodeJob): The episode.
+
+        Returns:
+            None
+        """
+        if self.admission is None:
+            return
+
+        estimate = self.estimate_temp_bytes(job)
+        wait_start = time.time()
+        self.admission.admit(
+            job.end_code,
+            estimate,
+            lambda: self.job_temp_usage(job),
+            on_wait=lambda: self.print_admission_wait(job, estimate),
+        )
+        self.metrics.record_stage(job, "admission", time.time() - wait_start)
+
+    async def admit_job_async(self, job):
+        """
+        Wait for room on the temp volume like 'admit_job', without blocking the event loop.
+
+        Args:
+            job (EpisodeJob): The episode.
+
+        Returns:
+            None
+        """
+        if self.admission is None:
+            return
+
+        estimate = await self.async_api.run_blocking(self.estimate_temp_bytes, job)
+        wait_start = time.time()
+        usage = lambda: self.job_temp_usage(job)
+        if not self.admission.try_admit(job.end_code, estimate, usage):
+            self.print_admission_wait(job, estimate)
+            while not self.admission.try_admit(job.end_code, estimate, usage):
+                await asyncio.sleep(self.admission.poll_interval)
+        self.metrics.record_stage(job, "admission", time.time() - wait_start)
+
+    def print_admission_wait(self, job, estimate):
+        print(
+            colored_text("[+] WAITING FOR DISK SPACE", "yellow"),
+            colored_text("- {}".format(job.name), "blue"),
+            colored_text(
+                "- NEEDS ~{}, {} FREE".format(
+                    get_readable_size(estimate), get_readable_size(self.admission.free_bytes())
+                ),
+                "yellow",
+            ),
+        )
+
+    def download_video_source(self, job, data):
+        """
+        Download a single video source of a job, either by running the command from 'video_source_command'
+        or, with the "native" download backend, with the built-in HLSDownloader.
+
+        Args:
+            job (EpisodeJob): The episode the source belongs to.
+            data (dict): The video source to download.
+
+        Returns:
+            None
+        """
+        stage = "video_{}".format(data["subOrdub"])
+        if self.is_stage_done(job, stage, job.video_path(data)):
+            print(
+                colored_text("[+] ALREADY DOWNLOADED", "yellow"),
+                colored_text("JPN" if data["subOrdub"] == "sub" else "ENG", "blue"),
+                colored_text("VIDEO SOURCE", "yellow"),
+            )
+            return
+
+        with self.video_process_slots:
+            print(
+                colored_text("[+] DOWNLOADING", "green"),
+                colored_text("JPN" if data["subOrdub"] == "sub" else "ENG", "blue"),
+                colored_text("VIDEO SOURCE", "green"),
+            )
+            if self.download_backend == "native":
+                self.download_native_source(job, data)
+            else:
+                self.record_height(job, data)
+                subprocess.check_call(self.video_source_command(job, data))
+
+        self.mark_stage_done(job, stage)
+
+    def download_native_source(self, job, data, cancel=None):
+        """
+        Download a single video source of a job with the built-in HLSDownloader, counting its retried
+        requests into the job's "video" retries.
+
+        Args:
+            job (EpisodeJob): The episode the source belongs to.
+            data (dict): The video source to download.
+            cancel (threading.Event or None, optional): Stops the download once set. Defaults to None.
+
+        Returns:
+            None
+        """
+        playlist = self.resolve_source(job, data)
+        with track_retries(job.retries, "video"):
+            self.hls.download(data["url"], job.video_path(data), cancel=cancel, playlist=playlist)
+        self.record_height(job, data, playlist)
+
+    def video_source_command(self, job, data):
+        """
+        Build the command downloading a single video source of a job.
+
+        This method constructs a command to invoke the 'n_m3u8_dl' tool with appropriate parameters
+        to download the video stream. The downloaded file is saved with a name based on
+        the MAL ID, sub/dub information, and the job's unique code. For an "audio_only" source the
+        playlist carrying its audio is taken from 'resolve_source'.
+
+        Args:
+            job (EpisodeJob): The episode the source belongs to.
+            data (dict): The video source to download.
+
+        Returns:
+            list: The command arguments.
+        """
+        if data.get("audio_only"):
+            # The resolved playlist holds a single stream, so N_m3u8DL-RE can pick it without a prompt
+            selection = [self.resolve_source(job, data)["url"], "--auto-select"]
+        else:
+            selection = [data["url"], "-sv", "res={}".format(self.resolution)]
+
+        cmd = [
+            get_n_m3u8_dl_path(),
+            *selection,
+            "--save-name",
+            job.video_save_name(data),
+        ]
+
+        if job.temp_dir not in ("", "."):
+            cmd.extend(["--save-dir", job.temp_dir, "--tmp-dir", job.temp_dir])
+
+        if self.download_threads is not None:
+            cmd.extend(["--thread-count", str(self.download_threads)])
+
+        return cmd
+
+    def record_height(self, job, data, playlist=None):
+        """
+        Record the height of a job's primary video source from its manifest, so the muxed file can be
+        named without probing it.
+
+        With the "native" backend the height of the downloaded variant is used. For N_m3u8DL-RE the height
+        is only recorded if the master playlist from 'resolve_source' has a variant of exactly the requested
+        resolution, which is the one "-sv res=..." selects; otherwise the height is left to 'finalize_mux'.
+
+        Args:
+            job (EpisodeJob): The episode the source belongs to.
+            data (dict): The video source.
+            playlist (dict or None, optional): The media playlist downloaded by the native backend. Defaults to None.
+
+        Returns:
+            None
+        """
+        if data.get("audio_only") or data is not job.sources[0]:
+            return
+
+        if playlist is not None:
+            variant = playlist["variant"]
+            job.height = variant["height"] if variant and variant["height"] else None
+            return
+
+        try:
+            master = self.resolve_source(job, data)["master"]
+        except Exception:
+            return
+        if master is not None:
+            heights = {variant["height"] for variant in master["variants"]}
+            if int(self.resolution) in heights:
+                job.height = int(self.resolution)
+
+    def download_subs(self, job):
+        """
+        Download subtitle files for each subtitle source in the job's 'subtitles' list.
+
+        This method downloads every subtitle source of the job concurrently on a thread pool of up to
+        'subtitle_workers' threads, invoking the 'download_file' function over the AnimeAPI's pooled session.
+        The downloaded subtitle file is saved with a name based on the track index, language code and the job's unique code.
+
+        Args:
+            job (EpisodeJob): The episode to download the subtitles of.
+
+        Returns:
+            None
+        """
+
+        print(
+            colored_text(
+                "[+] DOWNLOADING SUBTITLES (TOTAL - {} FOUND)".format(
+                    len(job.subtitles)
+                ),
+                "green",
+            )
+        )
+
+        with self.metrics.stage(job, "subs"):
+            try:
+                with ThreadPoolExecutor(
+                    max_workers=max(1, min(self.subtitle_workers, len(job.subtitles)))
+                ) as executor:
+                    futures = [
+                        executor.submit(self.download_subtitle, job, index)
+                        for index in range(len(job.subtitles))
+                    ]
+                    for future in futures:
+                        future.result()
+            finally:
+                job.transferred["subs"] = sum(
+                    file_size(job.subtitle_path(index))
+                    for index in range(len(job.subtitles))
+                )
+
+    def download_subtitle(self, job, index):
+        """
+        Download a single subtitle track of a job, unless the job journal records it as already downloaded.
+
+        Args:
+            job (EpisodeJob): The episode the subtitle belongs to.
+            index (int): Index of the subtitle in the job's subtitles.
+
+        Returns:
+            None
+        """
+        stage = "subs_{}".format(index)
+        subtitle_path = job.subtitle_path(index)
+        if self.is_stage_done(job, stage, subtitle_path):
+            return
+
+        with track_retries(job.retries, "subs"):
+            downloaded = download_file(job.subtitles[index]["url"], subtitle_path, self.api.session)
+        if downloaded:
+            self.mark_stage_done(job, stage)
+
+    def mux_files(self, job):
+        """
+        Mux video and subtitle files into a single MKV file using the 'mux_backend'.
+
+        This method runs the command from 'mux_command' and then names the resulting MKV
+        file using 'finalize_mux'. At most 'max_mux_processes' muxes run at once. With
+        'stream_mux' enabled, the video sources are downloaded and muxed in one go by
+        'stream_mux_files' instead.
+
+        Args:
+            job (EpisodeJob): The episode to mux.
+
+        Returns:
+            str: The filename of the resulting muxed MKV file.
+        """
+        if self.stream_mux:
+            return self.stream_mux_files(job)
+
+        print(colored_text("[+] MUXING FILES", "green"))
+
+        with self.mux_slots:
+            mux_opts, out_name = self.mux_command(job)
+
+            with self.metrics.stage(job, "mux"):
+                try:
+                    self.muxer.check(subprocess.call(mux_opts), mux_opts)
+                except BaseException:
+                    # Never leave a partial file under the final name
+                    self.remove_file(out_name)
+                    raise
+                finally:
+                    self.muxer.cleanup(out_name)
+                job.transferred["mux"] = file_size(out_name)
+
+        return self.finalize_mux(job, out_name)
+
+    def stream_mux_files(self, job, cancel=None):
+        """
+        Download the video sources of a job and mux them in a single pass, without temp video files.
+
+        Every video source gets a named pipe that FFmpeg reads as its input, and a thread that fetches
+        the source's segments with the native HLSDownloader and writes them into the pipe in order.
+        A source whose variant carries its audio as a separate rendition is downloaded to its temp
+        file first instead, since its video and audio have to be joined. The subtitles must already
+        be downloaded. If a source fails or the mux is cancelled, FFmpeg is stopped so that a
+        truncated episode is never finalized.
+
+        Args:
+            job (EpisodeJob): The episode to download and mux.
+            cancel (threading.Event or None, optional): Stops the downloads and the mux once set. Defaults to None.
+
+        Returns:
+            str: The filename of the resulting muxed MKV file.
+        """
+        print(colored_text("[+] DOWNLOADING AND MUXING FILES (STREAMING)", "green"))
+
+        playlists = [self.resolve_source(job, source) for source in job.sources]
+        self.record_height(job, job.sources[0], playlists[0])
+
+        # Sources with a separate audio rendition are joined into their temp file before muxing
+        streamed = [index for index, playlist in enumerate(playlists) if playlist["audio"] is None]
+        for index, playlist in enumerate(playlists):
+            if index not in streamed:
+                with track_retries(job.retries, "video"):
+                    self.hls.download(
+                        job.sources[index]["url"],
+                        job.video_path(job.sources[index]),
+                        cancel=cancel,
+                        playlist=playlist,
+                    )
+
+        pipe_dir = tempfile.mkdtemp(prefix="zoro-dl-")
+        pipes = [
+            os.path.join(pipe_dir, "{}.pipe".format(source["subOrdub"]))
+            if index in streamed
+            else job.video_path(source)
+            for index, source in enumerate(job.sources)
+        ]
+        for index in streamed:
+            os.mkfifo(pipes[index])
+
+        ffmpeg_opts, out_name = self.mux_command(job, video_inputs=pipes)
+        written = [
+            0 if index in streamed else file_size(job.video_path(source))
+            for index, source in enumerate(job.sources)
+        ]
+        errors = []
+        muxed = False
+
+        try:
+            with self.mux_slots, self.metrics.stage(job, "mux"):
+                process = subprocess.Popen(ffmpeg_opts)
+
+                def feed(index):
+                    try:
+                        with track_retries(job.retries, "video"), open(pipes[index], "wb") as pipe:
+                            for data in self.hls.iter_segments(playlists[index], cancel):
+                                pipe.write(data)
+                                written[index] += len(data)
+                    except Exception as e:
+                        errors.append(e)
+                        process.kill()
+
+                feeders = [
+                    threading.Thread(target=feed, args=(index,), daemon=True)
+                    for index in streamed
+                ]
+                for feeder in feeders:
+                    feeder.start()
+
+                returncode = process.wait()
+
+                # A feeder can still be blocked opening its pipe if FFmpeg exited early;
+                # opening the read end lets it through so its next write fails
+                for index, feeder in zip(streamed, feeders):
+                    while feeder.is_alive():
+                        try:
+                            os.close(os.open(pipes[index], os.O_RDONLY | os.O_NONBLOCK))
+                        except OSError:
+                            pass
+                        feeder.join(0.1)
+
+                job.transferred["video"] = sum(written)
+                if errors:
+                    raise errors[0]
+                self.muxer.check(returncode, ffmpeg_opts)
+                job.transferred["mux"] = file_size(out_name)
+                muxed = True
+        finally:
+            shutil.rmtree(pipe_dir, ignore_errors=True)
+            if not muxed:
+                self.remove_file(out_name)
+
+        return self.finalize_mux(job, out_name)
+
+    def mux_command(self, job, video_inputs=None):
+        """
+        Build the command muxing the video and subtitle files of a job into a single MKV file with the 'mux_backend'.
+
+        The video track is taken from the first video source and the audio track from every source, and
+        the languages and titles of every track and the "encoded_by" tag are set the same way by every
+        backend (see 'zoro_dl.mux.build_mux_plan').
+
+        Args:
+            job (EpisodeJob): The episode to mux.
+            video_inputs (list or None, optional): Inputs to read the video sources from, in the order of the job's sources. Defaults to the job's temp video files.
+
+        Returns:
+            tuple: The command arguments and the temp filename the MKV file is written to.
+        """
+        plan = build_mux_plan(job, self.custom_group_tag, video_inputs)
+        return self.muxer.command(plan), plan.output
+
+    def finalize_mux(self, job, out_name):
+        """
+        Move a muxed MKV file to its final path in the output folder and record the episode as completed.
+
+        The height of the video for the filename is taken from its manifest if it is known, and probed
+        with ffprobe otherwise. If the temp and output directories are on the same filesystem the file is
+        renamed into place atomically; otherwise it is moved by the background mover, and the episode
+        is recorded as completed once the move is done.
+
+        Args:
+            job (EpisodeJob): The muxed episode.
+            out_name (str): The temp filename the MKV file was written to.
+
+        Returns:
+            str: The final path of the MKV file.
+        """
+        height = job.height
+        if not height:
+            with self.metrics.stage(job, "probe"):
+                resolution = get_video_resolution(out_name)
+            height = resolution[1] if resolution else self.resolution
+
+        out_file_name = os.path.join(self.output_dir, self.output_file_name(job, height))
+
+        if self.mover is None:
+            os.replace(out_name, out_file_name)
+            self.record_completed(job, out_file_name)
+        else:
+            self.mover.move(
+                out_name, out_file_name, lambda: self.record_completed(job, out_file_name)
+            )
+
+        return out_file_name
+
+    def record_completed(self, job, out_file_name):
+        """
+        Record a finished episode file in the job journal and the output index.
+
+        Args:
+            job (EpisodeJob): The finished episode.
+            out_file_name (str): The final path of its MKV file.
+
+        Returns:
+            None
+        """
+        if self.journal is not None:
+            self.journal.mark_completed(job.key, os.path.abspath(out_file_name))
+        if self.output_index is not None:
+            self.output_index.add(job.key, out_file_name)
+
+    def wait_for_moves(self):
+        """
+        Wait until every finished file queued for the background mover is in the output folder.
+
+        Returns:
+            None
+        """
+        if self.mover is not None:
+            if self.mover.pending:
+                print(colored_text("[+] WAITING FOR {} FILES TO BE MOVED".format(self.mover.pending), "yellow"))
+            self.mover.join()
+
+    def output_file_name(self, job, height):
+        """
+        Get the final filename of a muxed episode.
+
+        The final MKV file is named based on various parameters, including the custom group tag,
+        video and subtitle language, and resolution.
+
+        Args:
+            job (EpisodeJob): The episode.
+            height (int): Height of the video.
+
+        Returns:
+            str: The final filename of the MKV file.
+        """
+        return "[{gr}] {name} [{resolution}p] [WEB] [{audio}]{subs}.mkv".format(
+            gr=self.custom_group_tag,
+            name=job.name,
+            resolution=height,
+            audio=job.lang_file_name_data,
+            subs=" [{}]".format(job.subs_file_name_data) if job.subs_file_name_data != "NO-SUBS" else "",
+        )
+
+    def output_file_pattern(self, episode_number):
+        """
+        Get a pattern matching the final filename of an episode of this series, see 'output_file_name'.
+
+        The group tag, series title, season, episode and requested resolution have to match, while the
+        episode title and the subtitle tag may differ. A "both" download also matches a JPN file, which
+        is what an episode without a dub is muxed to.
+
+        Args:
+            episode_number (int): The episode number.
+
+        Returns:
+            re.Pattern: The pattern, to be matched against whole file names.
+        """
+        series_title = self.api.get_series_info(self.zoro_id).get("title", "")
+        audio = {"sub": "JPN", "dub": "ENG", "both": "JPN-ENG|JPN"}.get(self.dl_type, "[A-Z-]+")
+        return re.compile(
+            r"\[{gr}\] {title} S{season:02d}E{episode:02d} - .* \[{resolution}p\] \[WEB\] \[(?:{audio})\](?: \[[A-Z-]+\])?\.mkv".format(
+                gr=re.escape(self.custom_group_tag),
+                title=re.escape(series_title),
+                season=int(self.season),
+                episode=int(episode_number),
+                resolution=re.escape(self.resolution),
+                audio=audio,
+            )
+        )
+
+    def clean_up(self, job):
+        """
+        Clean up temporary video and subtitle files generated during the download process.
+
+        This method removes the temporary video and subtitle files that were downloaded during
+        the process. It iterates through the job's video sources and subtitles,
+        and deletes the corresponding video and subtitle files.
+
+        Args:
+            job (EpisodeJob): The episode to clean up after.
+
+        Returns:
+            None
+        """
+
+        print(colored_text("[+] Cleaning Temp Video Files", "green"))
+
+        for data in job.sources:
+            self.remove_file(job.video_path(data))
+
+        print(colored_text("[+] Cleaning Temp Subtitle Files", "green"))
+
+        for index in range(len(job.subtitles)):
+            self.remove_file(job.subtitle_path(index))
+            self.remove_file("{}.part".format(job.subtitle_path(index)))
+
+        if self.admission is not None:
+            self.admission.release(job.end_code)
+
+    def remove_file(self, file_name):
+        """
+        Remove a file from the filesystem if it exists.
+
+        Args:
+            file_name (str): The name of the file to be removed.
+
+        Returns:
+            None
+        """
+        try:
+            Path(file_name).unlink()
+        except FileNotFoundError:
+            pass
+
+    def processor(self, episode_number):
+        """
+        Process a single episode for downloading, including streams extraction, downloading video, subtitles, muxing files, and cleanup.
+
+        This method manages the entire download process for a specified episode.
+        It first retrieves the episode's EpisodeJob using the 'get_stream_data' method and processes any exceptions.
+        Then, it attempts to download the video using the 'download_video' method and handles any exceptions.
+        If multiple subtitles are available, it tries to download subtitles using the 'download_subs' method.
+        After downloading, it attempts to mux the downloaded video and subtitles using the 'mux_files' method.
+        Finally, it prints completion information and cleans up temporary files using the 'clean_up' method.
+
+        Args:
+            episode_number (int): The episode number to be processed.
+
+        Returns:
+            EpisodeJob or None: The processed job, or None if the episode was already completed or its streams could not be retrieved.
+        """
+
+        completed_path = self.completed_path(episode_number)
+        if completed_path is not None:
+            print(colored_text(f"[+] ALREADY DOWNLOADED - {completed_path}", "yellow"))
+            return None
+
+        try:
+            job = self.resolve_job(episode_number)
+        except Exception as e:
+            print(colored_text("[+] ERROR - Getting Streams", "red"))
+            print(colored_text("[+] ERROR - {}".format(e), "red"))
+            self.metrics.resolve_failed(episode_number, e)
+            return None
+
+        print(
+            colored_text("[+] DOWNLOADING", "green"),
+            colored_text("- {}".format(job.name), "blue"),
+            colored_text("- {}p".format(self.resolution), "yellow"),
+        )
+
+        try:
+            self.download_video(job)
+        except Exception as e:
+            job.errors.append("video: {}".format(e))
+            print(colored_text("[+] ERROR - Downloading Video", "red"))
+            print(colored_text("[+] ERROR - {}".format(e), "red"))
+
+        if len(job.subtitles) >= 1:
+            try:
+                self.download_subs(job)
+            except Exception as e:
+                job.errors.append("subs: {}".format(e))
+                print(colored_text("[+] ERROR - Downloading Subs", "red"))
+                print(colored_text("[+] ERROR - {}".format(e), "red"))
+
+        final_muxed_path = None
+        try:
+            final_muxed_path = self.mux_files(job)
+            print(
+                colored_text(
+                    f"[+] TASK COMPLETED IN {get_readable_time(time.time() - job.started_at)}",
+                    "yellow",
+                )
+            )
+            print(colored_text(f"[+] FILE {final_muxed_path}", "blue"))
+        except Exception as e:
+            job.errors.append("mux: {}".format(e))
+            print(colored_text("[+] ERROR - Muxing Files", "red"))
+            print(colored_text("[+] ERROR - {}".format(e), "red"))
+
+        self.clean_up(job)
+        self.metrics.episode_finished(job, final_muxed_path)
+        return job
+
+    @property
+    def async_api(self):
+        """
+        The AsyncAnimeAPI used by the asyncio methods, sharing this instance's AnimeAPI client and AvailabilityResolver.
+
+        Native downloads and stream muxes run on its thread pool for long-running work, sized to the
+        video and mux process limits, so they cannot starve API calls and subtitle downloads.
+        """
+        if self._async_api is None:
+            self._async_api = AsyncAnimeAPI(
+                self.api,
+                availability=self.availability,
+                download_workers=self.max_video_processes + self.max_mux_processes,
+            )
+        return self._async_api
+
+    async def process_episode(self, episode_number):
+        """
+        Process a single episode like 'processor', without blocking the event loop.
+
+        N_m3u8DL-RE and FFmpeg run as asyncio subprocesses, and the API requests and subtitle downloads
+        run on the small request thread pool of 'async_api', so many episodes can be processed on a
+        single event loop. Cancelling the task terminates the running subprocesses and removes the
+        episode's temp files.
+
+        Args:
+            episode_number (int): The episode number to be processed.
+
+        Returns:
+            EpisodeJob or None: The processed job, or None if the episode was already completed or its streams could not be retrieved.
+        """
+        completed_path = self.completed_path(episode_number)
+        if completed_path is not None:
+            print(colored_text(f"[+] ALREADY DOWNLOADED - {completed_path}", "yellow"))
+            return None
+
+        try:
+            job = await self.async_api.run_blocking(self.resolve_job, episode_number)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(colored_text("[+] ERROR - Getting Streams", "red"))
+            print(colored_text("[+] ERROR - {}".format(e), "red"))
+            self.metrics.resolve_failed(episode_number, e)
+            return None
+
+        print(
+            colored_text("[+] DOWNLOADING", "green"),
+            colored_text("- {}".format(job.name), "blue"),
+            colored_text("- {}p".format(self.resolution), "yellow"),
+        )
+
+        final_muxed_path = None
+        try:
+            try:
+                await self.download_video_async(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.errors.append("video: {}".format(e))
+                print(colored_text("[+] ERROR - Downloading Video", "red"))
+                print(colored_text("[+] ERROR - {}".format(e), "red"))
+
+            if len(job.subtitles) >= 1:
+                try:
+                    await self.download_subs_async(job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    job.errors.append("subs: {}".format(e))
+                    print(colored_text("[+] ERROR - Downloading Subs", "red"))
+                    print(colored_text("[+] ERROR - {}".format(e), "red"))
+
+            try:
+                final_muxed_path = await self.mux_files_async(job)
+                print(
+                    colored_text(
+                        f"[+] TASK COMPLETED IN {get_readable_time(time.time() - job.started_at)}",
+                        "yellow",
+                    )
+                )
+                print(colored_text(f"[+] FILE {final_muxed_path}", "blue"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.errors.append("mux: {}".format(e))
+                print(colored_text("[+] ERROR - Muxing Files", "red"))
+                print(colored_text("[+] ERROR - {}".format(e), "red"))
+        finally:
+            self.clean_up(job)
+            self.metrics.episode_finished(job, final_muxed_path)
+
+        return job
+
+    async def download_video_async(self, job):
+        """
+        Download every video source of a job concurrently as asyncio subprocesses.
+
+        Args:
+            job (EpisodeJob): The episode to download the video sources of.
+
+        Returns:
+            None
+        """
+        await self.admit_job_async(job)
+
+        # With stream_mux the sources are downloaded while muxing, by 'stream_mux_files'
+        if self.stream_mux:
+            return
+
+        with self.metrics.stage(job, "video"):
+            try:
+                await gather_or_cancel(
+                    *[self.download_video_source_async(job, data) for data in job.sources]
+                )
+            finally:
+                job.transferred["video"] = sum(
+                    file_size(job.video_path(data)) for data in job.sources
+                )
+
+    async def download_video_source_async(self, job, data):
+        """
+        Download a single video source of a job as an asyncio subprocess.
+
+        Args:
+            job (EpisodeJob): The episode the source belongs to.
+            data (dict): The video source to download.
+
+        Returns:
+            None
+        """
+        stage = "video_{}".format(data["subOrdub"])
+        if self.is_stage_done(job, stage, job.video_path(data)):
+            return
+
+        async with self.async_video_process_slots.get():
+            print(
+                colored_text("[+] DOWNLOADING", "green"),
+                colored_text("JPN" if data["subOrdub"] == "sub" else "ENG", "blue"),
+                colored_text("VIDEO SOURCE", "green"),
+            )
+            if self.download_backend == "native":
+                # Cancelling stops the download thread and waits for it, before 'clean_up' removes its file
+                await self.async_api.run_cancellable(self.download_native_source, job, data)
+            else:
+                await self.async_api.run_blocking(self.record_height, job, data)
+                cmd = await self.async_api.run_blocking(self.video_source_command, job, data)
+                await run_process(cmd)
+
+        self.mark_stage_done(job, stage)
+
+    async def download_subs_async(self, job):
+        """
+        Download every subtitle track of a job concurrently on the request thread pool.
+
+        Args:
+            job (EpisodeJob): The episode to download the subtitles of.
+
+        Returns:
+            None
+        """
+        print(
+            colored_text(
+                "[+] DOWNLOADING SUBTITLES (TOTAL - {} FOUND)".format(
+                    len(job.subtitles)
+                ),
+                "green",
+            )
+        )
+
+        with self.metrics.stage(job, "subs"):
+            try:
+                await gather_or_cancel(
+                    *[
+                        self.async_api.run_blocking(self.download_subtitle, job, index)
+                        for index in range(len(job.subtitles))
+                    ]
+                )
+            finally:
+                job.transferred["subs"] = sum(
+                    file_size(job.subtitle_path(index))
+                    for index in range(len(job.subtitles))
+                )
+
+    async def mux_files_async(self, job):
+        """
+        Mux the files of a job with the 'mux_backend' as an asyncio subprocess.
+
+        Args:
+            job (EpisodeJob): The episode to mux.
+
+        Returns:
+            str: The filename of the resulting muxed MKV file.
+        """
+        if self.stream_mux:
+            return await self.async_api.run_cancellable(self.stream_mux_files, job)
+
+        print(colored_text("[+] MUXING FILES", "green"))
+
+        async with self.async_mux_slots.get():
+            mux_opts, out_name = await self.async_api.run_blocking(self.mux_command, job)
+
+            with self.metrics.stage(job, "mux"):
+                try:
+                    await run_process(mux_opts, success_codes=self.muxer.success_codes)
+                except BaseException:
+                    # Never leave a partial file under the final name
+                    self.remove_file(out_name)
+                    raise
+                finally:
+                    self.muxer.cleanup(out_name)
+                job.transferred["mux"] = file_size(out_name)
+
+        return await self.async_api.run_blocking(self.finalize_mux, job, out_name)
+
+    async def start_dl_async(self, concurrency=4, prefetch=False):
+        """
+        Process the requested episodes on the running event loop, up to 'concurrency' episodes at a time.
+
+        Args:
+            concurrency (int, optional): Maximum number of episodes processed at once. Defaults to 4.
+            prefetch (bool, optional): Resolve the streams and subtitles of the whole range in the background up front (see 'prefetch'). Defaults to False.
+
+        Returns:
+            list: The EpisodeJob (or None) of every requested episode, in order.
+        """
+        if not self.check_dl_type():
+            return []
+
+        self.metrics.reset()
+        self.prefetch_availability()
+
+        if prefetch:
+            self.prefetch()
+
+        slots = asyncio.Semaphore(max(1, int(concurrency)))
+
+        async def limited(episode_number):
+            async with slots:
+                return await self.process_episode(episode_number)
+
+        try:
+            jobs = await gather_or_cancel(
+                *[limited(n) for n in self.requested_episode_numbers()]
+            )
+            await self.async_api.run_blocking(self.wait_for_moves)
+            return jobs
+        finally:
+            self.metrics.run_finished()
+
+    def check_dl_type(self):
+        """
+        Check that 'dl_type' is valid, printing usage instructions if it is not.
+
+        Returns:
+            bool: True if 'dl_type' is valid.
+        """
+        if self.dl_type not in ["sub", "dub", "both"]:
+            
+            print(colored_text("[+] ERROR - Invalid dl_type", "red"))
+            print(
+                colored_text(
+                    "[+] dl_type = dub - TO DOWNLOAD IN ENG AUDIO WITH NO SUBS", "green"
+                )
+            )
+            print(
+                colored_text(
+                    "[+] dl_type = sub - TO DOWNLOAD IN JPN AUDIO WITH ALL AVAILABLE SUBS",
+                    "green",
+                )
+            )
+            print(
+                colored_text(
+                    "[+] dl_type = both - TO DOWNLOAD IN JPN-ENG AUDIO WITH ALL AVAILABLE SUBS",
+                    "green",
+                )
+            )
+            return False
+        return True
+
+    def start_dl(self, workers=None, queue_size=2, prefetch=False):
+        """
+        Start the download process for episodes based on the specified download type and episode range.
+
+        This method initiates the download process according to the specified 'dl_type' and episode range.
+        It checks if the 'dl_type' is valid and provides usage instructions for invalid types.
+        If only a single episode is requested, the 'processor' method is called for that episode.
+        If a range of episodes is requested, the 'processor' method is called for each episode within the range.
+
+        If 'workers' is given, episodes are instead run through an EpisodeScheduler, which pipelines the
+        resolve, video, subs and mux stages so that network, disk and ffmpeg work overlap across episodes.
+
+        Args:
+            workers (dict or int or None, optional): Worker count per stage ("resolve", "video", "subs", "mux"), or a single count for every stage. Defaults to None, which processes one episode at a time.
+            queue_size (int, optional): Maximum number of episodes waiting in front of each stage in scheduler mode. Defaults to 2.
+            prefetch (bool, optional): Resolve the streams and subtitles of the whole range in the background up front (see 'prefetch'), so downloads never wait on the API between episodes. Defaults to False.
+
+        Returns:
+            dict or None: The run report (see MetricsRecorder.run_report), whose "completed" count is below its "episodes" count if any episode failed, or None if 'dl_type' is invalid.
+        """
+
+        if not self.check_dl_type():
+            return None
+
+        self.metrics.reset()
+        self.prefetch_availability()
+
+        if prefetch:
+            self.prefetch()
+
+        if workers is not None:
+            print(self.separator)
+            EpisodeScheduler(self, workers=workers, queue_size=queue_size).run(
+                self.requested_episode_numbers()
+            )
+            self.wait_for_moves()
+            return self.metrics.run_finished()
+
+        # If Single Episode Requested
+        if self.episode_end == 0:
+            print(self.separator)
+            self.processor(self.episode_start)
+
+        # If In Range Episodes Requested
+        for ep_index in range(self.episode_start, (self.episode_end + 1)):
+            print(self.separator)
+            print(f"Processing episode {ep_index}...")
+            self.processor(ep_index)
+
+        self.wait_for_moves()
+        return self.metrics.run_finished()
@@ -0,0 +1,322 @@
+import time, random, threading
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter.
+
+    Tokens are added at 'rate' per second up to 'capacity'. Every call to 'acquire' takes a token,
+    waiting until one is available, so callers are spread out to at most 'rate' calls per second
+    with bursts of up to 'capacity' calls.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens the bucket holds.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Initialize the TokenBucket, starting full.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float or None, optional): Maximum number of tokens. Defaults to max(1, rate).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens if they are available right now.
+
+        Args:
+            tokens (float, optional): Number of tokens to take. Defaults to 1.
+
+        Returns:
+            bool: True if the tokens were taken.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens, waiting until they are available.
+
+        Args:
+            tokens (float, optional): Number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def set_rate(self, rate):
+        """
+        Change the rate tokens are added at, keeping the tokens already in the bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+
+        Returns:
+            None
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a request is refused because the circuit breaker of its host is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    A thread-safe circuit breaker for a single host.
+
+    After 'failure_threshold' failed requests in a row the circuit opens and requests are held back
+    for 'reset_timeout' seconds. The circuit then lets a single trial request through: if it
+    succeeds the circuit closes again, and if it fails the circuit stays open for another period.
+
+    Attributes:
+        failure_threshold (int): Number of failures in a row that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial request is let through.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_request(self):
+        """
+        Check whether a request may be made now.
+
+        Returns:
+            float: 0 if the request may be made, or else the number of seconds to wait before asking again.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0:
+                return remaining
+            if self._trial:
+                # Another request is already probing the host
+                return min(1.0, self.reset_timeout)
+            self._trial = True
+            return 0.0
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class RetryPolicy:
+    """
+    Which requests are retried, how often, and how long to wait between attempts.
+
+    Delays grow exponentially with "full jitter" (a random delay between 0 and the exponential
+    backoff), so clients that failed together do not retry together. A Retry-After header sent with
+    the response takes precedence over the computed delay.
+
+    Attributes:
+        retries (int): Number of retries after the first attempt.
+        backoff (float): Base delay in seconds.
+        max_backoff (float): Maximum delay in seconds, also applied to Retry-After.
+        statuses (frozenset): HTTP status codes that are retried.
+        methods (frozenset): HTTP methods that are safe to retry.
+    """
+
+    def __init__(
+        self,
+        retries=4,
+        backoff=0.5,
+        max_backoff=60.0,
+        statuses=(429, 500, 502, 503, 504),
+        methods=("GET", "HEAD", "OPTIONS"),
+    ):
+        self.retries = max(0, int(retries))
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Get the delay before the next attempt.
+
+        Args:
+            attempt (int): Number of the attempt that failed, starting at 0.
+            retry_after (str or None, optional): The Retry-After header of the failed response, in seconds or as an HTTP date. Defaults to None.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    seconds = None
+            if seconds is not None:
+                return min(self.max_backoff, max(0.0, seconds))
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class RateLimiter:
+    """
+    Per-host rate limiting and circuit breaking shared by every request of a session.
+
+    Hosts with a configured rate get a TokenBucket. When such a host answers 429 Too Many Requests
+    its rate is halved (down to 'min_rate'), and every successful request then adds back 5% of the
+    configured rate, so the limiter settles just below the rate the host tolerates. Every host
+    gets a CircuitBreaker, so a failing host is paused instead of hammered.
+
+    Attributes:
+        rates (dict): Configured requests per second, keyed by host.
+        default_rate (float or None): Requests per second for hosts not in 'rates', or None for no limit.
+        min_rate (float): Lowest rate a throttled host is slowed down to.
+        failure_threshold (int): Failures in a row that open the circuit of a host.
+        reset_timeout (float): Seconds the circuit of a host stays open.
+        max_wait (float): Longest time a request waits for an open circuit before CircuitOpenError is raised.
+    """
+
+    def __init__(
+        self,
+        rates=None,
+        default_rate=None,
+        min_rate=0.5,
+        failure_threshold=5,
+        reset_timeout=30.0,
+        max_wait=120.0,
+    ):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.min_rate = float(min_rate)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_wait = float(max_wait)
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def set_rate(self, host, rate):
+        """
+        Configure the rate of a host.
+
+        Args:
+            host (str): The host, e.g. "api.consumet.org".
+            rate (float or None): Requests per second, or None for no limit.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.rates[host] = rate
+            self._buckets.pop(host, None)
+
+    def bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                rate = self.rates.get(host, self.default_rate)
+                self._buckets[host] = TokenBucket(rate) if rate else None
+            return self._buckets[host]
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def acquire(self, host):
+        """
+        Wait until a request to a host may be made.
+
+        Args:
+            host (str): The host.
+
+        Raises:
+            CircuitOpenError: If the circuit of the host stays open for longer than 'max_wait'.
+
+        Returns:
+            None
+        """
+        breaker = self.breaker(host)
+        waited = 0.0
+        while True:
+            delay = breaker.before_request()
+            if not delay:
+                break
+            if waited + delay > self.max_wait:
+                raise CircuitOpenError("Too many failed requests to {}".format(host))
+            time.sleep(delay)
+            waited += delay
+
+        bucket = self.bucket(host)
+        if bucket is not None:
+            bucket.acquire()
+
+    def record_success(self, host):
+        self.breaker(host).record_success()
+        bucket = self.bucket(host)
+        if bucket is not None and bucket.rate < self.rates.get(host, self.default_rate):
+            base_rate = self.rates.get(host, self.default_rate)
+            bucket.set_rate(min(base_rate, bucket.rate + base_rate * 0.05))
+
+    def record_failure(self, host, throttled=False):
+        self.breaker(host).record_failure()
+        bucket = self.bucket(host)
+        if throttled and bucket is not None:
+            bucket.set_rate(max(self.min_rate, bucket.rate / 2))
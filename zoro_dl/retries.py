@@ -0,0 +1,57 @@
+import threading, functools
+from contextlib import contextmanager
+
+_retry_tracking = threading.local()
+_retry_lock = threading.Lock()
+
+
+@contextmanager
+def track_retries(counts, stage):
+    """
+    Context manager counting the retried requests made by the current thread into a dictionary.
+
+    Args:
+        counts (dict or None): The dictionary to count into, e.g. a job's 'retries'. None stops counting.
+        stage (str): The key to count under, e.g. "video".
+    """
+    previous = getattr(_retry_tracking, "target", None)
+    _retry_tracking.target = (counts, stage) if counts is not None else None
+    try:
+        yield
+    finally:
+        _retry_tracking.target = previous
+
+
+def bind_retries(func):
+    """
+    Bind a callable to the retry counting of the current thread, so it keeps counting into the
+    same dictionary when it runs on another thread, e.g. in a ThreadPoolExecutor.
+
+    Args:
+        func (callable): The callable.
+
+    Returns:
+        callable: The bound callable.
+    """
+    target = getattr(_retry_tracking, "target", None) or (None, None)
+
+    @functools.wraps(func)
+    def bound(*args, **kwargs):
+        with track_retries(*target):
+            return func(*args, **kwargs)
+
+    return bound
+
+
+def count_retry():
+    """
+    Count a retried request for the current thread, see 'track_retries'.
+
+    Returns:
+        None
+    """
+    target = getattr(_retry_tracking, "target", None)
+    if target is not None:
+        counts, stage = target
+        with _retry_lock:
+            counts[stage] = counts.get(stage, 0) + 1
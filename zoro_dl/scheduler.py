@@ -0,0 +1,191 @@
+import threading, time, queue
+from .utils import colored_text, get_readable_time
+
+STAGES = ("resolve", "video", "subs", "mux")
+
+_STAGE_ERRORS = {
+    "resolve": "Getting Streams",
+    "video": "Downloading Video",
+    "subs": "Downloading Subs",
+    "mux": "Muxing Files",
+}
+
+_DONE = object()
+
+
+class EpisodeScheduler:
+    """
+    A pipelined scheduler that runs episode jobs through the resolve, video, subs and mux stages concurrently.
+
+    Every stage has its own pool of worker threads and stages are connected by bounded queues, so episode N+1
+    can be resolving and downloading while episode N is muxing. The bounded queues keep the number of episodes
+    whose temp files are waiting on disk predictable on long-running series.
+
+    Attributes:
+        zoro (ZORO): The ZORO instance whose stage methods are used to process episode jobs.
+        workers (dict): Number of worker threads for each stage.
+        queue_size (int): Maximum number of episodes waiting in front of each stage.
+    """
+
+    def __init__(self, zoro, workers=None, queue_size=2):
+        """
+        Initialize the EpisodeScheduler.
+
+        Args:
+            zoro (ZORO): The ZORO instance to schedule episodes for.
+            workers (dict or int or None, optional): Worker count per stage ("resolve", "video", "subs", "mux"), or a single count used for every stage. Stages not listed get one worker, except "mux" which gets the ZORO instance's 'max_mux_processes'. Defaults to None.
+            queue_size (int, optional): Maximum number of episodes waiting in front of each stage. Defaults to 2.
+        """
+        if isinstance(workers, int):
+            workers = {stage: workers for stage in STAGES}
+        workers = workers or {}
+
+        unknown_stages = set(workers) - set(STAGES)
+        if unknown_stages:
+            raise ValueError("Unknown stages: {}".format(", ".join(sorted(unknown_stages))))
+
+        self.zoro = zoro
+        defaults = {"mux": zoro.max_mux_processes}
+        self.workers = {
+            stage: max(1, int(workers.get(stage, defaults.get(stage, 1)))) for stage in STAGES
+        }
+        self.queue_size = max(1, int(queue_size))
+
+    def run(self, episode_numbers):
+        """
+        Process the given episodes through all stages and block until every episode has left the pipeline.
+
+        Args:
+            episode_numbers (iterable): The episode numbers to process.
+
+        Returns:
+            None
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in STAGES]
+        threads = []
+
+        for index, stage in enumerate(STAGES):
+            next_queue = queues[index + 1] if index + 1 < len(STAGES) else None
+            next_workers = (
+                self.workers[STAGES[index + 1]] if next_queue is not None else 0
+            )
+            remaining = [self.workers[stage]]
+            remaining_lock = threading.Lock()
+
+            for worker_index in range(self.workers[stage]):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(
+                        stage,
+                        queues[index],
+                        next_queue,
+                        next_workers,
+                        remaining,
+                        remaining_lock,
+                    ),
+                    name="zoro-{}-{}".format(stage, worker_index),
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        for episode_number in episode_numbers:
+            queues[0].put(episode_number)
+
+        for _ in range(self.workers[STAGES[0]]):
+            queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+
+    def _worker(self, stage, in_queue, next_queue, next_workers, remaining, remaining_lock):
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                break
+
+            job = self._run_stage(stage, item)
+            if job is not None and next_queue is not None:
+                next_queue.put(job)
+
+        # The last worker of a stage to finish tells every worker of the next stage to stop
+        with remaining_lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+
+        if last_worker and next_queue is not None:
+            for _ in range(next_workers):
+                next_queue.put(_DONE)
+
+    def _run_stage(self, stage, item):
+        return run_stage(self.zoro, stage, item)
+
+
+def run_stage(zoro, stage, item):
+    """
+    Run a single stage of the pipeline for an episode of a ZORO instance.
+
+    Args:
+        zoro (ZORO): The ZORO instance whose stage methods process the episode.
+        stage (str): The stage to run.
+        item (int or EpisodeJob): The episode number for the "resolve" stage, or the episode's job for every later stage.
+
+    Returns:
+        EpisodeJob or None: The job to pass on to the next stage, or None if the episode leaves the pipeline.
+    """
+    job = item if stage != "resolve" else None
+    final_muxed_path = None
+    try:
+        if stage == "resolve":
+            completed_path = zoro.completed_path(item)
+            if completed_path is not None:
+                print(colored_text(f"[+] ALREADY DOWNLOADED - {completed_path}", "yellow"))
+                return None
+
+            job = zoro.resolve_job(item)
+            print(
+                colored_text("[+] QUEUED", "green"),
+                colored_text("- {}".format(job.name), "blue"),
+                colored_text("- {}p".format(zoro.resolution), "yellow"),
+            )
+
+        elif stage == "video":
+            zoro.download_video(job)
+
+        elif stage == "subs":
+            if len(job.subtitles) >= 1:
+                zoro.download_subs(job)
+
+        elif stage == "mux":
+            final_muxed_path = zoro.mux_files(job)
+            print(
+                colored_text(
+                    f"[+] TASK COMPLETED IN {get_readable_time(time.time() - job.started_at)}",
+                    "yellow",
+                )
+            )
+            print(colored_text(f"[+] FILE {final_muxed_path}", "blue"))
+
+    except Exception as e:
+        if job is not None:
+            job.errors.append("{}: {}".format(stage, e))
+        else:
+            zoro.metrics.resolve_failed(item, e)
+        print(
+            colored_text(
+                "[+] ERROR - {} (Episode {})".format(
+                    _STAGE_ERRORS[stage],
+                    item if job is None else job.episode_number,
+                ),
+                "red",
+            )
+        )
+        print(colored_text("[+] ERROR - {}".format(e), "red"))
+
+    if stage == "mux":
+        zoro.clean_up(job)
+        zoro.metrics.episode_finished(job, final_muxed_path)
+
+    # Like processor, a failed download still goes on to muxing what is available,
+    # but an episode without streams (job is None) leaves the pipeline
+    return job
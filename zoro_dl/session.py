@@ -0,0 +1,137 @@
+import time, threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from .ratelimit import RateLimiter, RetryPolicy
+from .retries import track_retries, bind_retries, count_retry
+
+DEFAULT_TIMEOUT = (10, 60)
+DEFAULT_POOL_SIZE = 32
+
+# Transport errors worth another attempt; a truncated body raises ChunkedEncodingError
+RETRYABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+)
+
+# Requests per second for the APIs every episode hits; stream CDNs are only protected by the circuit breakers
+DEFAULT_RATE_LIMITS = {
+    "api.consumet.org": 5.0,
+    "aniwatch.to": 5.0,
+}
+
+
+class PooledSession(requests.Session):
+    """
+    A requests Session with a sized keep-alive connection pool, a default timeout, per-host rate
+    limiting and retries.
+
+    Every request made through this session reuses warm TCP/TLS connections from the pool,
+    and requests made without an explicit timeout use the session's default timeout instead of
+    waiting forever on a hung socket. Requests wait for the RateLimiter of their host, and requests
+    failing with a connection error, a timeout, a truncated or undecodable body or a retryable status
+    (429 and 5xx by default) are retried with jittered exponential backoff according to the RetryPolicy, honouring Retry-After.
+    Retries are counted with 'track_retries'. Once the retries are exhausted the last response is
+    returned as it is, so callers still see the failure through 'raise_for_status'. Any other exception
+    is raised at once, and counted as a failure by the host's circuit breaker.
+
+    Attributes:
+        timeout (float or tuple): The default (connect, read) timeout applied to every request.
+        limiter (RateLimiter or None): The per-host rate limiter and circuit breakers, or None to disable them.
+        retry_policy (RetryPolicy or None): The retry policy, or None to disable retries.
+    """
+
+    def __init__(
+        self,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        limiter=None,
+        retry_policy=None,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.limiter = limiter
+        self.retry_policy = retry_policy
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        policy = self.retry_policy
+        retries = policy.retries if policy and method.upper() in policy.methods else 0
+        attempt = 0
+
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire(host)
+
+            try:
+                response = super().request(method, url, **kwargs)
+            except RETRYABLE_ERRORS:
+                if self.limiter is not None:
+                    self.limiter.record_failure(host)
+                if attempt >= retries:
+                    raise
+                delay = policy.delay(attempt)
+            except Exception:
+                # Every outcome is recorded, or a failed half-open trial would hold the circuit forever
+                if self.limiter is not None:
+                    self.limiter.record_failure(host)
+                raise
+            else:
+                if policy is None or response.status_code not in policy.statuses:
+                    if self.limiter is not None:
+                        self.limiter.record_success(host)
+                    return response
+
+                if self.limiter is not None:
+                    self.limiter.record_failure(host, throttled=response.status_code == 429)
+                if attempt >= retries:
+                    return response
+                delay = policy.delay(attempt, response.headers.get("Retry-After"))
+                response.close()
+
+            count_retry()
+            attempt += 1
+            time.sleep(delay)
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def create_session(rate_limits=None):
+    """
+    Create a PooledSession with its own rate limiter and the default RetryPolicy.
+
+    Args:
+        rate_limits (dict or None, optional): Requests per second for each host, overriding DEFAULT_RATE_LIMITS. None for a host removes its limit. Defaults to None.
+
+    Returns:
+        PooledSession: The new session.
+    """
+    return PooledSession(
+        limiter=RateLimiter({**DEFAULT_RATE_LIMITS, **(rate_limits or {})}),
+        retry_policy=RetryPolicy(),
+    )
+
+
+def get_session():
+    """
+    Get the process-wide shared PooledSession, creating it on first use.
+
+    The shared session rate limits the APIs with DEFAULT_RATE_LIMITS and retries failed requests
+    with the default RetryPolicy, so every ZORO instance of the process shares the same per-host limits.
+
+    Returns:
+        PooledSession: The shared session.
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+    return _shared_session
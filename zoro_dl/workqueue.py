@@ -0,0 +1,571 @@
+import os, abc, json, time, socket, sqlite3, threading, itertools
+from .processor import ZORO
+from .anime_api import AnimeAPI, DEFAULT_API_URL
+from .metadata import DEFAULT_CACHE_DIR
+from .journal import JobJournal
+from .job import requested_episode_numbers
+from .utils import extract_zoro_id, colored_text
+from .scheduler import STAGES, run_stage
+
+DEFAULT_LEASE_SECONDS = 300
+
+
+class WorkItem:
+    """
+    An episode job leased from a WorkQueue.
+
+    Attributes:
+        id (str): The job id, the job journal key of the episode.
+        payload (dict): What to download: "url", "season", "episode", "dl_type", "resolution" and ZORO "options".
+        attempts (int): Number of times the job was leased, this lease included.
+        worker (str): The worker holding the lease.
+        lease_expires (float): When the lease expires unless it is renewed with a heartbeat.
+    """
+
+    __slots__ = ("id", "payload", "attempts", "worker", "lease_expires")
+
+    def __init__(self, id, payload, attempts, worker, lease_expires):
+        self.id = id
+        self.payload = payload
+        self.attempts = attempts
+        self.worker = worker
+        self.lease_expires = lease_expires
+
+    def __repr__(self):
+        return "WorkItem(id={!r}, attempts={!r}, worker={!r})".format(self.id, self.attempts, self.worker)
+
+
+class WorkQueue(abc.ABC):
+    """
+    The interface of a work queue shared by a Coordinator and any number of Workers, on one or many machines.
+
+    Jobs go from "pending" to "leased" when a worker takes them, and to "done" or "failed" when it reports
+    back. A lease lasts 'lease_seconds' unless the worker renews it with 'heartbeat', so the job of a worker
+    that crashed or lost its network is handed to another worker once its lease expires. A job is retried
+    until it has been leased 'max_attempts' times. Backends implement every method of this class.
+    """
+
+    @abc.abstractmethod
+    def enqueue(self, jobs, priority=0):
+        """
+        Add jobs to the queue. Jobs whose id is already queued are left as they are.
+
+        Args:
+            jobs (list): (job id, payload) pairs.
+            priority (int, optional): Higher priorities are leased first. Defaults to 0.
+
+        Returns:
+            list: The ids of the jobs that were added.
+        """
+
+    @abc.abstractmethod
+    def lease(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Lease the next pending job, or a job whose lease has expired.
+
+        Args:
+            worker (str): The id of the worker taking the job.
+            lease_seconds (float, optional): How long the lease lasts without a heartbeat. Defaults to DEFAULT_LEASE_SECONDS.
+
+        Returns:
+            WorkItem or None: The leased job, or None if no job is available.
+        """
+
+    @abc.abstractmethod
+    def heartbeat(self, job_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Renew the lease of a job.
+
+        Args:
+            job_id (str): The job id.
+            worker (str): The id of the worker holding the lease.
+            lease_seconds (float, optional): How long the renewed lease lasts. Defaults to DEFAULT_LEASE_SECONDS.
+
+        Returns:
+            bool: False if the worker no longer holds the lease, e.g. because it expired and was reclaimed.
+        """
+
+    @abc.abstractmethod
+    def complete(self, job_id, worker, result=None):
+        """
+        Mark a leased job as done.
+
+        Args:
+            job_id (str): The job id.
+            worker (str): The id of the worker holding the lease.
+            result (str or None, optional): The result of the job, e.g. the path of the muxed file. Defaults to None.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+
+    @abc.abstractmethod
+    def fail(self, job_id, worker, error):
+        """
+        Report a leased job as failed. It is queued again unless it ran out of attempts.
+
+        Args:
+            job_id (str): The job id.
+            worker (str): The id of the worker holding the lease.
+            error (str): Why the job failed.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+
+    @abc.abstractmethod
+    def reclaim(self):
+        """
+        Return the jobs of expired leases to the queue, or fail them if they ran out of attempts.
+
+        Returns:
+            int: Number of jobs reclaimed.
+        """
+
+    @abc.abstractmethod
+    def counts(self):
+        """
+        Count the jobs in every state.
+
+        Returns:
+            dict: Number of "pending", "leased", "done" and "failed" jobs.
+        """
+
+    @abc.abstractmethod
+    def jobs(self, state=None):
+        """
+        List the jobs of the queue.
+
+        Args:
+            state (str or None, optional): Only list the jobs in this state. Defaults to None.
+
+        Returns:
+            list: A dictionary per job with its "id", "state", "attempts", "worker", "error" and "result".
+        """
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    A WorkQueue kept in a SQLite database, shared by every process that can open the file.
+
+    Leases are taken in an immediate transaction, so concurrent workers never lease the same job. SQLite
+    locking is only reliable on a local disk, so this backend is meant for workers on a single machine,
+    e.g. to test a setup before moving it to a queue backend shared over the network.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+        max_attempts (int): Number of times a job is leased before it is failed for good.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        """
+        Initialize the SQLiteWorkQueue, creating the database if needed.
+
+        Args:
+            path (str): Path of the SQLite database.
+            max_attempts (int, optional): Number of times a job is leased before it is failed for good. Defaults to 3.
+        """
+        self.path = path
+        self.max_attempts = max(1, int(max_attempts))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Autocommit, so every transaction is opened explicitly with the locking it needs
+        self._connection = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    seq INTEGER NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_expires REAL,
+                    error TEXT,
+                    result TEXT,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (state, priority DESC, seq)"
+            )
+
+    def _transaction(self, immediate=True):
+        return _Transaction(self._connection, self._lock, immediate)
+
+    def enqueue(self, jobs, priority=0):
+        added = []
+        now = time.time()
+        with self._transaction() as connection:
+            seq = connection.execute("SELECT COALESCE(MAX(seq), 0) FROM jobs").fetchone()[0]
+            for job_id, payload in jobs:
+                seq += 1
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO jobs (id, payload, priority, seq, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, json.dumps(payload), int(priority), seq, now),
+                )
+                if cursor.rowcount:
+                    added.append(job_id)
+        return added
+
+    def lease(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = time.time()
+        with self._transaction() as connection:
+            self._reclaim(connection, now)
+            row = connection.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE state = 'pending' "
+                "ORDER BY priority DESC, seq LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            lease_expires = now + lease_seconds
+            connection.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                (worker, lease_expires, now, row[0]),
+            )
+        return WorkItem(row[0], json.loads(row[1]), row[2] + 1, worker, lease_expires)
+
+    def heartbeat(self, job_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (now + lease_seconds, now, job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result=None):
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = 'done', result = ?, error = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (result, time.time(), job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (self.max_attempts, error, time.time(), job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def reclaim(self):
+        with self._transaction() as connection:
+            return self._reclaim(connection, time.time())
+
+    def _reclaim(self, connection, now):
+        cursor = connection.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = COALESCE(error, 'lease expired'), lease_expires = NULL, updated_at = ? "
+            "WHERE state = 'leased' AND lease_expires < ?",
+            (self.max_attempts, now, now),
+        )
+        return cursor.rowcount
+
+    def counts(self):
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        with self._transaction(immediate=False) as connection:
+            for state, count in connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+                counts[state] = count
+        return counts
+
+    def jobs(self, state=None):
+        query = "SELECT id, state, attempts, worker, error, result FROM jobs"
+        parameters = ()
+        if state is not None:
+            query += " WHERE state = ?"
+            parameters = (state,)
+        with self._transaction(immediate=False) as connection:
+            rows = connection.execute(query + " ORDER BY priority DESC, seq", parameters).fetchall()
+        return [
+            dict(zip(("id", "state", "attempts", "worker", "error", "result"), row))
+            for row in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class _Transaction:
+    def __init__(self, connection, lock, immediate):
+        self.connection = connection
+        self.lock = lock
+        self.immediate = immediate
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.connection.execute("BEGIN IMMEDIATE" if self.immediate else "BEGIN")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.lock.release()
+
+
+class Coordinator:
+    """
+    Expands series into per-episode jobs on a WorkQueue and keeps an eye on their progress.
+
+    Attributes:
+        queue (WorkQueue): The work queue.
+        api (AnimeAPI or None): The AnimeAPI the episode lists are fetched with, or None for one per 'submit' call.
+    """
+
+    def __init__(self, queue, api=None):
+        self.queue = queue
+        self.api = api
+
+    def submit(self, url, season="1", episode=None, dl_type="both", resolution="1080p", priority=0, **options):
+        """
+        Queue one job per requested episode of a series.
+
+        The job ids are the job journal keys of the episodes, so submitting a range again only adds the
+        episodes that are not queued yet.
+
+        Args:
+            url (str): The URL of the series on ZORO.
+            season (str, optional): The season number. Defaults to "1".
+            episode (str or None, optional): Episodes to download, e.g. "1-5" or "10", or None for the whole season. Defaults to None.
+            dl_type (str, optional): Download type: "sub", "dub" or "both". Defaults to "both".
+            resolution (str, optional): The resolution to download. Defaults to "1080p".
+            priority (int, optional): Higher priorities are leased first. Defaults to 0.
+            **options: ZORO options for the workers, e.g. download_backend. They have to be JSON serializable. Their "cache_dir" and "api_url" are also used to fetch the episode list.
+
+        Returns:
+            list: The ids of the jobs that were added.
+        """
+        zoro_id = extract_zoro_id(url)
+        episode_count = None
+        if episode is None:
+            # Only the episode list is needed, and only to expand a whole season
+            api = self.api or AnimeAPI(
+                cache_dir=options.get("cache_dir", DEFAULT_CACHE_DIR),
+                base_url=options.get("api_url", DEFAULT_API_URL),
+            )
+            episode_count = len(api.get_episodes(zoro_id))
+
+        jobs = [
+            (
+                JobJournal.episode_key(zoro_id, season, episode_number, dl_type, resolution.replace("p", "")),
+                {
+                    "url": url,
+                    "season": str(season),
+                    "episode": episode_number,
+                    "dl_type": dl_type,
+                    "resolution": resolution,
+                    "options": options,
+                },
+            )
+            for episode_number in requested_episode_numbers(episode, episode_count)
+        ]
+        return self.queue.enqueue(jobs, priority=priority)
+
+    def reclaim(self):
+        """
+        Return the jobs of expired leases to the queue now, instead of when the next worker leases.
+
+        Returns:
+            int: Number of jobs reclaimed.
+        """
+        count = self.queue.reclaim()
+        if count:
+            print(colored_text("[+] RECLAIMED {} EXPIRED LEASES".format(count), "yellow"))
+        return count
+
+    def wait(self, poll_interval=10):
+        """
+        Reclaim expired leases until no job is pending or leased anymore.
+
+        Args:
+            poll_interval (float, optional): Seconds between checks. Defaults to 10.
+
+        Returns:
+            dict: The final job counts, see 'WorkQueue.counts'.
+        """
+        while True:
+            self.reclaim()
+            counts = self.queue.counts()
+            if not counts["pending"] and not counts["leased"]:
+                return counts
+            time.sleep(poll_interval)
+
+
+_worker_ids = itertools.count(1)
+
+
+class Worker:
+    """
+    Leases episode jobs from a WorkQueue and downloads them, renewing the lease while it works.
+
+    Run one Worker per machine (or several, each on its own thread) against the same queue and every
+    episode is downloaded once, by whichever worker leases it first. The ZORO instance of every series
+    is created once per worker and reused for all of its episodes.
+
+    Attributes:
+        queue (WorkQueue): The work queue.
+        worker_id (str): The id the worker leases jobs under.
+        lease_seconds (float): How long a lease lasts without a heartbeat.
+        heartbeat_interval (float): Seconds between heartbeats of the job being worked on.
+        options (dict): ZORO options of this worker, overriding the options of the jobs, e.g. output_dir or temp_dir.
+    """
+
+    def __init__(self, queue, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, heartbeat_interval=None, **options):
+        """
+        Initialize the Worker.
+
+        Args:
+            queue (WorkQueue): The work queue.
+            worker_id (str or None, optional): The id the worker leases jobs under. Defaults to "{hostname}-{pid}-{n}".
+            lease_seconds (float, optional): How long a lease lasts without a heartbeat. Defaults to DEFAULT_LEASE_SECONDS.
+            heartbeat_interval (float or None, optional): Seconds between heartbeats. Defaults to a third of 'lease_seconds'.
+            **options: ZORO options of this worker, overriding the options of the jobs.
+        """
+        self.queue = queue
+        self.worker_id = worker_id or "{}-{}-{}".format(socket.gethostname(), os.getpid(), next(_worker_ids))
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3.0
+        self.options = options
+        self._zoros = {}
+        self._stop = threading.Event()
+
+    def stop(self):
+        """
+        Stop leasing new jobs; the job being worked on is finished first.
+
+        Returns:
+            None
+        """
+        self._stop.set()
+
+    def run(self, max_jobs=None, poll_interval=5, exit_when_idle=True):
+        """
+        Lease and process jobs until the queue is empty, 'max_jobs' were processed or 'stop' is called.
+
+        Args:
+            max_jobs (int or None, optional): Maximum number of jobs to process. Defaults to None.
+            poll_interval (float, optional): Seconds to wait before leasing again when no job is available. Defaults to 5.
+            exit_when_idle (bool, optional): Return once no job is pending or leased. Defaults to True; False keeps waiting for new jobs.
+
+        Returns:
+            int: Number of jobs processed.
+        """
+        processed = 0
+        while not self._stop.is_set() and (max_jobs is None or processed < max_jobs):
+            item = self.queue.lease(self.worker_id, self.lease_seconds)
+            if item is None:
+                if exit_when_idle and not self.queue.counts()["leased"]:
+                    break
+                self._stop.wait(poll_interval)
+                continue
+
+            self.process(item)
+            processed += 1
+
+        for zoro in self._zoros.values():
+            zoro.wait_for_moves()
+        return processed
+
+    def zoro_for(self, payload):
+        """
+        Get the ZORO instance of the series of a job, creating it on first use.
+
+        Args:
+            payload (dict): The job payload.
+
+        Returns:
+            ZORO: The ZORO instance.
+        """
+        options = dict(payload.get("options") or {})
+        options.update(self.options)
+        key = json.dumps(
+            [payload["url"], payload["season"], payload["dl_type"], payload["resolution"], options],
+            sort_keys=True,
+            default=str,
+        )
+        zoro = self._zoros.get(key)
+        if zoro is None:
+            zoro = self._zoros[key] = ZORO(
+                payload["url"],
+                season=payload["season"],
+                resolution=payload["resolution"],
+                dl_type=payload["dl_type"],
+                **options
+            )
+        return zoro
+
+    def process(self, item):
+        """
+        Download the episode of a leased job and report the outcome to the queue.
+
+        Args:
+            item (WorkItem): The leased job.
+
+        Returns:
+            bool: True if the episode was completed.
+        """
+        print(colored_text("[+] LEASED {} (attempt {})".format(item.id, item.attempts), "green"))
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(item, stop_heartbeat), daemon=True)
+        heartbeat.start()
+
+        try:
+            zoro = self.zoro_for(item.payload)
+            episode_number = int(item.payload["episode"])
+            job = episode_number
+            for stage in STAGES:
+                job = run_stage(zoro, stage, job)
+                if job is None:
+                    break
+
+            zoro.wait_for_moves()
+            final_path = zoro.completed_path(episode_number)
+            if job is None:
+                # Left at "resolve": already downloaded, or its streams could not be resolved
+                error = None if final_path is not None else "Episode {} could not be resolved".format(episode_number)
+            else:
+                mux_errors = [error for error in job.errors if error.startswith("mux:")]
+                error = "; ".join(mux_errors) or None
+        except Exception as e:
+            final_path, error = None, str(e)
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+        if error is None:
+            reported = self.queue.complete(item.id, self.worker_id, final_path)
+        else:
+            reported = self.queue.fail(item.id, self.worker_id, error)
+        if not reported:
+            print(colored_text("[+] LEASE LOST - {}".format(item.id), "yellow"))
+        return error is None
+
+    def _heartbeat(self, item, stop_heartbeat):
+        while not stop_heartbeat.wait(self.heartbeat_interval):
+            try:
+                if not self.queue.heartbeat(item.id, self.worker_id, self.lease_seconds):
+                    print(colored_text("[+] LEASE LOST - {}".format(item.id), "yellow"))
+                    return
+            except Exception as e:
+                print(colored_text("[+] ERROR - Heartbeat {} - {}".format(item.id, e), "red"))